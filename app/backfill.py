@@ -0,0 +1,327 @@
+"""
+Checkpointed bulk re-analysis of historical feedback.
+
+Run after a prompt or model change to refresh stored analyses:
+
+    python -m app.backfill --since 2025-01-01 --concurrency 4 --rate 2
+
+Feedback ids are streamed in keyset-paged chunks. Each chunk is analyzed
+through GeminiService with bounded concurrency, upserted into ``analysis`` and
+then checkpointed. Interrupt at any time and rerun the same command to resume.
+The backfill pauses while the live analysis queue is deeper than
+``--max-queue-depth`` so intake analysis is never starved.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import AsyncSessionLocal, engine
+from app.logging_config import get_logger, setup_logging
+from app.models.analysis import Analysis
+from app.models.feedback import Feedback
+from app.services.analysis_cache import analysis_cache
+from app.services.analysis_queue import analysis_queue
+from app.services.feedback_service import FeedbackService
+from app.services.gemini_limiter import TokenBucket
+from app.services.gemini_service import gemini_service
+from app.utils.content_hash import compute_content_hash
+from app.utils.helpers import format_datetime
+
+logger = get_logger(__name__)
+
+# Columns refreshed on conflict; feedback_id is the conflict target, generated columns follow
+_UPSERT_COLUMNS = [
+    column.name
+    for column in Analysis.__table__.columns
+    if column.name not in ("id", "feedback_id", "analyzed_at") and column.computed is None
+]
+
+# Failed ids kept inline in the checkpoint; the full list goes to the .failed file
+FAILED_SAMPLE_SIZE = 50
+
+
+class Checkpoint:
+    """Progress persisted as JSON after every chunk (written atomically).
+
+    Only a failure count and a capped sample live in the JSON; every failed id
+    is appended to ``failures_path`` so checkpoint writes stay constant-size.
+    """
+
+    def __init__(self, path: Path, scope: Dict[str, Any]) -> None:
+        self.path = path
+        self.scope = scope
+        self.last_id = 0
+        self.processed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.failed_sample: List[int] = []
+
+    @property
+    def failures_path(self) -> Path:
+        return self.path.with_suffix(self.path.suffix + ".failed")
+
+    def reset(self) -> None:
+        for path in (self.path, self.failures_path):
+            if path.exists():
+                path.unlink()
+
+    def record_failures(self, ids: Sequence[int]) -> None:
+        """Count failed ids, keep the first few inline and append all to the failures file."""
+        if not ids:
+            return
+        self.failed += len(ids)
+        self.failed_sample.extend(ids[: max(0, FAILED_SAMPLE_SIZE - len(self.failed_sample))])
+        with self.failures_path.open("a", encoding="utf-8") as handle:
+            handle.writelines(f"{feedback_id}\n" for feedback_id in ids)
+
+    def load(self) -> bool:
+        """Resume from ``path``. Returns False if there is nothing to resume."""
+        if not self.path.exists():
+            return False
+        data = json.loads(self.path.read_text(encoding="utf-8"))
+        if data.get("scope") != self.scope:
+            raise SystemExit(
+                f"Checkpoint {self.path} was written for a different selection "
+                f"({data.get('scope')}); pass --reset to start over"
+            )
+        self.last_id = int(data["last_id"])
+        self.processed = int(data["processed"])
+        self.succeeded = int(data["succeeded"])
+        # Older checkpoints stored every failed id inline
+        legacy_ids = list(data.get("failed_ids", []))
+        self.failed = int(data.get("failed", len(legacy_ids)))
+        self.failed_sample = list(data.get("failed_sample", legacy_ids))[:FAILED_SAMPLE_SIZE]
+        return True
+
+    def save(self) -> None:
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(
+            json.dumps(
+                {
+                    "scope": self.scope,
+                    "last_id": self.last_id,
+                    "processed": self.processed,
+                    "succeeded": self.succeeded,
+                    "failed": self.failed,
+                    "failed_sample": self.failed_sample,
+                    "saved_at": datetime.now().isoformat(),
+                }
+            ),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
+
+
+class Backfill:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.bucket = TokenBucket(args.rate, max(1, int(args.rate)))
+        self.semaphore = asyncio.Semaphore(max(1, args.concurrency))
+        self.checkpoint = Checkpoint(Path(args.checkpoint), self.scope())
+
+    def scope(self) -> Dict[str, Any]:
+        """The selection a checkpoint belongs to (resuming a different one is refused)."""
+        args = self.args
+        return {
+            "since": args.since,
+            "until": args.until,
+            "department": args.department,
+            "only_missing": args.only_missing,
+        }
+
+    def _filters(self) -> List[Any]:
+        args = self.args
+        filters: List[Any] = []
+        if args.since:
+            filters.append(Feedback.created_at >= datetime.fromisoformat(args.since))
+        if args.until:
+            filters.append(Feedback.created_at < datetime.fromisoformat(args.until))
+        if args.department:
+            filters.append(Feedback.department == args.department)
+        if args.only_missing:
+            filters.append(~select(Analysis.id).where(Analysis.feedback_id == Feedback.id).exists())
+        return filters
+
+    async def remaining(self, db: AsyncSession) -> int:
+        result = await db.execute(
+            select(func.count(Feedback.id)).where(Feedback.id > self.checkpoint.last_id, *self._filters())
+        )
+        return int(result.scalar() or 0)
+
+    async def next_chunk(self, db: AsyncSession) -> Sequence[Any]:
+        result = await db.execute(
+            select(
+                Feedback.id,
+                Feedback.feedback_text,
+                Feedback.department,
+                Feedback.doctor_name,
+                Feedback.visit_date,
+                Feedback.rating,
+            )
+            .where(Feedback.id > self.checkpoint.last_id, *self._filters())
+            .order_by(Feedback.id)
+            .limit(self.args.chunk_size)
+        )
+        return result.all()
+
+    async def wait_for_live_queue(self) -> None:
+        """Yield to intake: hold off while the live analysis queue is backed up."""
+        while True:
+            async with AsyncSessionLocal() as session:
+                depth = await analysis_queue.depth(session)
+            if depth <= self.args.max_queue_depth:
+                return
+            logger.info("Live analysis queue depth %s > %s - backfill paused", depth, self.args.max_queue_depth)
+            await asyncio.sleep(self.args.queue_poll_interval)
+
+    async def analyze(self, row: Any) -> Dict[str, Any]:
+        async with self.semaphore:
+            await self.bucket.acquire()
+            return await gemini_service.analyze_feedback_with_retry(
+                feedback_text=row.feedback_text,
+                department=row.department,
+                doctor_name=row.doctor_name,
+                visit_date=format_datetime(row.visit_date),
+                rating=row.rating,
+            )
+
+    async def store(self, rows: Sequence[Any], results: Sequence[Dict[str, Any]]) -> List[int]:
+        """Upsert successful analyses and refresh their cache entries. Returns stored ids."""
+        values = [
+            FeedbackService.analysis_values(row.id, result)
+            for row, result in zip(rows, results)
+            if "error" not in result
+        ]
+        if not values:
+            return []
+        stmt = pg_insert(Analysis).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Analysis.feedback_id],
+            set_={
+                **{name: stmt.excluded[name] for name in _UPSERT_COLUMNS},
+                "analyzed_at": func.now(),
+            },
+        )
+        stored = [value["feedback_id"] for value in values]
+        async with AsyncSessionLocal() as session:
+            await session.execute(stmt)
+            # Staff-set statuses (reviewed/resolved/...) are left alone
+            await session.execute(
+                update(Feedback)
+                .where(
+                    Feedback.id.in_(stored),
+                    Feedback.status.in_(("pending_analysis", "analysis_failed")),
+                )
+                .values(status="reviewed")
+            )
+            for row, result in zip(rows, results):
+                if "error" not in result:
+                    content_hash = compute_content_hash(row.feedback_text, row.department, row.rating)
+                    await analysis_cache.set(session, content_hash, result)
+            await session.commit()
+        return stored
+
+    async def run(self) -> Dict[str, Any]:
+        checkpoint = self.checkpoint
+        if self.args.reset:
+            checkpoint.reset()
+        if checkpoint.load():
+            logger.info(
+                "Resuming backfill after feedback %s (%s processed)", checkpoint.last_id, checkpoint.processed
+            )
+
+        async with AsyncSessionLocal() as session:
+            total = await self.remaining(session)
+        logger.info("Backfill: %s feedback rows to analyze", total)
+
+        started = time.monotonic()
+        done = 0
+        while True:
+            await self.wait_for_live_queue()
+            async with AsyncSessionLocal() as session:
+                rows = await self.next_chunk(session)
+            if not rows:
+                break
+
+            results = await asyncio.gather(*(self.analyze(row) for row in rows))
+            stored = set(await self.store(rows, results))
+
+            checkpoint.last_id = rows[-1].id
+            checkpoint.processed += len(rows)
+            checkpoint.succeeded += len(stored)
+            checkpoint.record_failures([row.id for row in rows if row.id not in stored])
+            checkpoint.save()
+
+            done += len(rows)
+            elapsed = time.monotonic() - started
+            rate = done / elapsed if elapsed else 0.0
+            eta = (total - done) / rate if rate else None
+            logger.info(
+                "Backfill %s/%s (%.1f%%) %.2f rows/s ETA %s, last id %s, %s failed",
+                done,
+                total,
+                100.0 * done / total if total else 100.0,
+                rate,
+                f"{eta / 60:.1f}min" if eta is not None else "n/a",
+                checkpoint.last_id,
+                checkpoint.failed,
+            )
+
+        elapsed = time.monotonic() - started
+        summary = {
+            "processed": checkpoint.processed,
+            "succeeded": checkpoint.succeeded,
+            "failed": checkpoint.failed,
+            "failed_ids": checkpoint.failed_sample,
+            "failures_file": str(checkpoint.failures_path) if checkpoint.failed else None,
+            "elapsed_seconds": round(elapsed, 1),
+            "rows_per_second": round(done / elapsed, 2) if elapsed else None,
+        }
+        logger.info("Backfill complete: %s", summary)
+        return summary
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--since", help="Only feedback created at/after this ISO date")
+    parser.add_argument("--until", help="Only feedback created before this ISO date")
+    parser.add_argument("--department", help="Only this department")
+    parser.add_argument("--only-missing", action="store_true", help="Only feedback without an analysis")
+    parser.add_argument("--chunk-size", type=int, default=100, help="Rows fetched and checkpointed per chunk")
+    parser.add_argument("--concurrency", type=int, default=2, help="Gemini requests in flight")
+    parser.add_argument("--rate", type=float, default=0.0, help="Max Gemini requests per second (0 = unlimited)")
+    parser.add_argument(
+        "--max-queue-depth", type=int, default=10, help="Pause while more live analysis jobs are queued"
+    )
+    parser.add_argument("--queue-poll-interval", type=float, default=5.0)
+    parser.add_argument("--checkpoint", default=".backfill_checkpoint.json", help="Progress file for resuming")
+    parser.add_argument("--reset", action="store_true", help="Ignore any existing checkpoint")
+    return parser.parse_args(argv)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        await Backfill(args).run()
+    finally:
+        await gemini_service.aclose()
+        await engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    setup_logging()
+    asyncio.run(_main(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
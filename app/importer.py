@@ -0,0 +1,80 @@
+"""
+Import a CSV or JSONL feedback export from a local file.
+
+    python -m app.importer surveys_2023.csv --analysis-rate 2
+    python -m app.importer partner.jsonl --format jsonl --chunk-size 1000
+
+Uses the same streaming importer as ``POST /feedback/import``: the file is read
+in small blocks, inserted in chunks and analysis is queued at a metered rate.
+Near-duplicate detection first warms its index from recent feedback, as the
+server does on startup. Running servers only pick up the imported originals
+when they next warm their index (on restart).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.db import AsyncSessionLocal, engine
+from app.logging_config import get_logger, setup_logging
+from app.routers.feedback import FeedbackCreate
+from app.services.dedup import duplicate_detector
+from app.services.feedback_import import IMPORT_FORMATS, FeedbackImport
+
+logger = get_logger(__name__)
+
+READ_BLOCK_SIZE = 64 * 1024
+
+
+async def read_blocks(path: Path) -> AsyncIterator[bytes]:
+    with path.open("rb") as handle:
+        while True:
+            block = await asyncio.to_thread(handle.read, READ_BLOCK_SIZE)
+            if not block:
+                return
+            yield block
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults to the file extension")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Rows inserted per transaction")
+    parser.add_argument(
+        "--analysis-rate", type=float, default=2.0, help="Analysis jobs made runnable per second (0 = all at once)"
+    )
+    return parser.parse_args(argv)
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    fmt = args.format or args.path.suffix.lstrip(".").lower()
+    if fmt not in IMPORT_FORMATS:
+        raise SystemExit(f"Cannot infer format from {args.path.name}; pass --format csv|jsonl")
+    importer = FeedbackImport(
+        validate=lambda record: FeedbackCreate.model_validate(record).model_dump(),
+        chunk_size=args.chunk_size,
+        analysis_rate=args.analysis_rate,
+    )
+    try:
+        # An empty index would let every near-duplicate of existing feedback through
+        async with AsyncSessionLocal() as session:
+            await duplicate_detector.warm(session)
+        return await importer.run(read_blocks(args.path), fmt)
+    finally:
+        await engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    setup_logging()
+    summary = asyncio.run(_main(parse_args(argv)))
+    for error in summary.pop("errors", []):
+        print(f"line {error['line']}: {error['errors']}")
+    width = max(len(key) for key in summary)
+    for key, value in summary.items():
+        print(f"{key.ljust(width)}  {value}")
+
+
+if __name__ == "__main__":
+    main()
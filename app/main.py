@@ -23,7 +23,14 @@ from app.middleware.logging import RequestLoggingMiddleware
 from app.middleware.rate_limiter import limiter, rate_limit_error_handler
 from app.routers import analytics, feedback, health
 from app.routers import auth as auth_router
+from app.services.analysis_reprocessor import analysis_reprocessor
+from app.services.analysis_worker import analysis_workers
 from app.services.auth_service import ensure_admin_user_exists, get_secret_key
+from app.services.dedup import duplicate_detector
+from app.services.feedback_search import feedback_search
+from app.services.feedback_service import drain_feedback_inserts
+from app.services.gemini_service import gemini_service
+from app.services.idempotency import idempotency_store
 from app.sockets.events import sio
 from app.utils.errors import APIError, api_error_handler, generic_error_handler
 
@@ -78,10 +85,43 @@ async def lifespan(app: FastAPI):
     import asyncio
     asyncio.create_task(bootstrap_admin())
 
+    async def warm_duplicate_index():
+        try:
+            async with AsyncSessionLocal() as session:
+                await duplicate_detector.warm(session)
+        except Exception as exc:
+            logger.warning("Duplicate index warm-up failed (non-critical): %s", exc)
+
+    asyncio.create_task(warm_duplicate_index())
+
+    async def purge_idempotency_keys():
+        try:
+            async with AsyncSessionLocal() as session:
+                purged = await idempotency_store.purge_expired(session)
+            if purged:
+                logger.info("Purged %s expired idempotency keys", purged)
+        except Exception as exc:
+            logger.warning("Idempotency key purge failed (non-critical): %s", exc)
+
+    asyncio.create_task(purge_idempotency_keys())
+
+    async def prepare_search_fallback():
+        async with AsyncSessionLocal() as session:
+            await feedback_search.ensure_trigram(session)
+
+    asyncio.create_task(prepare_search_fallback())
+
+    analysis_workers.start()
+    analysis_reprocessor.start()
+
     _maybe_open_browser()
 
     yield
 
+    await drain_feedback_inserts()
+    await analysis_reprocessor.stop()
+    await analysis_workers.stop()
+    await gemini_service.aclose()
     logger.info("Application shutdown complete")
 
 
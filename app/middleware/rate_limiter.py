@@ -2,6 +2,8 @@
 Rate limiting configuration using slowapi library.
 Protects API from abuse and DoS attacks.
 """
+import os
+
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -27,7 +29,8 @@ async def rate_limit_error_handler(request: Request, exc: RateLimitExceeded):
 
 
 # Rate limit configurations
-FEEDBACK_SUBMISSION_LIMIT = "10/minute"  # 10 submissions per minute per IP
+FEEDBACK_SUBMISSION_LIMIT = os.getenv("FEEDBACK_SUBMISSION_LIMIT", "10/minute")  # per IP; raise for load tests
+FEEDBACK_BULK_LIMIT = os.getenv("FEEDBACK_BULK_LIMIT", "10/minute")  # per IP, each call up to FEEDBACK_BULK_MAX_ITEMS
 LOGIN_ATTEMPT_LIMIT = "5/minute"  # 5 login attempts per minute per IP
 REGISTRATION_LIMIT = "3/minute"  # 3 registration attempts per minute per IP
 GENERAL_LIMIT = "100/minute"  # 100 requests per minute for other endpoints
@@ -1,6 +1,8 @@
 from app.models.feedback import Feedback
 from app.models.analysis import Analysis
 from app.models.actions import Action
+from app.models.analysis_cache import AnalysisCacheEntry
+from app.models.analysis_job import AnalysisJob
+from app.models.idempotency_key import IdempotencyKey
 
-__all__ = ["Feedback", "Analysis", "Action"]
-
+__all__ = ["Feedback", "Analysis", "Action", "AnalysisCacheEntry", "AnalysisJob", "IdempotencyKey"]
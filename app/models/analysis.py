@@ -1,5 +1,6 @@
-from sqlalchemy import JSON, Column, DateTime, Float, Index, Integer, String, Text, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, DateTime, Float, Index, Integer, String, Text, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 
 from app.db import Base
@@ -12,21 +13,53 @@ class Analysis(Base):
     feedback_id = Column(Integer, ForeignKey("feedback.id"), unique=True, nullable=False)
     sentiment = Column(String(50), nullable=False, index=True)
     confidence_score = Column(Float, nullable=False)
-    emotions = Column(JSON, nullable=True)
+    emotions = Column(JSONB, nullable=True)
     urgency = Column(String(50), nullable=False, index=True)
     urgency_reason = Column(Text, nullable=True)
-    urgency_flags = Column(JSON, nullable=True)
+    urgency_flags = Column(JSONB, nullable=True)
     primary_category = Column(String(100), nullable=True, index=True)
-    subcategories = Column(JSON, nullable=True)
-    medical_concerns = Column(JSON, nullable=True)
+    subcategories = Column(JSONB, nullable=True)
+    medical_concerns = Column(JSONB, nullable=True)
     actionable_insights = Column(Text, nullable=True)
-    key_points = Column(JSON, nullable=True)
+    key_points = Column(JSONB, nullable=True)
+    prompt_tokens = Column(Integer, nullable=True)
+    response_tokens = Column(Integer, nullable=True)
     analyzed_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Searchable analysis text (insights + key points), maintained by Postgres
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                "to_tsvector('english', coalesce(actionable_insights, '') || ' ' || coalesce(key_points::text, ''))",
+                persisted=True,
+            ),
+        )
+    )
 
     feedback = relationship("Feedback", back_populates="analysis")
 
     __table_args__ = (
         Index("ix_analysis_urgency_sentiment", "urgency", "sentiment"),
         Index("ix_analysis_category_urgency", "primary_category", "urgency"),
+        Index("ix_analysis_search_vector", "search_vector", postgresql_using="gin"),
+        # Containment (@>) filters on tag arrays: category, flag and emotion
+        Index(
+            "ix_analysis_subcategories",
+            "subcategories",
+            postgresql_using="gin",
+            postgresql_ops={"subcategories": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_analysis_urgency_flags",
+            "urgency_flags",
+            postgresql_using="gin",
+            postgresql_ops={"urgency_flags": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_analysis_emotions",
+            "emotions",
+            postgresql_using="gin",
+            postgresql_ops={"emotions": "jsonb_path_ops"},
+        ),
     )
 
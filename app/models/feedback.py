@@ -1,5 +1,6 @@
-from sqlalchemy import Column, DateTime, Index, Integer, String, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 
 from app.db import Base
@@ -16,8 +17,19 @@ class Feedback(Base):
     feedback_text = Column(Text, nullable=False)
     rating = Column(Integer, nullable=False)
     status = Column(String(50), default="pending_analysis", index=True)
+    # Failed-analysis reprocessing: attempts so far and when the next one is due
+    analysis_attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_analysis_at = Column(DateTime(timezone=True), nullable=True)
+    # Set when the text is a near-duplicate of earlier feedback (reuses that analysis)
+    duplicate_of_id = Column(
+        Integer, ForeignKey("feedback.id", ondelete="SET NULL"), nullable=True, index=True
+    )
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Full-text search document maintained by Postgres; deferred so it is never loaded by default
+    search_vector = deferred(
+        Column(TSVECTOR, Computed("to_tsvector('english', coalesce(feedback_text, ''))", persisted=True))
+    )
 
     analysis = relationship("Analysis", back_populates="feedback", uselist=False, cascade="all, delete-orphan")
     actions = relationship("Action", back_populates="feedback", cascade="all, delete-orphan")
@@ -25,5 +37,15 @@ class Feedback(Base):
     __table_args__ = (
         Index("ix_feedback_department_status", "department", "status"),
         Index("ix_feedback_created_status", "created_at", "status"),
+        # Newest-first keyset pagination on (created_at, id)
+        Index("ix_feedback_created_id", "created_at", "id"),
+        Index("ix_feedback_search_vector", "search_vector", postgresql_using="gin"),
+        # Keyset scan of rows due for reprocessing
+        Index(
+            "ix_feedback_failed_reprocess",
+            "id",
+            "next_analysis_at",
+            postgresql_where=status == "analysis_failed",
+        ),
     )
 
@@ -14,6 +14,7 @@ router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 @router.get("/summary", dependencies=[Depends(require_role("admin", "staff"))])
 async def get_analytics_summary(
+    exclude_duplicates: bool = Query(False, description="Leave near-duplicate feedback out of the figures"),
     db: AsyncSession = Depends(get_db)
 ):
     """Get analytics summary"""
@@ -21,7 +22,7 @@ async def get_analytics_summary(
     logger = get_logger(__name__)
     logger.info("Fetching analytics summary")
     try:
-        summary = await FeedbackService.get_analytics_summary(db)
+        summary = await FeedbackService.get_analytics_summary(db, exclude_duplicates=exclude_duplicates)
         return summary
     except Exception as e:
         logger.exception(f"Failed to fetch analytics summary: {e}")
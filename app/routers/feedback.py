@@ -1,27 +1,59 @@
 """
 Feedback API routes
 """
-from typing import Iterator, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence
 from datetime import datetime
+from types import SimpleNamespace
 import csv
 import io
+import os
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, Field, validator
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, validator
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import AsyncSessionLocal, get_db
+from app.db import get_db
 from app.logging_config import get_logger
-from app.services.feedback_service import FeedbackService
-from app.utils.helpers import validate_rating
+from app.services.analysis_queue import analysis_queue
+from app.services.feedback_counts import COUNT_STRATEGIES, feedback_counter
+from app.services.feedback_service import LIST_FIELDS, FeedbackService
+from app.utils.constants import EMOTION_TYPES, URGENCY_FLAGS
+from app.utils.helpers import normalize_tag, validate_rating
+from app.utils.pagination import decode_cursor, encode_cursor
 from app.deps import require_role
-from app.middleware.rate_limiter import limiter, FEEDBACK_SUBMISSION_LIMIT
-from app.sockets.events import emit_new_feedback, emit_urgent_alert, emit_analysis_complete
+from app.middleware.rate_limiter import limiter, FEEDBACK_BULK_LIMIT, FEEDBACK_SUBMISSION_LIMIT
+from app.services.triage import triage_feedback
+from app.services.feedback_import import FeedbackImport
+from app.services.idempotency import MAX_KEY_LENGTH, StoredResponse, idempotency_store, request_fingerprint
+from app.sockets.events import (
+    emit_bulk_feedback,
+    emit_import_progress,
+    emit_new_feedback,
+    emit_provisional_urgent_alert,
+)
 
 logger = get_logger(__name__)
 router = APIRouter(prefix="/feedback", tags=["feedback"])
 
+BULK_MAX_ITEMS = int(os.getenv("FEEDBACK_BULK_MAX_ITEMS", "5000"))
+
+# Columns returned by the list endpoints unless ?fields= narrows them
+LIST_DEFAULT_FIELDS = (
+    "id", "patient_name", "visit_date", "department", "doctor_name", "feedback_text", "rating",
+    "status", "created_at", "urgency", "sentiment", "primary_category", "analysis_status",
+)
+# CSV export columns unless ?fields= picks others
+CSV_DEFAULT_FIELDS = (
+    "id", "patient_name", "visit_date", "department", "doctor_name", "feedback_text", "rating",
+    "status", "sentiment", "urgency", "primary_category", "created_at",
+)
+URGENT_DEFAULT_FIELDS = (
+    "id", "patient_name", "visit_date", "department", "doctor_name", "feedback_text", "rating",
+    "status", "created_at", "urgency", "urgency_reason", "urgency_flags", "sentiment",
+    "primary_category", "actionable_insights",
+)
+
 
 # Pydantic models
 class FeedbackCreate(BaseModel):
@@ -39,6 +71,11 @@ class FeedbackCreate(BaseModel):
         return v
 
 
+class FeedbackBulkCreate(BaseModel):
+    # Items are validated one by one against FeedbackCreate so a bad row doesn't reject the batch
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+
 class FeedbackUpdate(BaseModel):
     status: str = Field(..., pattern="^(reviewed|in_progress|resolved)$")
     staff_note: Optional[str] = None
@@ -55,6 +92,7 @@ class FeedbackResponse(BaseModel):
     rating: int
     status: str
     created_at: datetime
+    duplicate_of_id: Optional[int] = None
     
     class Config:
         from_attributes = True
@@ -74,6 +112,8 @@ class AnalysisResponse(BaseModel):
     medical_concerns: Optional[dict]
     actionable_insights: Optional[str]
     key_points: Optional[List[str]]
+    prompt_tokens: Optional[int] = None
+    response_tokens: Optional[int] = None
     
     class Config:
         from_attributes = True
@@ -84,15 +124,41 @@ class FeedbackDetailResponse(FeedbackResponse):
     actions: Optional[List[dict]] = None
 
 
+def _replay_response(stored: StoredResponse, request_hash: str) -> JSONResponse:
+    """Answer a repeated Idempotency-Key with the original response."""
+    if stored.request_hash != request_hash:
+        raise HTTPException(
+            status_code=422, detail="Idempotency-Key was already used with a different request body"
+        )
+    if stored.status_code is None:
+        raise HTTPException(
+            status_code=409, detail="A request with this Idempotency-Key is still being processed"
+        )
+    return JSONResponse(
+        content=stored.body, status_code=stored.status_code, headers={"Idempotent-Replayed": "true"}
+    )
+
+
 @router.post("", response_model=FeedbackResponse, status_code=201)
 @limiter.limit(FEEDBACK_SUBMISSION_LIMIT)
 async def create_feedback(
     request: Request,
     feedback_data: FeedbackCreate,
-    background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
-    """Submit new feedback"""
+    """Submit new feedback (retries carrying the same Idempotency-Key replay the first response)"""
+    request_hash = None
+    if idempotency_key is not None:
+        if not idempotency_key.strip() or len(idempotency_key) > MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"
+            )
+        request_hash = request_fingerprint(feedback_data.model_dump(mode="json"))
+        stored = await idempotency_store.reserve(db, idempotency_key, request_hash)
+        if stored is not None:
+            return _replay_response(stored, request_hash)
+
     try:
         feedback = await FeedbackService.create_feedback(
             db=db,
@@ -103,41 +169,127 @@ async def create_feedback(
             feedback_text=feedback_data.feedback_text,
             rating=feedback_data.rating
         )
-        
-        # Emit new feedback event
-        await emit_new_feedback(feedback)
-        
-        # Trigger background analysis
-        background_tasks.add_task(
-            analyze_feedback_background,
-            feedback_id=feedback.id,
-        )
-        
-        return feedback
-        
-    except Exception as e:
+    except Exception:
         logger.exception("Failed to create feedback")
+        if idempotency_key is not None:
+            await idempotency_store.release(db, idempotency_key)
         raise HTTPException(status_code=500, detail="Error creating feedback")
 
+    if idempotency_key is not None:
+        try:
+            await idempotency_store.complete(
+                db,
+                idempotency_key,
+                request_hash,
+                201,
+                FeedbackResponse.model_validate(feedback).model_dump(mode="json"),
+            )
+        except Exception as exc:
+            # The feedback is stored; a retry after the pending timeout could duplicate it
+            logger.warning("Could not record idempotent response for key %s: %s", idempotency_key, exc)
+
+    try:
+        # Local pre-triage: alert on likely critical cases without waiting for Gemini
+        triage = triage_feedback(feedback.feedback_text, feedback.rating)
+        if triage.is_critical:
+            await emit_provisional_urgent_alert(feedback, triage)
+
+        # Emit new feedback event (analysis was queued with the insert)
+        await emit_new_feedback(feedback)
+    except Exception:
+        # The feedback is committed; a failed notification must not make the client retry
+        logger.exception("Failed to broadcast new feedback %s", feedback.id)
+
+    return feedback
+
 
-async def analyze_feedback_background(feedback_id: int):
-    """Background task for analyzing feedback"""
-    async with AsyncSessionLocal() as background_session:
+@router.post("/bulk", response_model=dict, dependencies=[Depends(require_role("admin", "staff"))])
+@limiter.limit(FEEDBACK_BULK_LIMIT)
+async def create_feedback_bulk(
+    request: Request,
+    payload: FeedbackBulkCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Submit a batch of feedback (paper surveys, partner systems) in one request"""
+    results: List[Dict[str, Any]] = [{} for _ in payload.items]
+    valid: List[Dict[str, Any]] = []
+    positions: List[int] = []
+    for index, item in enumerate(payload.items):
         try:
-            logger.info("Starting AI analysis for feedback %s", feedback_id)
-            analysis = await FeedbackService.analyze_feedback_async(background_session, feedback_id)
-            if analysis:
-                await emit_analysis_complete(feedback_id, analysis)
-                if analysis.urgency == "critical":
-                    feedback = await FeedbackService.get_feedback_by_id(background_session, feedback_id)
-                    if feedback:
-                        await emit_urgent_alert(feedback, analysis)
-            else:
-                await FeedbackService.mark_analysis_failed(background_session, feedback_id)
-                logger.error("Analysis failed for feedback %s", feedback_id)
-        except Exception as exc:  # pragma: no cover
-            logger.exception("Background analysis crashed for feedback %s", feedback_id)
-            await FeedbackService.mark_analysis_failed(background_session, feedback_id)
+            record = FeedbackCreate.model_validate(item)
+        except ValidationError as exc:
+            results[index] = {
+                "index": index,
+                "status": "invalid",
+                "errors": [
+                    {"loc": list(error["loc"]), "msg": error["msg"]} for error in exc.errors()
+                ],
+            }
+            continue
+        valid.append(record.model_dump())
+        positions.append(index)
+
+    created: List[Dict[str, Any]] = []
+    if valid:
+        try:
+            created = await FeedbackService.create_feedback_bulk(db, valid)
+        except Exception:
+            logger.exception("Failed to create bulk feedback")
+            raise HTTPException(status_code=500, detail="Error creating feedback")
+
+    for index, row in zip(positions, created):
+        results[index] = {
+            "index": index,
+            "status": "created",
+            "id": row["id"],
+            "duplicate_of_id": row["duplicate_of_id"],
+        }
+        # Same local pre-triage as single submissions
+        triage = triage_feedback(row["feedback_text"], row["rating"])
+        if triage.is_critical:
+            await emit_provisional_urgent_alert(SimpleNamespace(**row), triage)
+
+    if created:
+        await emit_bulk_feedback(len(created), [row["department"] for row in created])
+
+    return {
+        "received": len(payload.items),
+        "created": len(created),
+        "invalid": len(payload.items) - len(created),
+        "results": results,
+    }
+
+
+@router.post("/import", response_model=dict, dependencies=[Depends(require_role("admin"))])
+async def import_feedback(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|jsonl)$", description="Body format"),
+    chunk_size: int = Query(500, ge=1, le=5000, description="Rows inserted per transaction"),
+    analysis_rate: float = Query(2.0, ge=0, description="Analysis jobs made runnable per second (0 = all at once)"),
+):
+    """
+    Import a CSV (header row with FeedbackCreate field names) or JSONL export.
+
+    Send the file as the raw request body; it is parsed as it streams in and
+    never held in memory. Progress is pushed to staff as ``import_progress``.
+    """
+    importer = FeedbackImport(
+        validate=lambda record: FeedbackCreate.model_validate(record).model_dump(),
+        chunk_size=chunk_size,
+        analysis_rate=analysis_rate,
+        on_progress=emit_import_progress,
+    )
+    try:
+        summary = await importer.run(request.stream(), format)
+    except Exception:
+        logger.exception("Feedback import %s failed", importer.import_id)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Import failed after {importer.inserted} rows were inserted",
+        )
+    if summary["inserted"]:
+        await emit_bulk_feedback(summary["inserted"], [])
+    return summary
 
 
 @router.get("/all", response_model=dict, dependencies=[Depends(require_role("admin", "staff"))])
@@ -149,15 +301,48 @@ async def get_all_feedback(
     sentiment: Optional[str] = Query(None, description="Filter by sentiment"),
     category: Optional[str] = Query(None, description="Filter by category"),
     status: Optional[str] = Query(None, description="Filter by status"),
+    flag: Optional[str] = Query(None, description="Filter by urgency flag"),
+    emotion: Optional[str] = Query(None, description="Filter by detected emotion"),
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (replaces offset)"),
+    count: Optional[str] = Query(
+        None,
+        pattern=f"^({'|'.join(COUNT_STRATEGIES)})$",
+        description="How to compute total: exact, cached or estimated (default from FEEDBACK_COUNT_STRATEGY)",
+    ),
+    q: Optional[str] = Query(
+        None, min_length=2, max_length=200, description="Search feedback text and analysis insights"
+    ),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return (default: all list columns)"),
     format: str = Query("json", pattern="^(json|csv)$"),
     db: AsyncSession = Depends(get_db)
 ):
     """Get all feedback with filters"""
     logger.info("Fetching all feedback with filters")
+    columns = parse_list_fields(fields, CSV_DEFAULT_FIELDS if format == "csv" else LIST_DEFAULT_FIELDS)
+    position = None
+    if cursor and q:
+        raise HTTPException(status_code=400, detail="Search results are ranked; page them with offset")
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    if flag:
+        flag = normalize_tag(flag)
+        if flag not in URGENCY_FLAGS:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown flag; expected one of: {', '.join(URGENCY_FLAGS)}"
+            )
+    if emotion:
+        emotion = normalize_tag(emotion)
+        if emotion not in EMOTION_TYPES:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown emotion; expected one of: {', '.join(EMOTION_TYPES)}"
+            )
     try:
-        feedbacks, total = await FeedbackService.get_all_feedback(
+        page = await FeedbackService.get_all_feedback(
             db=db,
             department=department,
             start_date=start_date,
@@ -166,59 +351,55 @@ async def get_all_feedback(
             sentiment=sentiment,
             category=category,
             status=status,
+            flag=flag,
+            emotion=emotion,
             limit=limit,
-            offset=offset
+            offset=offset,
+            cursor=position,
+            count_strategy=count,
+            fields=columns,
+            q=q,
         )
+        feedbacks = page.rows
+        output_fields = columns + ["rank", "snippet"] if q else columns
+        feedback_list = serialize_rows(feedbacks, output_fields)
         
-        # Convert to response format
-        feedback_list = []
-        for feedback in feedbacks:
-            try:
-                feedback_dict = {
-                    "id": feedback.id,
-                    "patient_name": feedback.patient_name,
-                    "visit_date": feedback.visit_date.isoformat() if feedback.visit_date else None,
-                    "department": feedback.department,
-                    "doctor_name": feedback.doctor_name,
-                    "feedback_text": feedback.feedback_text,
-                    "rating": feedback.rating,
-                    "status": feedback.status,
-                    "created_at": feedback.created_at.isoformat() if feedback.created_at else None,
-                    "urgency": feedback.analysis.urgency if feedback.analysis else None,
-                    "sentiment": feedback.analysis.sentiment if feedback.analysis else None,
-                    "primary_category": feedback.analysis.primary_category if feedback.analysis else None,
-                    "analysis_status": "completed" if feedback.analysis else "pending"
-                }
-                feedback_list.append(feedback_dict)
-            except Exception:
-                # Skip problematic feedback items
-                logger.exception("Error processing feedback %s", feedback.id)
-                continue
-        
+        # A full page may have more after it; the cursor resumes right after its last row
+        next_cursor = None
+        if not q and len(feedbacks) == limit and feedbacks[-1]["created_at"] is not None:
+            next_cursor = encode_cursor(feedbacks[-1]["created_at"], feedbacks[-1]["id"])
+
         response = {
-            "total": total,
+            "total": page.total,
+            "total_strategy": page.total_strategy,
+            "search_mode": page.search_mode,
             "limit": limit,
             "offset": offset,
+            "next_cursor": next_cursor,
             "feedbacks": feedback_list
         }
         
         # CSV export
         if format == "csv":
             return StreamingResponse(
-                generate_feedback_csv(feedback_list),
+                generate_feedback_csv(feedback_list, output_fields),
                 media_type="text/csv",
                 headers={"Content-Disposition": "attachment; filename=feedback_export.csv"},
             )
         
-        return response
+        # Rows are already JSON-ready; skip the per-value jsonable_encoder pass
+        return JSONResponse(response)
         
     except Exception as e:
         logger.exception(f"Failed to fetch feedback: {e}")
         # Return empty response instead of crashing
         return {
             "total": 0,
+            "total_strategy": None,
+            "search_mode": None,
             "limit": limit,
             "offset": offset,
+            "next_cursor": None,
             "feedbacks": []
         }
 
@@ -226,47 +407,25 @@ async def get_all_feedback(
 @router.get("/urgent", response_model=dict, dependencies=[Depends(require_role("admin", "staff"))])
 async def get_urgent_feedback(
     limit: int = Query(50, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return (default: all urgent columns)"),
     db: AsyncSession = Depends(get_db)
 ):
     """Get all urgent/critical feedback"""
     logger.info("Fetching urgent feedback")
+    columns = parse_list_fields(fields, URGENT_DEFAULT_FIELDS)
     try:
-        feedbacks, total = await FeedbackService.get_all_feedback(
+        page = await FeedbackService.get_all_feedback(
             db=db,
             priority="critical",
             limit=limit,
-            offset=0
+            offset=0,
+            fields=columns,
         )
         
-        feedback_list = []
-        for feedback in feedbacks:
-            try:
-                feedback_dict = {
-                    "id": feedback.id,
-                    "patient_name": feedback.patient_name,
-                    "visit_date": feedback.visit_date.isoformat() if feedback.visit_date else None,
-                    "department": feedback.department,
-                    "doctor_name": feedback.doctor_name,
-                    "feedback_text": feedback.feedback_text,
-                    "rating": feedback.rating,
-                    "status": feedback.status,
-                    "created_at": feedback.created_at.isoformat() if feedback.created_at else None,
-                    "urgency": feedback.analysis.urgency if feedback.analysis else None,
-                    "urgency_reason": feedback.analysis.urgency_reason if feedback.analysis else None,
-                    "urgency_flags": feedback.analysis.urgency_flags if feedback.analysis else None,
-                    "sentiment": feedback.analysis.sentiment if feedback.analysis else None,
-                    "primary_category": feedback.analysis.primary_category if feedback.analysis else None,
-                    "actionable_insights": feedback.analysis.actionable_insights if feedback.analysis else None
-                }
-                feedback_list.append(feedback_dict)
-            except Exception:
-                logger.exception("Error processing urgent feedback %s", feedback.id)
-                continue
-        
-        return {
-            "total": total,
-            "urgent_feedbacks": feedback_list
-        }
+        return JSONResponse({
+            "total": page.total,
+            "urgent_feedbacks": serialize_rows(page.rows, columns)
+        })
     except Exception as e:
         logger.exception(f"Failed to fetch urgent feedback: {e}")
         # Return empty response instead of crashing
@@ -316,7 +475,9 @@ async def get_feedback(
             "subcategories": feedback.analysis.subcategories,
             "medical_concerns": feedback.analysis.medical_concerns,
             "actionable_insights": feedback.analysis.actionable_insights,
-            "key_points": feedback.analysis.key_points
+            "key_points": feedback.analysis.key_points,
+            "prompt_tokens": feedback.analysis.prompt_tokens,
+            "response_tokens": feedback.analysis.response_tokens,
         }
     
     if feedback.actions:
@@ -358,7 +519,6 @@ async def update_feedback(
 @router.post("/{feedback_id}/retry-analysis", response_model=dict, dependencies=[Depends(require_role("admin", "staff"))])
 async def retry_analysis(
     feedback_id: int,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """Retry AI analysis for a feedback that failed"""
@@ -366,16 +526,15 @@ async def retry_analysis(
     if not feedback:
         raise HTTPException(status_code=404, detail="Feedback not found")
     
-    # Reset status if it was analysis_failed
+    # Reset status (and the scheduled reprocessing backoff) if it was analysis_failed
     if feedback.status == "analysis_failed":
         feedback.status = "pending_analysis"
-        await db.commit()
+        feedback.analysis_attempts = 0
+        feedback.next_analysis_at = None
     
-    # Trigger background analysis
-    background_tasks.add_task(
-        analyze_feedback_background,
-        feedback_id=feedback_id,
-    )
+    # Queue analysis (no-op if a job is already queued or running)
+    await analysis_queue.enqueue(db, [feedback_id])
+    feedback_counter.invalidate()
     
     return {"message": "Analysis retry initiated", "feedback_id": feedback_id}
 
@@ -392,45 +551,45 @@ async def delete_feedback(
     return {"message": "Feedback deleted successfully", "feedback_id": feedback_id}
 
 
-def generate_feedback_csv(feedbacks: List[dict]) -> Iterator[str]:
-    """Stream feedback rows as CSV."""
+def parse_list_fields(fields: Optional[str], default: Sequence[str]) -> List[str]:
+    """Validate a comma-separated ?fields= projection (id is always included)."""
+    if not fields:
+        return list(default)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in LIST_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(LIST_FIELDS)}",
+        )
+    return list(dict.fromkeys(["id", *names]))
+
+
+def serialize_rows(rows: List[Dict[str, Any]], fields: Sequence[str]) -> List[Dict[str, Any]]:
+    """Project rows onto ``fields`` with datetimes as ISO strings."""
+    serialized = []
+    for row in rows:
+        item = {}
+        for name in fields:
+            value = row[name]
+            item[name] = value.isoformat() if isinstance(value, datetime) else value
+        serialized.append(item)
+    return serialized
+
+
+def generate_feedback_csv(feedbacks: List[dict], fieldnames: Sequence[str]) -> Iterator[str]:
+    """Stream feedback rows as CSV with one column per requested field."""
     buffer = io.StringIO()
-    fieldnames = [
-        "id",
-        "patient_name",
-        "visit_date",
-        "department",
-        "doctor_name",
-        "feedback_text",
-        "rating",
-        "status",
-        "sentiment",
-        "urgency",
-        "primary_category",
-        "created_at",
-    ]
-    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
-    
-    # Write header
+    writer = csv.DictWriter(buffer, fieldnames=list(fieldnames))
     writer.writeheader()
-    
-    # Write all data rows
     for item in feedbacks:
-        writer.writerow({
-            "id": item.get("id"),
-            "patient_name": item.get("patient_name") or "",
-            "visit_date": item.get("visit_date") or "",
-            "department": item.get("department") or "",
-            "doctor_name": item.get("doctor_name") or "",
-            "feedback_text": item.get("feedback_text") or "",
-            "rating": item.get("rating"),
-            "status": item.get("status") or "",
-            "sentiment": item.get("sentiment") or "",
-            "urgency": item.get("urgency") or "",
-            "primary_category": item.get("primary_category") or "",
-            "created_at": item.get("created_at") or "",
-        })
-    
+        row = {}
+        for name in fieldnames:
+            value = item.get(name)
+            # Tag lists become a single "a; b" cell
+            row[name] = "; ".join(map(str, value)) if isinstance(value, list) else value
+        writer.writerow(row)
+
     # Yield complete CSV at once
     yield buffer.getvalue()
 
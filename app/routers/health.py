@@ -7,8 +7,21 @@ from fastapi import APIRouter
 from sqlalchemy import text
 import time
 
-from app.db import AsyncSessionLocal, get_pool_stats, check_db_connection
-from app.utils.constants import DEPARTMENTS, URGENCY_LEVELS, SENTIMENT_TYPES, FEEDBACK_STATUSES
+from app.db import MAX_OVERFLOW, AsyncSessionLocal, get_pool_stats, check_db_connection
+from app.services.analysis_cache import analysis_cache
+from app.services.analysis_reprocessor import analysis_reprocessor
+from app.services.dedup import duplicate_detector
+from app.services.feedback_counts import feedback_counter
+from app.services.gemini_service import gemini_service
+from app.services.idempotency import idempotency_store
+from app.utils.constants import (
+    DEPARTMENTS,
+    EMOTION_TYPES,
+    FEEDBACK_STATUSES,
+    SENTIMENT_TYPES,
+    URGENCY_FLAGS,
+    URGENCY_LEVELS,
+)
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -48,6 +61,49 @@ async def get_config():
         "feedback_statuses": FEEDBACK_STATUSES,
         "urgency_levels": URGENCY_LEVELS,
         "sentiment_types": SENTIMENT_TYPES,
+        "urgency_flags": URGENCY_FLAGS,
+        "emotion_types": EMOTION_TYPES,
     }
 
 
+
+
+@router.get("/analysis-cache")
+async def get_analysis_cache_stats():
+    """Analysis cache hit/miss counters (Gemini calls saved by content-hash reuse)."""
+    return analysis_cache.stats()
+
+
+@router.get("/dedup")
+async def get_dedup_stats():
+    """Near-duplicate index size and hit counters."""
+    return duplicate_detector.stats()
+
+
+@router.get("/feedback-counts")
+async def get_feedback_count_stats():
+    """How feedback list totals are being resolved (exact/cached/estimated)."""
+    return feedback_counter.stats()
+
+
+@router.get("/idempotency")
+async def get_idempotency_stats():
+    """Idempotency-Key reservations and replayed responses."""
+    return idempotency_store.stats()
+
+
+@router.get("/gemini")
+async def get_gemini_stats():
+    """Gemini admission control, circuit breakers and hedging/fallback routing per model."""
+    return {
+        "circuit_breaker": gemini_service.breaker.snapshot(),
+        "limiter": gemini_service.limiter.stats(),
+        "routing": gemini_service.routing_stats(),
+        "reprocessor": analysis_reprocessor.last_run,
+    }
+
+
+@router.get("/pool")
+async def get_db_pool_stats():
+    """Database connection pool usage."""
+    return {**get_pool_stats(), "max_overflow": MAX_OVERFLOW}
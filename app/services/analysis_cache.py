@@ -0,0 +1,130 @@
+"""
+Content-hash cache for Gemini analyses.
+
+Identical (or whitespace-different) feedback for the same department and
+rating reuses a previous analysis instead of spending another API call.
+Lookups hit an in-process LRU first, then the ``analysis_cache`` table.
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.logging_config import get_logger
+from app.models.analysis_cache import AnalysisCacheEntry
+from app.utils.cache import TTLCache
+
+logger = get_logger(__name__)
+
+# Fields copied from a cached result onto a new Analysis row
+CACHED_FIELDS = (
+    "sentiment",
+    "confidence_score",
+    "emotions",
+    "urgency",
+    "urgency_reason",
+    "urgency_flags",
+    "primary_category",
+    "subcategories",
+    "medical_concerns",
+    "actionable_insights",
+    "key_points",
+)
+
+
+class AnalysisCache:
+    """Two-level (memory + table) cache of analysis results keyed by content hash."""
+
+    def __init__(self) -> None:
+        self.enabled = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+        self.ttl_seconds = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+        self._memory: TTLCache[Dict[str, Any]] = TTLCache(
+            max_size=int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "2048")),
+            ttl=self.ttl_seconds,
+        )
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    async def get(self, db: AsyncSession, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Return a cached result for the hash, or None."""
+        if not self.enabled:
+            return None
+
+        cached = self._memory.get(content_hash)
+        if cached is not None:
+            self.memory_hits += 1
+            return cached
+
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+        result = await db.execute(
+            select(AnalysisCacheEntry.result).where(
+                AnalysisCacheEntry.content_hash == content_hash,
+                AnalysisCacheEntry.prompt_version == PROMPT_VERSION,
+                AnalysisCacheEntry.created_at >= cutoff,
+            )
+        )
+        cached = result.scalar_one_or_none()
+        if cached is None:
+            self.misses += 1
+            return None
+
+        self.db_hits += 1
+        self._memory.set(content_hash, cached)
+        await db.execute(
+            update(AnalysisCacheEntry)
+            .where(AnalysisCacheEntry.content_hash == content_hash)
+            .values(
+                hit_count=AnalysisCacheEntry.hit_count + 1,
+                last_hit_at=datetime.now(timezone.utc),
+            )
+        )
+        return cached
+
+    async def set(self, db: AsyncSession, content_hash: str, analysis_result: Dict[str, Any]) -> None:
+        """Store a successful result. The caller owns the commit."""
+        if not self.enabled or "error" in analysis_result:
+            return
+        payload = {field: analysis_result.get(field) for field in CACHED_FIELDS}
+        self._memory.set(content_hash, payload)
+        stmt = pg_insert(AnalysisCacheEntry).values(
+            content_hash=content_hash,
+            prompt_version=PROMPT_VERSION,
+            result=payload,
+            hit_count=0,
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[AnalysisCacheEntry.content_hash],
+                set_={
+                    "prompt_version": stmt.excluded.prompt_version,
+                    "result": stmt.excluded.result,
+                    "created_at": datetime.now(timezone.utc),
+                },
+            )
+        )
+        self.stores += 1
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.db_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "prompt_version": PROMPT_VERSION,
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "gemini_calls_saved": hits,
+        }
+
+
+analysis_cache = AnalysisCache()
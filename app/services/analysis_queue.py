@@ -0,0 +1,197 @@
+"""
+Durable, database-backed queue of analysis jobs.
+
+Jobs are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` so any number of
+worker processes can share the table without double-processing. A claimed job
+is invisible to other workers until its visibility timeout expires; if the
+worker dies the job becomes claimable again.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.logging_config import get_logger
+from app.models.analysis_job import (
+    ACTIVE_JOB_STATUSES,
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    AnalysisJob,
+)
+from app.models.feedback import Feedback
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ClaimedJob:
+    id: int
+    feedback_id: int
+    attempts: int
+    max_attempts: int
+
+    @property
+    def is_final_attempt(self) -> bool:
+        return self.attempts >= self.max_attempts
+
+
+class AnalysisQueue:
+    """Enqueue, claim and settle analysis jobs."""
+
+    def __init__(self) -> None:
+        self.visibility_timeout = int(os.getenv("ANALYSIS_JOB_VISIBILITY_TIMEOUT_SECONDS", "300"))
+        self.max_attempts = int(os.getenv("ANALYSIS_JOB_MAX_ATTEMPTS", "3"))
+        self.retry_delay = int(os.getenv("ANALYSIS_JOB_RETRY_DELAY_SECONDS", "30"))
+        self._wakeup = asyncio.Event()
+
+    async def enqueue(
+        self,
+        db: AsyncSession,
+        feedback_ids: Iterable[int],
+        commit: bool = True,
+        run_after: Optional[datetime] = None,
+        spacing: Optional[float] = None,
+    ) -> None:
+        """
+        Queue analysis for the given feedback ids (skipping ones already queued).
+
+        With ``spacing`` (seconds) the jobs become runnable one after another
+        from ``run_after`` (default now), which meters large imports.
+        """
+        if spacing and run_after is None:
+            run_after = datetime.now(timezone.utc)
+        rows = [
+            {
+                "feedback_id": feedback_id,
+                "status": JOB_QUEUED,
+                "attempts": 0,
+                "max_attempts": self.max_attempts,
+                **(
+                    {"run_after": run_after + timedelta(seconds=spacing * index) if spacing else run_after}
+                    if run_after
+                    else {}
+                ),
+            }
+            for index, feedback_id in enumerate(feedback_ids)
+        ]
+        if not rows:
+            return
+        stmt = pg_insert(AnalysisJob).values(rows).on_conflict_do_nothing(
+            index_elements=[AnalysisJob.feedback_id],
+            index_where=AnalysisJob.status.in_(ACTIVE_JOB_STATUSES),
+        )
+        await db.execute(stmt)
+        if commit:
+            await db.commit()
+            self.notify()
+
+    def notify(self) -> None:
+        """Wake local workers after newly enqueued jobs have been committed."""
+        self._wakeup.set()
+
+    async def wait_for_work(self, timeout: float) -> None:
+        """Sleep until notified or ``timeout`` seconds pass."""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def claim(self, db: AsyncSession, worker_id: str, limit: int = 1) -> List[ClaimedJob]:
+        """Lock up to ``limit`` runnable jobs for this worker."""
+        now = datetime.now(timezone.utc)
+        candidates = (
+            select(AnalysisJob.id)
+            .where(
+                or_(
+                    and_(AnalysisJob.status == JOB_QUEUED, AnalysisJob.run_after <= now),
+                    # Visibility timeout expired: previous worker died or stalled
+                    and_(AnalysisJob.status == JOB_RUNNING, AnalysisJob.locked_until < now),
+                )
+            )
+            .order_by(AnalysisJob.run_after)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        ids = (await db.execute(candidates)).scalars().all()
+        if not ids:
+            await db.rollback()
+            return []
+
+        result = await db.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.id.in_(ids))
+            .values(
+                status=JOB_RUNNING,
+                attempts=AnalysisJob.attempts + 1,
+                locked_until=now + timedelta(seconds=self.visibility_timeout),
+                locked_by=worker_id,
+            )
+            .returning(
+                AnalysisJob.id,
+                AnalysisJob.feedback_id,
+                AnalysisJob.attempts,
+                AnalysisJob.max_attempts,
+            )
+        )
+        jobs = [ClaimedJob(*row) for row in result.all()]
+        await db.commit()
+        return jobs
+
+    async def complete(self, db: AsyncSession, job_id: int) -> None:
+        await db.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.id == job_id)
+            .values(status=JOB_DONE, locked_until=None, last_error=None)
+        )
+        await db.commit()
+
+    async def fail(self, db: AsyncSession, job: ClaimedJob, error: str) -> bool:
+        """Record a failed attempt. Returns True if the job was re-queued."""
+        if job.is_final_attempt:
+            values = {"status": JOB_FAILED, "locked_until": None, "last_error": error}
+        else:
+            delay = self.retry_delay * (2 ** (job.attempts - 1))
+            values = {
+                "status": JOB_QUEUED,
+                "locked_until": None,
+                "last_error": error,
+                "run_after": datetime.now(timezone.utc) + timedelta(seconds=delay),
+            }
+        await db.execute(update(AnalysisJob).where(AnalysisJob.id == job.id).values(**values))
+        await db.commit()
+        return not job.is_final_attempt
+
+    async def enqueue_orphaned(self, db: AsyncSession) -> int:
+        """Queue feedback left in pending_analysis without an active job (e.g. after a crash)."""
+        active = select(AnalysisJob.id).where(
+            AnalysisJob.feedback_id == Feedback.id,
+            AnalysisJob.status.in_(ACTIVE_JOB_STATUSES),
+        )
+        result = await db.execute(
+            select(Feedback.id).where(Feedback.status == "pending_analysis", ~active.exists())
+        )
+        feedback_ids = result.scalars().all()
+        if feedback_ids:
+            await self.enqueue(db, feedback_ids)
+            logger.info("Re-queued %s orphaned pending analyses", len(feedback_ids))
+        return len(feedback_ids)
+
+    async def depth(self, db: AsyncSession) -> int:
+        """Number of queued or running jobs."""
+        result = await db.execute(
+            select(func.count(AnalysisJob.id)).where(AnalysisJob.status.in_(ACTIVE_JOB_STATUSES))
+        )
+        return int(result.scalar() or 0)
+
+
+analysis_queue = AnalysisQueue()
@@ -0,0 +1,92 @@
+"""
+Scheduled reprocessing of failed analyses.
+
+Every interval the reprocessor pages through ``analysis_failed`` feedback with
+a keyset cursor, claiming rows whose backoff (``next_analysis_at``) has
+elapsed and putting them back on the durable analysis queue. The worker pool
+then retries them under the same limiter, breakers and job attempts as live
+intake. Rows that have failed ``ANALYSIS_REPROCESS_MAX_ATTEMPTS`` times are
+left for a manual retry-analysis.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+from app.db import AsyncSessionLocal
+from app.logging_config import get_logger
+from app.services.feedback_service import FeedbackService
+from app.services.gemini_service import gemini_service
+
+logger = get_logger(__name__)
+
+
+class FailedAnalysisReprocessor:
+    """Periodic re-queueing of failed analyses with per-row backoff."""
+
+    def __init__(self) -> None:
+        self.interval = float(os.getenv("ANALYSIS_REPROCESS_INTERVAL_SECONDS", "60"))
+        self.page_size = int(os.getenv("ANALYSIS_REPROCESS_PAGE_SIZE", "50"))
+        self.max_attempts = int(os.getenv("ANALYSIS_REPROCESS_MAX_ATTEMPTS", "8"))
+        self.last_run: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        if self.interval <= 0:
+            logger.info("Failed-analysis reprocessing disabled (ANALYSIS_REPROCESS_INTERVAL_SECONDS=0)")
+            return
+        self._task = asyncio.create_task(self._loop(), name="analysis-reprocessor")
+        logger.info("Failed-analysis reprocessor scheduled every %ss", self.interval)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        # Claims commit together with their queued jobs, so an interrupted run loses nothing
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as exc:
+                logger.error("Failed-analysis reprocessing run failed: %s", exc)
+
+    async def run_once(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Re-queue every due failed analysis (or at most ``limit``). Returns a run summary."""
+        started = time.monotonic()
+        after_id = 0
+        queued = 0
+        while limit is None or queued < limit:
+            if not gemini_service.is_available():
+                # Retrying now would only burn attempts against an open breaker
+                logger.info("Skipping failed-analysis reprocessing while Gemini breakers are open")
+                break
+            page_size = self.page_size if limit is None else min(self.page_size, limit - queued)
+            async with AsyncSessionLocal() as session:
+                # A failure re-marks the row and pushes next_analysis_at out exponentially
+                feedback_ids = await FeedbackService.claim_failed_analyses(
+                    session, after_id, page_size, self.max_attempts
+                )
+            if not feedback_ids:
+                break
+            after_id = feedback_ids[-1]
+            queued += len(feedback_ids)
+
+        self.last_run = {
+            "queued": queued,
+            "duration_seconds": round(time.monotonic() - started, 2),
+            "finished_at": time.time(),
+        }
+        if queued:
+            logger.info("Re-queued %s failed analyses in %.1fs", queued, self.last_run["duration_seconds"])
+        return self.last_run
+
+
+analysis_reprocessor = FailedAnalysisReprocessor()
@@ -0,0 +1,184 @@
+"""
+Analysis worker pool.
+
+Each worker claims up to ``GEMINI_BATCH_MAX_SIZE`` jobs at a time from the
+durable analysis queue and runs them concurrently (so they can share a Gemini
+batch; the Gemini limiter bounds the actual calls), emits the real-time
+events and settles each job. Started from the
+application lifespan; set ANALYSIS_WORKERS=0 to run intake-only processes.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+from typing import Any, Dict, List, Optional
+
+from app.db import AsyncSessionLocal
+from app.logging_config import get_logger
+from app.models.feedback import Feedback
+from app.services.analysis_queue import ClaimedJob, analysis_queue
+from app.services.feedback_service import FeedbackService
+from app.services.gemini_service import gemini_service
+from app.services.triage import triage_feedback
+from app.sockets.events import (
+    emit_analysis_complete,
+    emit_streamed_urgency,
+    emit_urgent_alert,
+    emit_urgent_alert_retracted,
+)
+from app.utils.helpers import extract_urgency_flags, extract_urgency_level, extract_urgency_reason
+
+logger = get_logger(__name__)
+
+
+async def run_analysis(feedback_id: int, mark_failed: bool = True) -> bool:
+    """
+    Analyze one feedback and emit events. Returns True on success.
+
+    Critical alerts raised before the analysis is saved (pre-triage at intake,
+    streamed urgency here) are provisional: a critical result confirms them,
+    anything else retracts them.
+    """
+    streamed_urgency: Dict[str, Any] = {"alerted": False}
+
+    async def on_urgency(feedback: Feedback, urgency: Dict[str, Any]) -> None:
+        level = extract_urgency_level(urgency)
+        # Retries may stream the urgency again; only publish it once
+        if streamed_urgency.get("level") == level:
+            return
+        streamed_urgency["level"] = level
+        if level == "critical":
+            streamed_urgency["alerted"] = True
+        await emit_streamed_urgency(
+            feedback, level, extract_urgency_reason(urgency), extract_urgency_flags(urgency)
+        )
+
+    async with AsyncSessionLocal() as session:
+        try:
+            logger.info("Starting AI analysis for feedback %s", feedback_id)
+            analysis = await FeedbackService.analyze_feedback_async(
+                session, feedback_id, on_urgency=on_urgency
+            )
+            if analysis:
+                await emit_analysis_complete(feedback_id, analysis)
+                feedback = await FeedbackService.get_feedback_by_id(session, feedback_id)
+                if feedback:
+                    if analysis.urgency == "critical":
+                        await emit_urgent_alert(feedback, analysis)
+                    elif streamed_urgency["alerted"] or _triaged_critical(feedback):
+                        await emit_urgent_alert_retracted(feedback_id, analysis)
+                return True
+            logger.error("Analysis failed for feedback %s", feedback_id)
+        except Exception:  # pragma: no cover
+            logger.exception("Analysis crashed for feedback %s", feedback_id)
+            await session.rollback()
+        if mark_failed:
+            await FeedbackService.mark_analysis_failed(session, feedback_id)
+        await _retract_unconfirmed(session, feedback_id, streamed_urgency["alerted"], mark_failed)
+        return False
+
+
+def _triaged_critical(feedback: Feedback) -> bool:
+    """Whether intake pre-triage raised a provisional critical alert for ``feedback``."""
+    return triage_feedback(feedback.feedback_text, feedback.rating).is_critical
+
+
+async def _retract_unconfirmed(session: Any, feedback_id: int, streamed: bool, final: bool) -> None:
+    """
+    Retract provisional alerts after a failed analysis.
+
+    A streamed alert came from this failed attempt and is always retracted (a
+    retry streams it again). The pre-triage alert is retracted only once the
+    job has given up.
+    """
+    try:
+        retract = streamed
+        if not retract and final:
+            feedback = await FeedbackService.get_feedback_by_id(session, feedback_id)
+            retract = feedback is not None and _triaged_critical(feedback)
+        if retract:
+            await emit_urgent_alert_retracted(feedback_id, None)
+    except Exception:
+        logger.exception("Could not retract provisional alert for feedback %s", feedback_id)
+
+
+class AnalysisWorkerPool:
+    """Fixed-size pool of async workers draining the analysis queue."""
+
+    def __init__(self) -> None:
+        self.concurrency = int(os.getenv("ANALYSIS_WORKERS", "2"))
+        self.poll_interval = float(os.getenv("ANALYSIS_POLL_INTERVAL_SECONDS", "2"))
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        # Claimed jobs run concurrently so they can share a Gemini batch; the limiter bounds the calls
+        self.claim_size = gemini_service.batcher.max_size
+        self._tasks: List[asyncio.Task] = []
+        self._stopping: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        if self._tasks or self.concurrency <= 0:
+            if self.concurrency <= 0:
+                logger.info("Analysis workers disabled (ANALYSIS_WORKERS=0)")
+            return
+        self._stopping = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(index), name=f"analysis-worker-{index}")
+            for index in range(self.concurrency)
+        ]
+        self._tasks.append(asyncio.create_task(self._recover_orphans()))
+        logger.info("Started %s analysis worker(s)", self.concurrency)
+
+    async def stop(self) -> None:
+        if not self._tasks:
+            return
+        self._stopping.set()
+        analysis_queue.notify()
+        # Unfinished jobs become claimable again once their visibility timeout expires
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Analysis workers stopped")
+
+    async def _recover_orphans(self) -> None:
+        try:
+            async with AsyncSessionLocal() as session:
+                await analysis_queue.enqueue_orphaned(session)
+        except Exception as exc:
+            logger.warning("Orphaned analysis recovery failed: %s", exc)
+
+    async def _worker(self, index: int) -> None:
+        worker_id = f"{self.worker_prefix}:{index}"
+        while not self._stopping.is_set():
+            try:
+                async with AsyncSessionLocal() as session:
+                    jobs = await analysis_queue.claim(session, worker_id, limit=self.claim_size)
+            except Exception as exc:
+                logger.error("Worker %s failed to claim jobs: %s", worker_id, exc)
+                jobs = []
+            if not jobs:
+                await analysis_queue.wait_for_work(self.poll_interval)
+                continue
+            await asyncio.gather(*(self._process(job) for job in jobs))
+
+    async def _process(self, job: ClaimedJob) -> None:
+        success = await run_analysis(job.feedback_id, mark_failed=job.is_final_attempt)
+        try:
+            async with AsyncSessionLocal() as session:
+                if success:
+                    await analysis_queue.complete(session, job.id)
+                else:
+                    requeued = await analysis_queue.fail(session, job, "analysis failed")
+                    logger.warning(
+                        "Analysis job %s for feedback %s failed (attempt %s/%s, requeued=%s)",
+                        job.id,
+                        job.feedback_id,
+                        job.attempts,
+                        job.max_attempts,
+                        requeued,
+                    )
+        except Exception as exc:
+            logger.error("Failed to settle analysis job %s: %s", job.id, exc)
+
+
+analysis_workers = AnalysisWorkerPool()
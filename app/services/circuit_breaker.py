@@ -0,0 +1,170 @@
+"""
+Circuit breaker for outbound dependencies.
+
+Failures are counted per logical request over a sliding time window. When the
+threshold is reached the circuit opens; after the recovery timeout exactly one
+probe request is admitted (HALF_OPEN) while every other caller is rejected
+until the probe settles. ``allow`` hands out a ticket: only the probe's ticket
+can close or re-open a half-open circuit, and requests admitted before the
+circuit last opened no longer count. All methods are synchronous, so state
+changes are atomic with respect to other coroutines on the event loop.
+"""
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class CircuitBreakerState:
+    """Circuit breaker states."""
+    CLOSED = "closed"  # Normal operation
+    OPEN = "open"  # Failing, reject requests
+    HALF_OPEN = "half_open"  # Testing if service recovered
+
+
+class BreakerTicket:
+    """Admission handed out by ``allow``; settle it exactly once."""
+
+    __slots__ = ("probe", "generation", "settled")
+
+    def __init__(self, probe: bool, generation: int) -> None:
+        self.probe = probe
+        # Open/close cycle the request was admitted in; older tickets can't move the state
+        self.generation = generation
+        self.settled = False
+
+
+class CircuitBreaker:
+    """Sliding-window circuit breaker with a single half-open probe."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        window_seconds: float = 60.0,
+        recovery_timeout: float = 60.0,
+        history_size: int = 50,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.window_seconds = window_seconds
+        self.recovery_timeout = recovery_timeout
+        self.state = CircuitBreakerState.CLOSED
+        self.open_until = 0.0
+        self._failures: Deque[float] = deque()
+        self._probe: Optional[BreakerTicket] = None
+        self._generation = 0
+        self.transitions: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self.total_successes = 0
+        self.total_failures = 0
+        self.total_rejections = 0
+
+    def allow(self) -> Optional[BreakerTicket]:
+        """Admit a request and return its ticket, or None if it must be rejected."""
+        now = time.monotonic()
+        if self.state == CircuitBreakerState.OPEN:
+            if now < self.open_until:
+                self.total_rejections += 1
+                return None
+            self._transition(CircuitBreakerState.HALF_OPEN, "recovery timeout elapsed")
+        if self.state == CircuitBreakerState.HALF_OPEN:
+            if self._probe is not None:
+                self.total_rejections += 1
+                return None
+            self._probe = BreakerTicket(probe=True, generation=self._generation)
+            return self._probe
+        return BreakerTicket(probe=False, generation=self._generation)
+
+    def admits(self, ticket: BreakerTicket) -> bool:
+        """Whether a held ticket may still send (another attempt within the same request)."""
+        if ticket.settled:
+            return False
+        if self.state == CircuitBreakerState.HALF_OPEN:
+            return ticket is self._probe
+        return self.state == CircuitBreakerState.CLOSED and ticket.generation == self._generation
+
+    def record_success(self, ticket: BreakerTicket) -> None:
+        if not self._settle(ticket):
+            return
+        self.total_successes += 1
+        if ticket is self._probe:
+            self._probe = None
+            self._failures.clear()
+            self._generation += 1
+            self._transition(CircuitBreakerState.CLOSED, "probe succeeded")
+
+    def record_failure(self, ticket: BreakerTicket) -> None:
+        if not self._settle(ticket):
+            return
+        self.total_failures += 1
+        now = time.monotonic()
+        if ticket is self._probe:
+            self._probe = None
+            self._open(now, "probe failed")
+            return
+        # Requests admitted before the last open/close cycle, or while not CLOSED, don't count
+        if self.state != CircuitBreakerState.CLOSED or ticket.generation != self._generation:
+            return
+        self._failures.append(now)
+        while self._failures and now - self._failures[0] > self.window_seconds:
+            self._failures.popleft()
+        logger.warning(
+            "%s failure %s/%s within %ss window",
+            self.name,
+            len(self._failures),
+            self.failure_threshold,
+            self.window_seconds,
+        )
+        if len(self._failures) >= self.failure_threshold:
+            self._open(now, f"{len(self._failures)} failures in {self.window_seconds}s")
+
+    def release(self, ticket: BreakerTicket) -> None:
+        """Settle an admitted request that neither succeeded nor failed (e.g. cancelled)."""
+        if self._settle(ticket) and ticket is self._probe:
+            self._probe = None
+
+    @staticmethod
+    def _settle(ticket: BreakerTicket) -> bool:
+        if ticket.settled:
+            return False
+        ticket.settled = True
+        return True
+
+    def _open(self, now: float, reason: str) -> None:
+        self.open_until = now + self.recovery_timeout
+        self._failures.clear()
+        self._generation += 1
+        self._transition(CircuitBreakerState.OPEN, reason)
+
+    def _transition(self, new_state: str, reason: str) -> None:
+        old_state, self.state = self.state, new_state
+        self.transitions.append(
+            {"from": old_state, "to": new_state, "reason": reason, "at": time.time()}
+        )
+        log = logger.error if new_state == CircuitBreakerState.OPEN else logger.info
+        log("%s circuit breaker %s -> %s (%s)", self.name, old_state, new_state, reason)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        retry_in: Optional[float] = None
+        if self.state == CircuitBreakerState.OPEN:
+            retry_in = round(max(0.0, self.open_until - now), 2)
+        recent = sum(1 for ts in self._failures if now - ts <= self.window_seconds)
+        return {
+            "name": self.name,
+            "state": self.state,
+            "failure_threshold": self.failure_threshold,
+            "window_seconds": self.window_seconds,
+            "recent_failures": recent,
+            "probe_in_flight": self._probe is not None,
+            "retry_in_seconds": retry_in,
+            "total_successes": self.total_successes,
+            "total_failures": self.total_failures,
+            "total_rejections": self.total_rejections,
+            "transitions": list(self.transitions),
+        }
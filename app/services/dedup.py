@@ -0,0 +1,131 @@
+"""
+Near-duplicate detection for incoming feedback (MinHash + LSH).
+
+Each feedback text is reduced to word shingles and a MinHash signature. The
+signature is split into bands; feedback sharing any band bucket is a candidate
+and is confirmed by the estimated Jaccard similarity of the two signatures.
+Lookups touch only a handful of buckets, so they stay well under a
+millisecond regardless of index size. The index lives in process memory,
+holds at most ``DEDUP_MAX_ENTRIES`` signatures from the last
+``DEDUP_WINDOW_SECONDS`` and evicts the oldest first. It is re-warmed from the
+database on startup. The MinHash and LSH primitives live in ``app.utils.minhash``.
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.logging_config import get_logger
+from app.models.feedback import Feedback
+from app.utils.minhash import DuplicateMatch, MinHasher, MinHashLSHIndex, Signature, shingles
+
+logger = get_logger(__name__)
+
+
+class DuplicateDetector:
+    """Links near-duplicate feedback in the same department to the first occurrence."""
+
+    def __init__(self) -> None:
+        self.enabled = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+        self.threshold = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.8"))
+        # Duplicates are analyzed this much later so the original's analysis can be reused
+        self.defer_seconds = float(os.getenv("DEDUP_ANALYSIS_DEFER_SECONDS", "15"))
+        self.hasher = MinHasher(num_perm=int(os.getenv("DEDUP_NUM_PERM", "64")))
+        self.index = MinHashLSHIndex(
+            num_perm=self.hasher.num_perm,
+            bands=int(os.getenv("DEDUP_BANDS", "16")),
+            max_entries=int(os.getenv("DEDUP_MAX_ENTRIES", "10000")),
+            window_seconds=float(os.getenv("DEDUP_WINDOW_SECONDS", "86400")),
+        )
+        self.lookups = 0
+        self.duplicates = 0
+
+    @staticmethod
+    def _scope(department: str) -> str:
+        return (department or "").strip().lower()
+
+    def signature(self, feedback_text: str) -> Optional[Signature]:
+        return self.hasher.signature(shingles(feedback_text))
+
+    def find_duplicate(self, signature: Optional[Signature], department: str) -> Optional[DuplicateMatch]:
+        if not self.enabled or signature is None:
+            return None
+        self.lookups += 1
+        match = self.index.query(signature, self._scope(department), self.threshold)
+        if match is not None:
+            self.duplicates += 1
+        return match
+
+    def batch_index(self) -> MinHashLSHIndex:
+        """Throwaway index for matching the records of one bulk request against each other."""
+        return MinHashLSHIndex(
+            num_perm=self.hasher.num_perm,
+            bands=self.index.bands,
+            max_entries=self.index.max_entries,
+            window_seconds=self.index.window_seconds,
+        )
+
+    def find_in_batch(
+        self, batch: MinHashLSHIndex, position: int, signature: Optional[Signature], department: str
+    ) -> Optional[DuplicateMatch]:
+        """
+        Match against earlier records of the same batch, keyed by position.
+
+        The record is indexed under ``position`` when it has no match, so later
+        copies in the batch find it before it has a feedback id.
+        """
+        if not self.enabled or signature is None:
+            return None
+        scope = self._scope(department)
+        match = batch.query(signature, scope, self.threshold)
+        if match is None:
+            batch.add(position, signature, scope)
+        else:
+            self.duplicates += 1
+        return match
+
+    def remember(self, feedback_id: int, signature: Optional[Signature], department: str) -> None:
+        """Index an original (non-duplicate) feedback."""
+        if self.enabled and signature is not None:
+            self.index.add(feedback_id, signature, self._scope(department))
+
+    def forget(self, feedback_id: int) -> None:
+        self.index.remove(feedback_id)
+
+    async def warm(self, db: AsyncSession) -> int:
+        """Rebuild the index from recent original feedback after a restart."""
+        if not self.enabled:
+            return 0
+        since = datetime.now(timezone.utc) - timedelta(seconds=self.index.window_seconds)
+        result = await db.execute(
+            select(Feedback.id, Feedback.feedback_text, Feedback.department, Feedback.created_at)
+            .where(Feedback.created_at >= since, Feedback.duplicate_of_id.is_(None))
+            .order_by(Feedback.id.desc())
+            .limit(self.index.max_entries)
+        )
+        rows = list(reversed(result.all()))
+        for row in rows:
+            signature = self.signature(row.feedback_text)
+            if signature is not None:
+                inserted_at = row.created_at.timestamp() if row.created_at else None
+                self.index.add(row.id, signature, self._scope(row.department), inserted_at)
+        logger.info("Duplicate index warmed with %s recent feedback", len(self.index))
+        return len(self.index)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "indexed": len(self.index),
+            "max_entries": self.index.max_entries,
+            "window_seconds": self.index.window_seconds,
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "duplicates": self.duplicates,
+        }
+
+
+duplicate_detector = DuplicateDetector()
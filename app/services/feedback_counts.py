@@ -0,0 +1,105 @@
+"""
+Totals for the feedback list without an exact COUNT(*) on every page.
+
+Strategies:
+
+- ``exact``: run the filtered COUNT, as before.
+- ``cached``: exact COUNT per filter signature, reused for
+  ``FEEDBACK_COUNT_CACHE_TTL_SECONDS``. Cleared in this process whenever
+  feedback is created, deleted, analyzed or changes status. Other workers catch
+  up within the TTL.
+- ``estimated``: the planner's row estimate (``pg_class.reltuples``) for
+  unfiltered listings of at least ``FEEDBACK_COUNT_ESTIMATE_MIN_ROWS``.
+  Smaller tables fall back to ``exact``, and filtered listings to ``cached``.
+
+The strategy actually used is reported next to the total.
+"""
+from __future__ import annotations
+
+import os
+from typing import Any, Hashable, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.logging_config import get_logger
+from app.utils.cache import TTLCache
+
+logger = get_logger(__name__)
+
+COUNT_EXACT = "exact"
+COUNT_CACHED = "cached"
+COUNT_ESTIMATED = "estimated"
+COUNT_STRATEGIES = (COUNT_EXACT, COUNT_CACHED, COUNT_ESTIMATED)
+
+
+class FeedbackCounter:
+    """Resolves list totals with the requested strategy."""
+
+    def __init__(self) -> None:
+        self.default_strategy = os.getenv("FEEDBACK_COUNT_STRATEGY", COUNT_CACHED).lower()
+        if self.default_strategy not in COUNT_STRATEGIES:
+            logger.warning("Unknown FEEDBACK_COUNT_STRATEGY %r, using cached", self.default_strategy)
+            self.default_strategy = COUNT_CACHED
+        self.estimate_min_rows = int(os.getenv("FEEDBACK_COUNT_ESTIMATE_MIN_ROWS", "100000"))
+        self._cache: TTLCache[int] = TTLCache(
+            max_size=256, ttl=float(os.getenv("FEEDBACK_COUNT_CACHE_TTL_SECONDS", "15"))
+        )
+        self.exact_counts = 0
+        self.cache_hits = 0
+        self.estimates = 0
+
+    async def count(
+        self, db: AsyncSession, count_query: Select, signature: Hashable, filtered: bool, strategy: str
+    ) -> Tuple[int, str]:
+        """``(total, strategy_used)`` for a list query's COUNT statement."""
+        if strategy == COUNT_ESTIMATED:
+            if not filtered:
+                estimate = await self._estimate(db)
+                if estimate is not None and estimate >= self.estimate_min_rows:
+                    self.estimates += 1
+                    return estimate, COUNT_ESTIMATED
+                # Small (or never analyzed) table: the exact count is cheap
+                return await self._exact(db, count_query), COUNT_EXACT
+            strategy = COUNT_CACHED
+
+        if strategy == COUNT_CACHED:
+            cached = self._cache.get(signature)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached, COUNT_CACHED
+            total = await self._exact(db, count_query)
+            self._cache.set(signature, total)
+            return total, COUNT_CACHED
+
+        return await self._exact(db, count_query), COUNT_EXACT
+
+    async def _exact(self, db: AsyncSession, count_query: Select) -> int:
+        self.exact_counts += 1
+        result = await db.execute(count_query)
+        return int(result.scalar() or 0)
+
+    @staticmethod
+    async def _estimate(db: AsyncSession) -> Any:
+        result = await db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'feedback'::regclass")
+        )
+        estimate = result.scalar()
+        # reltuples is -1 until the table has been vacuumed/analyzed
+        return int(estimate) if estimate is not None and estimate >= 0 else None
+
+    def invalidate(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {
+            "default_strategy": self.default_strategy,
+            "cached_signatures": len(self._cache),
+            "exact_counts": self.exact_counts,
+            "cache_hits": self.cache_hits,
+            "estimates": self.estimates,
+        }
+
+
+feedback_counter = FeedbackCounter()
@@ -0,0 +1,139 @@
+"""
+Streaming import of feedback exports (CSV or JSONL).
+
+Bytes are decoded and split into records incrementally, validated one by one
+and inserted in fixed-size chunks through ``FeedbackService.create_feedback_bulk``.
+The next bytes are only read once the current chunk has been committed, so
+memory stays flat regardless of file size and a fast uploader is slowed to the
+database's pace. Analysis jobs are metered with ``run_after`` spacing so a
+large import never floods the queue ahead of live intake.
+"""
+from __future__ import annotations
+
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.db import AsyncSessionLocal
+from app.logging_config import get_logger
+from app.services.feedback_service import FeedbackService
+from app.utils.import_records import iter_csv_records, iter_jsonl_records, iter_lines
+
+logger = get_logger(__name__)
+
+IMPORT_FORMATS = ("csv", "jsonl")
+MAX_REPORTED_ERRORS = 100
+
+# Validates one raw record and returns the clean field dict (raises ValueError-like on bad input)
+RecordValidator = Callable[[Dict[str, Any]], Dict[str, Any]]
+ProgressCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class FeedbackImport:
+    """One import run: parse, validate, insert in chunks and meter analysis."""
+
+    def __init__(
+        self,
+        validate: RecordValidator,
+        chunk_size: int = 500,
+        analysis_rate: float = 0.0,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> None:
+        self.import_id = uuid.uuid4().hex[:12]
+        self.validate = validate
+        self.chunk_size = max(1, chunk_size)
+        # Analysis jobs made runnable per second across the whole import (0 = no metering)
+        self.analysis_spacing = 1.0 / analysis_rate if analysis_rate > 0 else None
+        self.on_progress = on_progress
+        self.rows_read = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors: List[Dict[str, Any]] = []
+        self._next_analysis_at: Optional[datetime] = None
+        self._started = time.monotonic()
+
+    async def run(self, chunks: AsyncIterator[bytes], fmt: str) -> Dict[str, Any]:
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f"Unsupported import format: {fmt}")
+        lines = iter_lines(chunks)
+        records = iter_csv_records(lines) if fmt == "csv" else iter_jsonl_records(lines)
+        batch: List[Dict[str, Any]] = []
+        async for line_number, record in records:
+            self.rows_read += 1
+            clean = self._validate(line_number, record)
+            if clean is None:
+                continue
+            batch.append(clean)
+            if len(batch) >= self.chunk_size:
+                # Reading pauses here until the chunk is committed (backpressure)
+                await self._flush(batch)
+                batch = []
+        if batch:
+            await self._flush(batch)
+        summary = self.summary(done=True)
+        logger.info("Feedback import %s finished: %s", self.import_id, summary)
+        return summary
+
+    def _validate(self, line_number: int, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        error: Any = record.get("__error__")
+        if error is None:
+            try:
+                return self.validate(record)
+            except ValueError as exc:
+                # pydantic's ValidationError subclasses ValueError
+                errors = getattr(exc, "errors", None)
+                error = (
+                    [{"loc": list(item["loc"]), "msg": item["msg"]} for item in errors()]
+                    if callable(errors)
+                    else str(exc)
+                )
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_number, "errors": error})
+        return None
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        run_after = None
+        if self.analysis_spacing:
+            now = datetime.now(timezone.utc)
+            run_after = max(now, self._next_analysis_at or now)
+            self._next_analysis_at = run_after + timedelta(seconds=self.analysis_spacing * len(batch))
+        async with AsyncSessionLocal() as session:
+            rows = await FeedbackService.create_feedback_bulk(
+                session, batch, run_after=run_after, analysis_spacing=self.analysis_spacing
+            )
+        self.inserted += len(rows)
+        self.duplicates += sum(1 for row in rows if row["duplicate_of_id"] is not None)
+        progress = self.summary()
+        logger.info(
+            "Feedback import %s: %s rows read, %s inserted, %s invalid (%.0f rows/s)",
+            self.import_id,
+            self.rows_read,
+            self.inserted,
+            self.invalid,
+            progress["rows_per_second"] or 0,
+        )
+        if self.on_progress is not None:
+            try:
+                await self.on_progress(progress)
+            except Exception:
+                logger.exception("Import progress callback failed")
+
+    def summary(self, done: bool = False) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self._started
+        return {
+            "import_id": self.import_id,
+            "done": done,
+            "rows_read": self.rows_read,
+            "inserted": self.inserted,
+            "near_duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "elapsed_seconds": round(elapsed, 2),
+            "rows_per_second": round(self.rows_read / elapsed, 1) if elapsed else None,
+            "analysis_queued_until": (
+                self._next_analysis_at.isoformat() if self._next_analysis_at else None
+            ),
+            **({"errors": self.errors} if done else {}),
+        }
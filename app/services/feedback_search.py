@@ -0,0 +1,113 @@
+"""
+Full-text search over feedback for the staff list (``?q=``).
+
+Matching uses the generated ``search_vector`` columns on ``feedback``
+(feedback text) and ``analysis`` (actionable insights + key points). Both are
+GIN indexed. A match is ``feedback.id IN (feedback hits UNION analysis hits)``,
+so each side is an index lookup of its own and the result combines with the
+other list filters. Results are ranked, with feedback-text hits weighted above
+analysis hits; the highlighted snippet is built only for the returned page.
+Snippets are raw patient text: ts_headline marks matches with plain-text
+markers and ``render_snippet`` HTML-escapes the text before turning them into
+``<mark>`` tags.
+
+If the full-text query matches nothing, usually because of a misspelling, the
+search falls back to pg_trgm word similarity on the feedback text. That path
+needs the ``pg_trgm`` extension and its GIN index, which are created on startup
+when the database role is allowed to. Otherwise the fallback stays off.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from sqlalchemy import func, literal, select, text, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.logging_config import get_logger
+from app.models.analysis import Analysis
+from app.models.feedback import Feedback
+from app.utils.helpers import HIGHLIGHT_START, HIGHLIGHT_STOP
+
+logger = get_logger(__name__)
+
+# Must match the configuration used by the generated search_vector columns
+TS_CONFIG = "english"
+HEADLINE_OPTIONS = (
+    f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_STOP}", MaxWords=24, MinWords=8, MaxFragments=2'
+)
+
+SEARCH_FULLTEXT = "fulltext"
+SEARCH_TRIGRAM = "trigram"
+
+
+@dataclass(frozen=True)
+class SearchPlan:
+    mode: str
+    condition: Any
+    rank: Any
+    # Builds the snippet from the feedback text column of the ranked page
+    snippet: Callable[[Any], Any]
+    # Whether rank reads analysis columns (needs an outer join); condition never does
+    uses_analysis: bool
+
+
+class FeedbackSearch:
+    def __init__(self) -> None:
+        self.trigram_enabled = os.getenv("SEARCH_TRIGRAM_FALLBACK", "true").lower() == "true"
+        self.trigram_threshold = float(os.getenv("SEARCH_TRIGRAM_THRESHOLD", "0.5"))
+        self.trigram_available = False
+
+    def fulltext(self, q: str) -> SearchPlan:
+        query = func.websearch_to_tsquery(TS_CONFIG, q)
+        # An OR across feedback and the outer-joined analysis could use neither GIN index
+        matches = union(
+            select(Feedback.id).where(Feedback.search_vector.op("@@")(query)),
+            select(Analysis.feedback_id).where(Analysis.search_vector.op("@@")(query)),
+        )
+        rank = func.ts_rank_cd(Feedback.search_vector, query) + 0.5 * func.coalesce(
+            func.ts_rank_cd(Analysis.search_vector, query), 0
+        )
+        return SearchPlan(
+            mode=SEARCH_FULLTEXT,
+            condition=Feedback.id.in_(matches),
+            rank=rank,
+            snippet=lambda feedback_text: func.ts_headline(TS_CONFIG, feedback_text, query, HEADLINE_OPTIONS),
+            uses_analysis=True,
+        )
+
+    def trigram(self, q: str) -> SearchPlan:
+        # "q <% text" is word_similarity(q, text) above pg_trgm.word_similarity_threshold,
+        # answered from ix_feedback_text_trgm; the explicit bound applies our own threshold
+        similarity = func.word_similarity(q, Feedback.feedback_text)
+        return SearchPlan(
+            mode=SEARCH_TRIGRAM,
+            condition=literal(q).op("<%")(Feedback.feedback_text) & (similarity >= self.trigram_threshold),
+            rank=similarity,
+            snippet=lambda feedback_text: func.left(feedback_text, 200),
+            uses_analysis=False,
+        )
+
+    async def ensure_trigram(self, db: AsyncSession) -> bool:
+        """Best-effort setup of pg_trgm and the trigram index used by the fallback."""
+        if not self.trigram_enabled:
+            return False
+        try:
+            await db.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            await db.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_feedback_text_trgm "
+                    "ON feedback USING gin (feedback_text gin_trgm_ops)"
+                )
+            )
+            await db.commit()
+        except Exception as exc:
+            await db.rollback()
+            logger.warning("Trigram search fallback unavailable (pg_trgm): %s", exc)
+            return False
+        self.trigram_available = True
+        return True
+
+
+feedback_search = FeedbackSearch()
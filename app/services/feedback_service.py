@@ -3,22 +3,75 @@ Business logic for handling feedback, actions, and analytics.
 """
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
 
-from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy import and_, case, func, insert, or_, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
 
+from app.db import AsyncSessionLocal
 from app.logging_config import get_logger
 from app.models.actions import Action
 from app.models.analysis import Analysis
 from app.models.feedback import Feedback
+from app.services.analysis_queue import analysis_queue
+from app.services.analysis_cache import CACHED_FIELDS, analysis_cache
+from app.services.dedup import duplicate_detector
+from app.services.feedback_counts import feedback_counter
+from app.services.feedback_search import SearchPlan, feedback_search
 from app.services.gemini_service import gemini_service
-from app.utils.helpers import format_datetime
+from app.services.triage import triage_feedback
+from app.utils.batching import MicroBatcher
+from app.utils.content_hash import compute_content_hash
+from app.utils.helpers import format_datetime, render_snippet
+from app.utils.pagination import FeedbackCursor
 
 logger = get_logger(__name__)
 
+# Backoff before a failed analysis is picked up again by the reprocessor: base * 2^attempts, capped
+REPROCESS_BACKOFF_SECONDS = int(os.getenv("ANALYSIS_REPROCESS_BACKOFF_SECONDS", "60"))
+REPROCESS_BACKOFF_MAX_SECONDS = int(os.getenv("ANALYSIS_REPROCESS_BACKOFF_MAX_SECONDS", "3600"))
+
+# Columns the list endpoints can project (?fields=), keyed by response field
+LIST_FIELDS: Dict[str, Any] = {
+    "id": Feedback.id,
+    "patient_name": Feedback.patient_name,
+    "visit_date": Feedback.visit_date,
+    "department": Feedback.department,
+    "doctor_name": Feedback.doctor_name,
+    "feedback_text": Feedback.feedback_text,
+    "rating": Feedback.rating,
+    "status": Feedback.status,
+    "created_at": Feedback.created_at,
+    "duplicate_of_id": Feedback.duplicate_of_id,
+    "urgency": Analysis.urgency,
+    "urgency_reason": Analysis.urgency_reason,
+    "urgency_flags": Analysis.urgency_flags,
+    "sentiment": Analysis.sentiment,
+    "primary_category": Analysis.primary_category,
+    "actionable_insights": Analysis.actionable_insights,
+    "analysis_status": case((Analysis.id.is_not(None), "completed"), else_="pending"),
+}
+# Fields read from analysis (outer-joined unless an analysis filter already joins it)
+ANALYSIS_LIST_FIELDS = frozenset(
+    ("urgency", "urgency_reason", "urgency_flags", "sentiment", "primary_category",
+     "actionable_insights", "analysis_status")
+)
+
+
+@dataclass(frozen=True)
+class FeedbackPage:
+    rows: List[Dict[str, Any]]
+    total: int
+    # How total was counted: exact, cached or estimated
+    total_strategy: str
+    # fulltext or trigram when the page is a search result
+    search_mode: Optional[str] = None
+
 
 class FeedbackService:
     """Service encapsulating feedback business logic."""
@@ -33,21 +86,190 @@ class FeedbackService:
         feedback_text: str,
         rating: int,
     ) -> Feedback:
-        feedback = Feedback(
-            patient_name=patient_name,
-            visit_date=visit_date,
-            department=department,
-            doctor_name=doctor_name,
-            feedback_text=feedback_text,
-            rating=rating,
-            status="pending_analysis",
-        )
-        db.add(feedback)
+        signature = duplicate_detector.signature(feedback_text)
+        duplicate = duplicate_detector.find_duplicate(signature, department)
+        row = {
+            "patient_name": patient_name,
+            "visit_date": visit_date,
+            "department": department,
+            "doctor_name": doctor_name,
+            "feedback_text": feedback_text,
+            "rating": rating,
+            "status": "pending_analysis",
+            "duplicate_of_id": duplicate.feedback_id if duplicate else None,
+        }
+        if _insert_batcher is not None:
+            # Write-behind: resolved only after the shared batch has committed
+            feedback = await _insert_batcher.submit(row)
+            if isinstance(feedback, Exception):
+                raise feedback
+        else:
+            feedback = await FeedbackService._insert_feedback(db, row)
+        analysis_queue.notify()
+        feedback_counter.invalidate()
+        if duplicate:
+            logger.info(
+                "Feedback created: id=%s department=%s near-duplicate of %s (similarity %.2f)",
+                feedback.id,
+                department,
+                duplicate.feedback_id,
+                duplicate.similarity,
+            )
+        else:
+            duplicate_detector.remember(feedback.id, signature, department)
+            logger.info("Feedback created: id=%s department=%s", feedback.id, department)
+        return feedback
+
+    @staticmethod
+    async def _insert_feedback(db: AsyncSession, row: Dict[str, Any]) -> Feedback:
+        """Insert one feedback row, queue its analysis and commit."""
+        # INSERT ... RETURNING the whole row: id/created_at come back without a refresh SELECT
+        result = await db.execute(insert(Feedback).values(**row).returning(Feedback))
+        feedback = result.scalar_one()
+        # Queue analysis in the same transaction so an acknowledged submission is never lost
+        await FeedbackService._enqueue_new_feedback(db, [(feedback.id, feedback.duplicate_of_id)])
         await db.commit()
-        await db.refresh(feedback)
-        logger.info("Feedback created: id=%s department=%s", feedback.id, department)
         return feedback
 
+    @staticmethod
+    async def _flush_feedback_inserts(rows: List[Dict[str, Any]]) -> List[Any]:
+        """Write-behind flush: one multi-row INSERT ... RETURNING and one commit for the batch."""
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.scalars(
+                    insert(Feedback).returning(Feedback, sort_by_parameter_order=True), rows
+                )
+                feedbacks = list(result.all())
+                await FeedbackService._enqueue_new_feedback(
+                    session, [(feedback.id, feedback.duplicate_of_id) for feedback in feedbacks]
+                )
+                await session.commit()
+            return feedbacks
+        except Exception:
+            if len(rows) == 1:
+                raise
+            logger.warning("Batched feedback insert failed; inserting %s rows one by one", len(rows))
+
+        # Isolate the bad row so the rest of the batch is still acknowledged
+        outcomes: List[Any] = []
+        for row in rows:
+            try:
+                async with AsyncSessionLocal() as session:
+                    outcomes.append(await FeedbackService._insert_feedback(session, row))
+            except Exception as exc:
+                outcomes.append(exc)
+        return outcomes
+
+    @staticmethod
+    async def _enqueue_new_feedback(
+        db: AsyncSession,
+        created: List[Tuple[int, Optional[int]]],
+        run_after: Optional[datetime] = None,
+        spacing: Optional[float] = None,
+    ) -> None:
+        """
+        Queue analysis for ``(feedback_id, duplicate_of_id)`` pairs without committing.
+
+        Near-duplicates run a little later so the original's analysis is usually
+        there to reuse.
+        """
+        originals = [feedback_id for feedback_id, duplicate_of in created if duplicate_of is None]
+        duplicates = [feedback_id for feedback_id, duplicate_of in created if duplicate_of is not None]
+        if originals:
+            await analysis_queue.enqueue(db, originals, commit=False, run_after=run_after, spacing=spacing)
+        if duplicates:
+            now = datetime.now(timezone.utc)
+            deferred = max(run_after or now, now + timedelta(seconds=duplicate_detector.defer_seconds))
+            await analysis_queue.enqueue(db, duplicates, commit=False, run_after=deferred, spacing=spacing)
+
+    @staticmethod
+    async def create_feedback_bulk(
+        db: AsyncSession,
+        records: List[Dict[str, Any]],
+        run_after: Optional[datetime] = None,
+        analysis_spacing: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Insert many validated feedback records and queue all their analyses.
+
+        Rows go in with executemany INSERT ... RETURNING, which SQLAlchemy sends
+        as multi-row VALUES batches, and everything commits in one transaction.
+        ``run_after``/``analysis_spacing`` meter when the analysis jobs become
+        runnable (see ``AnalysisQueue.enqueue``). Near-duplicates of earlier
+        records in the same request are inserted after their originals so they
+        can link to them. Returns one dict per record, in input order, with the
+        generated ``id``, ``created_at`` and ``duplicate_of_id``.
+        """
+        if not records:
+            return []
+        rows: List[Dict[str, Any]] = []
+        signatures = []
+        # Position of the earlier record in this request that each row duplicates
+        batch_originals: List[Optional[int]] = []
+        batch_index = duplicate_detector.batch_index()
+        for index, record in enumerate(records):
+            signature = duplicate_detector.signature(record["feedback_text"])
+            duplicate = duplicate_detector.find_duplicate(signature, record["department"])
+            earlier = None
+            if duplicate is None:
+                earlier = duplicate_detector.find_in_batch(batch_index, index, signature, record["department"])
+            batch_originals.append(earlier.feedback_id if earlier else None)
+            signatures.append(signature)
+            rows.append(
+                {
+                    "patient_name": record.get("patient_name"),
+                    "visit_date": record["visit_date"],
+                    "department": record["department"],
+                    "doctor_name": record.get("doctor_name"),
+                    "feedback_text": record["feedback_text"],
+                    "rating": record["rating"],
+                    "status": "pending_analysis",
+                    "duplicate_of_id": duplicate.feedback_id if duplicate else None,
+                }
+            )
+            if index % 500 == 499:
+                # Signatures are CPU work; let other requests run between slices
+                await asyncio.sleep(0)
+
+        async def insert_rows(batch: List[Dict[str, Any]]) -> None:
+            result = await db.execute(
+                insert(Feedback).returning(
+                    Feedback.id, Feedback.created_at, sort_by_parameter_order=True
+                ),
+                batch,
+            )
+            for row, (feedback_id, created_at) in zip(batch, result.all()):
+                row["id"] = feedback_id
+                row["created_at"] = created_at
+
+        await insert_rows([row for row, earlier in zip(rows, batch_originals) if earlier is None])
+        in_batch_duplicates = []
+        for row, earlier in zip(rows, batch_originals):
+            if earlier is not None:
+                row["duplicate_of_id"] = rows[earlier]["id"]
+                in_batch_duplicates.append(row)
+        if in_batch_duplicates:
+            await insert_rows(in_batch_duplicates)
+
+        await FeedbackService._enqueue_new_feedback(
+            db,
+            [(row["id"], row["duplicate_of_id"]) for row in rows],
+            run_after=run_after,
+            spacing=analysis_spacing,
+        )
+        await db.commit()
+        analysis_queue.notify()
+        feedback_counter.invalidate()
+
+        duplicates = 0
+        for row, signature in zip(rows, signatures):
+            if row["duplicate_of_id"] is None:
+                duplicate_detector.remember(row["id"], signature, row["department"])
+            else:
+                duplicates += 1
+        logger.info("Bulk feedback created: %s rows (%s near-duplicates)", len(rows), duplicates)
+        return rows
+
     @staticmethod
     async def get_feedback_by_id(db: AsyncSession, feedback_id: int) -> Optional[Feedback]:
         result = await db.execute(
@@ -67,12 +289,26 @@ class FeedbackService:
         sentiment: Optional[str] = None,
         category: Optional[str] = None,
         status: Optional[str] = None,
+        flag: Optional[str] = None,
+        emotion: Optional[str] = None,
         limit: int = 100,
         offset: int = 0,
-    ) -> Tuple[List[Feedback], int]:
-        query = select(Feedback)
-        count_query = select(func.count(Feedback.id))
-
+        cursor: Optional[FeedbackCursor] = None,
+        count_strategy: Optional[str] = None,
+        fields: Sequence[str] = ("id",),
+        q: Optional[str] = None,
+    ) -> FeedbackPage:
+        """
+        One page of feedback, the filtered total and how that total was counted.
+
+        Rows are plain dicts of the requested ``fields`` (keys of ``LIST_FIELDS``),
+        read in a single joined SELECT without hydrating ORM objects. Pages are
+        newest first; with ``cursor`` (the ``(created_at, id)`` of the previous
+        page's last row) they are read by keyset instead of ``offset``. With a
+        search ``q`` rows are ranked by relevance (offset paging) and carry
+        ``rank`` and ``snippet``. ``count_strategy`` is exact/cached/estimated
+        (see ``feedback_counts``).
+        """
         conditions = []
         if department:
             conditions.append(Feedback.department == department)
@@ -83,41 +319,108 @@ class FeedbackService:
         if status:
             conditions.append(Feedback.status == status)
 
-        if priority or sentiment or category:
-            query = query.join(Analysis, Feedback.id == Analysis.feedback_id)
-            count_query = count_query.select_from(Feedback).join(Analysis)
-            if priority:
-                conditions.append(Analysis.urgency == priority)
-            if sentiment:
-                conditions.append(Analysis.sentiment == sentiment)
-            if category:
-                conditions.append(
-                    or_(
-                        Analysis.primary_category == category,
-                        Analysis.subcategories.contains([category]),
-                    )
+        analysis_filtered = bool(priority or sentiment or category or flag or emotion)
+        if priority:
+            conditions.append(Analysis.urgency == priority)
+        if sentiment:
+            conditions.append(Analysis.sentiment == sentiment)
+        if category:
+            conditions.append(
+                or_(
+                    Analysis.primary_category == category,
+                    Analysis.subcategories.contains([category]),
                 )
+            )
+        # JSONB containment (@>) is answered from the jsonb_path_ops GIN indexes
+        if flag:
+            conditions.append(Analysis.urgency_flags.contains([flag]))
+        if emotion:
+            conditions.append(Analysis.emotions.contains([emotion]))
+
+        def joined(stmt: Any, plan: Optional[SearchPlan], names: Sequence[str] = ()) -> Any:
+            if analysis_filtered:
+                return stmt.join(Analysis, Feedback.id == Analysis.feedback_id)
+            if (plan is not None and plan.uses_analysis) or ANALYSIS_LIST_FIELDS.intersection(names):
+                return stmt.outerjoin(Analysis, Feedback.id == Analysis.feedback_id)
+            return stmt
+
+        async def count(plan: Optional[SearchPlan]) -> Tuple[int, str]:
+            where = conditions + ([plan.condition] if plan is not None else [])
+            # The search condition is self-contained; only rank needs the analysis join
+            stmt = joined(select(func.count(Feedback.id)).select_from(Feedback), None)
+            if where:
+                stmt = stmt.where(and_(*where))
+            return await feedback_counter.count(
+                db,
+                stmt,
+                signature=(
+                    department, start_date, end_date, priority, sentiment, category, status, flag, emotion,
+                    plan.mode if plan is not None else None, q,
+                ),
+                filtered=bool(where),
+                strategy=count_strategy or feedback_counter.default_strategy,
+            )
 
-        if conditions:
-            query = query.where(and_(*conditions))
-            count_query = count_query.where(and_(*conditions))
-
-        result = await db.execute(count_query)
-        total = int(result.scalar() or 0)
-
-        query = (
-            query.options(selectinload(Feedback.analysis))
-            .order_by(Feedback.created_at.desc())
-            .limit(limit)
-            .offset(offset)
-        )
-        rows = await db.execute(query)
-        feedbacks = rows.scalars().unique().all()
-        return feedbacks, total
+        plan = feedback_search.fulltext(q) if q else None
+        total, used_strategy = await count(plan)
+        if plan is not None and total == 0 and feedback_search.trigram_available:
+            # Nothing matched the words as typed: retry as a fuzzy (misspelling-tolerant) match
+            plan = feedback_search.trigram(q)
+            total, used_strategy = await count(plan)
+
+        # id and created_at are always read: they make up the next cursor
+        names = list(dict.fromkeys(["id", "created_at", *fields]))
+        columns = [LIST_FIELDS[name].label(name) for name in names]
+        if plan is not None:
+            columns += [plan.rank.label("rank"), Feedback.feedback_text.label("snippet_source")]
+        query = joined(select(*columns).select_from(Feedback), plan, names)
+        where = conditions + ([plan.condition] if plan is not None else [])
+        if where:
+            query = query.where(and_(*where))
+
+        if plan is not None:
+            # Rank only the matches and cut the page first; headlines are built for that page only
+            page = (
+                query.order_by(plan.rank.desc(), Feedback.id.desc()).offset(offset).limit(limit).subquery()
+            )
+            query = select(
+                *[page.c[name] for name in names],
+                page.c.rank,
+                plan.snippet(page.c.snippet_source).label("snippet"),
+            ).order_by(page.c.rank.desc(), page.c.id.desc())
+        else:
+            if cursor is not None:
+                # Row-value comparison walks ix_feedback_created_id backwards from the cursor
+                query = query.where(tuple_(Feedback.created_at, Feedback.id) < tuple_(*cursor))
+            else:
+                query = query.offset(offset)
+            # id breaks created_at ties so keyset pages never skip or repeat rows
+            query = query.order_by(Feedback.created_at.desc(), Feedback.id.desc()).limit(limit)
+        result = await db.execute(query)
+        rows = [dict(row) for row in result.mappings()]
+        if plan is not None:
+            # Snippets are raw patient text: escape before adding the <mark> highlights
+            for row in rows:
+                row["snippet"] = render_snippet(row["snippet"])
+        return FeedbackPage(rows, total, used_strategy, plan.mode if plan is not None else None)
 
     @staticmethod
-    async def analyze_feedback_async(db: AsyncSession, feedback_id: int) -> Optional[Analysis]:
-        feedback = await FeedbackService.get_feedback_by_id(db, feedback_id)
+    async def analyze_feedback_async(
+        db: AsyncSession,
+        feedback_id: int,
+        on_urgency: Optional[Callable[[Feedback, Dict[str, Any]], Awaitable[None]]] = None,
+    ) -> Optional[Analysis]:
+        """
+        Analyze a feedback and persist the result.
+
+        ``on_urgency(feedback, urgency)`` is awaited as soon as a streamed
+        response has produced its urgency object (GEMINI_STREAMING=true).
+        """
+        # One round trip: the feedback plus any existing analysis (actions aren't needed here)
+        result = await db.execute(
+            select(Feedback).options(joinedload(Feedback.analysis)).where(Feedback.id == feedback_id)
+        )
+        feedback = result.unique().scalar_one_or_none()
         if not feedback:
             logger.warning("Feedback %s not found for analysis", feedback_id)
             return None
@@ -125,38 +428,61 @@ class FeedbackService:
         if feedback.analysis:
             return feedback.analysis
 
-        analysis_result = await gemini_service.analyze_feedback_with_retry(
-            feedback_text=feedback.feedback_text,
-            department=feedback.department,
-            doctor_name=feedback.doctor_name,
-            visit_date=format_datetime(feedback.visit_date),
-            rating=feedback.rating,
+        content_hash = compute_content_hash(
+            feedback.feedback_text, feedback.department, feedback.rating
         )
-
-        if "error" in analysis_result:
-            logger.error(
-                "Analysis failed for feedback %s: %s", feedback_id, analysis_result["error"]
+        analysis_result = None
+        if feedback.duplicate_of_id is not None:
+            analysis_result = await FeedbackService._duplicate_source_result(db, feedback)
+            if analysis_result is not None:
+                logger.info(
+                    "Reusing analysis of feedback %s for near-duplicate %s",
+                    feedback.duplicate_of_id,
+                    feedback_id,
+                )
+        if analysis_result is None:
+            analysis_result = await analysis_cache.get(db, content_hash)
+            if analysis_result is not None:
+                logger.info("Analysis cache hit for feedback %s", feedback_id)
+        if analysis_result is None:
+            request = dict(
+                feedback_text=feedback.feedback_text,
+                department=feedback.department,
+                doctor_name=feedback.doctor_name,
+                visit_date=format_datetime(feedback.visit_date),
+                rating=feedback.rating,
             )
-            return None
+            if gemini_service.batch_enabled:
+                analysis_result = await gemini_service.analyze_feedback_batched(
+                    feedback_id=feedback_id, **request
+                )
+            else:
+                on_partial = None
+                if on_urgency is not None:
+                    async def on_partial(key: str, value: Any) -> None:
+                        if key == "urgency":
+                            await on_urgency(feedback, value)
+
+                analysis_result = await gemini_service.analyze_feedback_with_retry(
+                    on_partial=on_partial, **request
+                )
+
+            if "error" in analysis_result:
+                logger.error(
+                    "Analysis failed for feedback %s: %s", feedback_id, analysis_result["error"]
+                )
+                return None
+            await analysis_cache.set(db, content_hash, analysis_result)
 
-        analysis = Analysis(
-            feedback_id=feedback_id,
-            sentiment=analysis_result.get("sentiment", "neutral"),
-            confidence_score=analysis_result.get("confidence_score", 0.5),
-            emotions=analysis_result.get("emotions", []),
-            urgency=analysis_result.get("urgency", "low"),
-            urgency_reason=analysis_result.get("urgency_reason"),
-            urgency_flags=analysis_result.get("urgency_flags", []),
-            primary_category=analysis_result.get("primary_category"),
-            subcategories=analysis_result.get("subcategories", []),
-            medical_concerns=analysis_result.get("medical_concerns"),
-            actionable_insights=analysis_result.get("actionable_insights"),
-            key_points=analysis_result.get("key_points", []),
+        inserted = await db.execute(
+            insert(Analysis)
+            .values(**FeedbackService.analysis_values(feedback_id, analysis_result))
+            .returning(Analysis)
         )
-        db.add(analysis)
-        feedback.status = "reviewed"
+        analysis = inserted.scalar_one()
+        await db.execute(update(Feedback).where(Feedback.id == feedback_id).values(status="reviewed"))
         await db.commit()
-        await db.refresh(analysis)
+        feedback_counter.invalidate()
         logger.info(
             "Analysis saved for feedback %s sentiment=%s urgency=%s",
             feedback_id,
@@ -165,6 +491,52 @@ class FeedbackService:
         )
         return analysis
 
+    @staticmethod
+    async def _duplicate_source_result(db: AsyncSession, feedback: Feedback) -> Optional[Dict[str, Any]]:
+        """
+        The stored analysis of a near-duplicate's original, as a result dict.
+
+        Only reused when the ratings match and local triage does not find the
+        copy more urgent than the original (e.g. added "chest pain"); otherwise
+        None, so the feedback gets its own analysis.
+        """
+        result = await db.execute(
+            select(Analysis, Feedback.feedback_text, Feedback.rating)
+            .join(Feedback, Feedback.id == Analysis.feedback_id)
+            .where(Analysis.feedback_id == feedback.duplicate_of_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        source, source_text, source_rating = row
+        if source_rating != feedback.rating:
+            return None
+        if triage_feedback(feedback.feedback_text, feedback.rating).is_more_urgent_than(
+            triage_feedback(source_text, source_rating)
+        ):
+            return None
+        return {field: getattr(source, field) for field in CACHED_FIELDS}
+
+    @staticmethod
+    def analysis_values(feedback_id: int, analysis_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Column values of an Analysis row for a Gemini result dict."""
+        return {
+            "feedback_id": feedback_id,
+            "sentiment": analysis_result.get("sentiment", "neutral"),
+            "confidence_score": analysis_result.get("confidence_score", 0.5),
+            "emotions": analysis_result.get("emotions", []),
+            "urgency": analysis_result.get("urgency", "low"),
+            "urgency_reason": analysis_result.get("urgency_reason"),
+            "urgency_flags": analysis_result.get("urgency_flags", []),
+            "primary_category": analysis_result.get("primary_category"),
+            "subcategories": analysis_result.get("subcategories", []),
+            "medical_concerns": analysis_result.get("medical_concerns"),
+            "actionable_insights": analysis_result.get("actionable_insights"),
+            "key_points": analysis_result.get("key_points", []),
+            "prompt_tokens": analysis_result.get("prompt_tokens"),
+            "response_tokens": analysis_result.get("response_tokens"),
+        }
+
     @staticmethod
     async def update_feedback_status(
         db: AsyncSession,
@@ -173,38 +545,102 @@ class FeedbackService:
         staff_note: Optional[str] = None,
         assigned_department: Optional[str] = None,
     ) -> Optional[Feedback]:
-        feedback = await FeedbackService.get_feedback_by_id(db, feedback_id)
+        # UPDATE ... RETURNING replaces the load-modify-refresh round trips
+        result = await db.execute(
+            update(Feedback)
+            .where(Feedback.id == feedback_id)
+            .values(status=status)
+            .returning(Feedback)
+        )
+        feedback = result.scalar_one_or_none()
         if not feedback:
+            await db.rollback()
             return None
 
-        feedback.status = status
-        action = Action(
-            feedback_id=feedback_id,
-            status=status,
-            staff_note=staff_note,
-            assigned_department=assigned_department,
+        await db.execute(
+            insert(Action).values(
+                feedback_id=feedback_id,
+                status=status,
+                staff_note=staff_note,
+                assigned_department=assigned_department,
+            )
         )
-        db.add(action)
         await db.commit()
-        await db.refresh(feedback)
+        feedback_counter.invalidate()
         logger.info("Feedback %s status updated to %s", feedback_id, status)
         return feedback
 
     @staticmethod
     async def mark_analysis_failed(db: AsyncSession, feedback_id: int) -> None:
+        backoff = func.least(
+            REPROCESS_BACKOFF_MAX_SECONDS,
+            REPROCESS_BACKOFF_SECONDS * func.power(2, Feedback.analysis_attempts),
+        )
         await db.execute(
-            update(Feedback).where(Feedback.id == feedback_id).values(status="analysis_failed")
+            update(Feedback)
+            .where(Feedback.id == feedback_id)
+            .values(
+                status="analysis_failed",
+                analysis_attempts=Feedback.analysis_attempts + 1,
+                next_analysis_at=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, backoff),
+            )
         )
         await db.commit()
+        feedback_counter.invalidate()
         logger.error("Feedback %s marked as analysis_failed", feedback_id)
 
     @staticmethod
-    async def get_analytics_summary(db: AsyncSession) -> Dict[str, Any]:
-        total_result = await db.execute(select(func.count(Feedback.id)))
+    async def claim_failed_analyses(
+        db: AsyncSession, after_id: int, limit: int, max_attempts: int
+    ) -> List[int]:
+        """
+        Claim the next page of failed analyses that are due for a retry and queue them.
+
+        Keyset-paged on ``id``; claimed rows move back to pending_analysis in the
+        same statement (SKIP LOCKED), so concurrent reprocessors never overlap,
+        and their analysis jobs are queued in the same transaction.
+        """
+        due = (
+            select(Feedback.id)
+            .where(
+                Feedback.status == "analysis_failed",
+                Feedback.id > after_id,
+                Feedback.analysis_attempts < max_attempts,
+                or_(Feedback.next_analysis_at.is_(None), Feedback.next_analysis_at <= func.now()),
+            )
+            .order_by(Feedback.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(Feedback)
+            .where(Feedback.id.in_(due))
+            .values(status="pending_analysis", next_analysis_at=None)
+            .returning(Feedback.id)
+        )
+        feedback_ids = sorted(result.scalars().all())
+        await analysis_queue.enqueue(db, feedback_ids, commit=False)
+        await db.commit()
+        if feedback_ids:
+            analysis_queue.notify()
+            feedback_counter.invalidate()
+        return feedback_ids
+
+    @staticmethod
+    async def get_analytics_summary(db: AsyncSession, exclude_duplicates: bool = False) -> Dict[str, Any]:
+        # Near-duplicates (kiosk floods, copy-pasted complaints) can be left out of every figure
+        originals = [Feedback.duplicate_of_id.is_(None)] if exclude_duplicates else []
+        analysis_originals = (
+            [Analysis.feedback_id.in_(select(Feedback.id).where(*originals))] if exclude_duplicates else []
+        )
+
+        total_result = await db.execute(select(func.count(Feedback.id)).where(*originals))
         total_feedback = int(total_result.scalar() or 0)
 
-        sentiment_query = select(Analysis.sentiment, func.count(Analysis.id)).group_by(
-            Analysis.sentiment
+        sentiment_query = (
+            select(Analysis.sentiment, func.count(Analysis.id))
+            .where(*analysis_originals)
+            .group_by(Analysis.sentiment)
         )
         sentiment_result = await db.execute(sentiment_query)
         sentiment_breakdown = {row[0]: row[1] for row in sentiment_result.fetchall()}
@@ -215,6 +651,7 @@ class FeedbackService:
                 func.avg(Feedback.rating).label("avg_rating"),
                 func.count(Feedback.id).label("count"),
             )
+            .where(*originals)
             .group_by(Feedback.department)
         )
         rating_result = await db.execute(rating_query)
@@ -229,7 +666,7 @@ class FeedbackService:
 
         category_query = (
             select(Analysis.primary_category, func.count(Analysis.id).label("count"))
-            .where(Analysis.primary_category.isnot(None))
+            .where(Analysis.primary_category.isnot(None), *analysis_originals)
             .group_by(Analysis.primary_category)
             .order_by(func.count(Analysis.id).desc())
             .limit(10)
@@ -244,6 +681,7 @@ class FeedbackService:
             "sentiment_breakdown": sentiment_breakdown,
             "department_ratings": department_ratings,
             "top_issues": top_issues,
+            "duplicates_excluded": exclude_duplicates,
         }
 
     @staticmethod
@@ -314,21 +752,6 @@ class FeedbackService:
             "department_performance": department_performance,
         }
 
-    @staticmethod
-    async def retry_failed_analyses(db: AsyncSession, max_retries: int = 3) -> int:
-        failed_query = select(Feedback).where(Feedback.status == "analysis_failed")
-        result = await db.execute(failed_query)
-        feedbacks = result.scalars().all()
-        retried = 0
-        for feedback in feedbacks[:max_retries]:
-            analysis = await FeedbackService.analyze_feedback_async(db, feedback.id)
-            if analysis:
-                feedback.status = "reviewed"
-                retried += 1
-                logger.info("Successfully retried analysis for feedback %s", feedback.id)
-        await db.commit()
-        return retried
-
     @staticmethod
     async def delete_feedback(db: AsyncSession, feedback_id: int) -> bool:
         """Delete feedback and cascade delete related analysis and actions."""
@@ -337,6 +760,25 @@ class FeedbackService:
             return False
         await db.delete(feedback)
         await db.commit()
+        feedback_counter.invalidate()
+        duplicate_detector.forget(feedback_id)
         logger.info("Feedback %s deleted", feedback_id)
         return True
 
+
+async def drain_feedback_inserts() -> None:
+    """Flush pending write-behind inserts. Called on shutdown."""
+    if _insert_batcher is not None:
+        await _insert_batcher.drain()
+
+
+# Write-behind insert batching: concurrent submissions share one multi-row INSERT,
+# one commit and one pooled connection. Callers are answered only after the commit.
+_insert_batcher: Optional[MicroBatcher] = None
+if os.getenv("FEEDBACK_INSERT_BATCHING", "false").lower() == "true":
+    _insert_batcher = MicroBatcher(
+        FeedbackService._flush_feedback_inserts,
+        max_size=int(os.getenv("FEEDBACK_INSERT_BATCH_MAX_SIZE", "50")),
+        max_delay=float(os.getenv("FEEDBACK_INSERT_BATCH_MAX_DELAY_MS", "5")) / 1000,
+        name="feedback-insert",
+    )
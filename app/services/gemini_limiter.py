@@ -0,0 +1,186 @@
+"""
+Process-wide admission control for Gemini requests.
+
+A token bucket caps the request rate and an AIMD (additive increase,
+multiplicative decrease) window caps concurrency: the window grows by roughly
+one slot per window of successes and halves on 429/5xx/timeouts. A 429
+``Retry-After`` sets a shared deadline that every caller waits out before
+sending, instead of each coroutine sleeping on its own schedule.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+from app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+OUTCOME_SUCCESS = "success"
+OUTCOME_OVERLOAD = "overload"
+OUTCOME_ERROR = "error"
+OUTCOME_CANCELLED = "cancelled"  # e.g. the losing leg of a hedged request
+
+
+class TokenBucket:
+    """Classic token bucket; ``acquire`` waits until a token is available."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def has_token(self) -> bool:
+        if self.rate <= 0:
+            return True
+        if self._lock.locked():
+            # Someone is already waiting for the next token
+            return False
+        self._refill()
+        return self._tokens >= 1
+
+    def try_acquire(self) -> bool:
+        """Take a token only if one is available right now."""
+        if not self.has_token():
+            return False
+        if self.rate > 0:
+            self._tokens -= 1
+        return True
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency window plus token bucket and shared Retry-After deadline."""
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        decrease_factor: float = 0.5,
+        rate_per_second: float = 0.0,
+        burst: int = 1,
+    ) -> None:
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.decrease_factor = decrease_factor
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+        self.successes = 0
+        self.overloads = 0
+        self.waits = 0
+        self.cancellations = 0
+
+    async def acquire(self) -> None:
+        """Wait for the shared deadline, a concurrency slot and a rate token."""
+        waited = False
+        async with self._condition:
+            while True:
+                delay = self.blocked_until - time.monotonic()
+                if delay > 0:
+                    waited = True
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    break
+                waited = True
+                await self._condition.wait()
+        if waited:
+            self.waits += 1
+        try:
+            await self.bucket.acquire()
+        except BaseException:
+            await self.release(OUTCOME_ERROR)
+            raise
+
+    def has_capacity(self) -> bool:
+        """Whether a request could start right now without waiting."""
+        return (
+            self.blocked_until <= time.monotonic()
+            and self.in_flight < int(self.limit)
+            and self.bucket.has_token()
+        )
+
+    def try_acquire(self) -> bool:
+        """Take a slot and a rate token only if both are free right now; never waits."""
+        if self.blocked_until > time.monotonic() or self.in_flight >= int(self.limit):
+            return False
+        if not self.bucket.try_acquire():
+            return False
+        self.in_flight += 1
+        return True
+
+    async def release(self, outcome: str = OUTCOME_SUCCESS, retry_after: Optional[float] = None) -> None:
+        """Return a slot and adapt the window to the request outcome."""
+        async with self._condition:
+            self.in_flight = max(0, self.in_flight - 1)
+            now = time.monotonic()
+            if outcome == OUTCOME_SUCCESS:
+                self.successes += 1
+                self.limit = min(self.max_limit, self.limit + 1.0 / max(self.limit, 1.0))
+            elif outcome == OUTCOME_OVERLOAD:
+                self.overloads += 1
+                # Decrease at most once per in-flight generation to avoid collapsing to min
+                if now - self._last_decrease > 1.0:
+                    previous = self.limit
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+                    logger.warning(
+                        "Gemini concurrency window reduced %.1f -> %.1f", previous, self.limit
+                    )
+                if retry_after:
+                    self.blocked_until = max(self.blocked_until, now + retry_after)
+            elif outcome == OUTCOME_CANCELLED:
+                self.cancellations += 1
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "rate_per_second": self.bucket.rate,
+            "blocked_for_seconds": round(max(0.0, self.blocked_until - time.monotonic()), 2),
+            "successes": self.successes,
+            "overloads": self.overloads,
+            "waits": self.waits,
+            "cancellations": self.cancellations,
+        }
+
+
+def limiter_from_env() -> AdaptiveConcurrencyLimiter:
+    return AdaptiveConcurrencyLimiter(
+        initial_limit=int(os.getenv("GEMINI_CONCURRENCY_INITIAL", "4")),
+        min_limit=int(os.getenv("GEMINI_CONCURRENCY_MIN", "1")),
+        max_limit=int(os.getenv("GEMINI_CONCURRENCY_MAX", "32")),
+        rate_per_second=float(os.getenv("GEMINI_RATE_PER_SECOND", "0")),
+        burst=int(os.getenv("GEMINI_RATE_BURST", "5")),
+    )
@@ -1,37 +1,137 @@
 """
 Async Gemini AI service for analyzing medical feedback.
-Includes circuit breaker pattern for fault tolerance.
+Includes per-model circuit breakers, fallback model routing and hedged
+requests for fault tolerance and tail latency.
 """
 from __future__ import annotations
 
 import asyncio
 import os
 import time
-from typing import Any, Dict, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
 
 import httpx
 from dotenv import load_dotenv
 
 from app.logging_config import get_logger
+from app.utils.constants import EMOTION_TYPES, URGENCY_FLAGS
 from app.utils.helpers import (
     extract_categories,
     extract_medical_concerns,
     extract_urgency_flags,
     extract_urgency_level,
     extract_urgency_reason,
+    normalize_tags,
     parse_json_safely,
 )
-from app.utils.prompts import get_analysis_prompt
+from app.services.circuit_breaker import BreakerTicket, CircuitBreaker, CircuitBreakerState
+from app.services.gemini_limiter import (
+    OUTCOME_CANCELLED,
+    OUTCOME_ERROR,
+    OUTCOME_OVERLOAD,
+    OUTCOME_SUCCESS,
+    limiter_from_env,
+)
+from app.utils.analysis_result import AnalysisResult, decode_structured_analysis
+from app.utils.analysis_result import loads as fast_json_loads
+from app.utils.batching import MicroBatcher
+from app.utils.json_stream import TopLevelMemberParser
+from app.utils.latency import LatencyTracker
+from app.utils.prompts import (
+    ANALYSIS_RESPONSE_SCHEMA,
+    BATCH_ANALYSIS_RESPONSE_SCHEMA,
+    get_analysis_prompt,
+    get_batch_analysis_prompt,
+)
 
 load_dotenv()
 logger = get_logger(__name__)
 
 
-class CircuitBreakerState:
-    """Circuit breaker state tracking for Gemini API."""
-    CLOSED = "closed"  # Normal operation
-    OPEN = "open"  # Failing, reject requests
-    HALF_OPEN = "half_open"  # Testing if service recovered
+@dataclass(slots=True)
+class GeminiReply:
+    """Raw model reply: concatenated text plus usageMetadata token counts."""
+    text: Optional[str]
+    prompt_tokens: Optional[int] = None
+    response_tokens: Optional[int] = None
+
+
+def _share(total: Optional[int], parts: int) -> Optional[int]:
+    return None if total is None else -(-total // max(parts, 1))
+
+
+BREAKER_OPEN_ERROR = {
+    "error": "Gemini API circuit breaker is open for every model (too many failures)",
+    "retry": False,
+}
+
+# Awaited with (member_name, value) as top-level answer members finish streaming
+PartialCallback = Callable[[str, Any], Awaitable[None]]
+
+
+class _BreakerScope:
+    """
+    Breaker tickets and outcomes of one logical request, settled once when it ends.
+
+    Retries, fallbacks and hedges inside the request only record outcomes, so a
+    single bad request counts as at most one failure per model.
+    """
+
+    def __init__(self, breakers: Dict[str, CircuitBreaker]) -> None:
+        self.breakers = breakers
+        self.tickets: Dict[str, BreakerTicket] = {}
+        self.succeeded: Set[str] = set()
+        self.last_transient: Dict[str, bool] = {}
+        self.settled = False
+
+    def admit(self, model: str) -> bool:
+        """Admit ``model`` once per request; later attempts reuse the ticket while it is valid."""
+        breaker = self.breakers[model]
+        ticket = self.tickets.get(model)
+        if ticket is None:
+            ticket = breaker.allow()
+            if ticket is None:
+                return False
+            self.tickets[model] = ticket
+            return True
+        return breaker.admits(ticket)
+
+    def record(self, model: str, result: Optional[Union[GeminiReply, Dict[str, Any]]]) -> None:
+        if isinstance(result, GeminiReply):
+            self.succeeded.add(model)
+        # Cancelled legs (None) and client-side errors say nothing about availability
+        self.last_transient[model] = isinstance(result, dict) and bool(result.get("transient"))
+
+    def settle(self) -> None:
+        self.settled = True
+        for model, ticket in self.tickets.items():
+            breaker = self.breakers[model]
+            if model in self.succeeded:
+                breaker.record_success(ticket)
+            elif self.last_transient.get(model):
+                breaker.record_failure(ticket)
+            else:
+                breaker.release(ticket)
+
+
+# The logical request in progress (analyze_feedback_with_retry spans several _generate calls)
+_breaker_scope: ContextVar[Optional[_BreakerScope]] = ContextVar("gemini_breaker_scope", default=None)
+
+
+def _unavailable(result: Dict[str, Any]) -> bool:
+    """Whether an error result means Gemini itself is unavailable, not that the answer was bad."""
+    return bool(result.get("transient")) or result.get("error") == BREAKER_OPEN_ERROR["error"]
+
+
+def _parse_retry_after(value: Optional[str], default: float = 60.0) -> float:
+    """Parse a Retry-After header given in seconds; fall back to ``default``."""
+    try:
+        return max(0.0, float(value)) if value is not None else default
+    except ValueError:
+        return default
 
 
 class GeminiService:
@@ -44,14 +144,91 @@ class GeminiService:
         )
         # Model name should be just the model identifier, not "models/..."
         self.model = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+        # Tried in order when the primary is slow, rate-limited, failing or its breaker is open
+        fallbacks = [m.strip() for m in os.getenv("GEMINI_FALLBACK_MODELS", "").split(",")]
+        self.models = [self.model] + [m for m in dict.fromkeys(fallbacks) if m and m != self.model]
         self.timeout = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "30"))
-        
-        # Circuit breaker state
-        self.circuit_state = CircuitBreakerState.CLOSED
-        self.failure_count = 0
-        self.circuit_open_until = None
-        self.max_failures_before_open = 5  # Open circuit after 5 consecutive failures
-        self.circuit_recovery_timeout = 60  # Try to recover after 60 seconds
+        # Feedback text beyond this estimated token budget is truncated before prompting
+        self.max_input_tokens = int(os.getenv("GEMINI_MAX_INPUT_TOKENS", "1000"))
+
+        # Shared HTTP client (created lazily, closed from app lifespan)
+        self.http2 = os.getenv("GEMINI_HTTP2", "true").lower() == "true"
+        self.max_connections = int(os.getenv("GEMINI_MAX_CONNECTIONS", "20"))
+        self.max_keepalive_connections = int(os.getenv("GEMINI_MAX_KEEPALIVE_CONNECTIONS", "10"))
+        self.keepalive_expiry = float(os.getenv("GEMINI_KEEPALIVE_EXPIRY_SECONDS", "60"))
+        self._client: Optional[httpx.AsyncClient] = None
+        self.streaming = os.getenv("GEMINI_STREAMING", "false").lower() == "true"
+        # Ask Gemini for schema-constrained JSON and decode it without regex cleanup
+        self.structured_output = os.getenv("GEMINI_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+        # Process-wide rate/concurrency control per model (quotas are per model)
+        self.limiters = {model: limiter_from_env() for model in self.models}
+        self.limiter = self.limiters[self.model]
+
+        # Hedging: after the model's recent p95 latency, race a second request and keep the first answer
+        self.hedge_enabled = os.getenv("GEMINI_HEDGE_ENABLED", "false").lower() == "true"
+        self.hedge_percentile = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "95"))
+        self.hedge_min_delay = float(os.getenv("GEMINI_HEDGE_MIN_DELAY_MS", "500")) / 1000
+        self.latencies = {model: LatencyTracker() for model in self.models}
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.fallbacks_used = 0
+
+        # Micro-batching: pack several pending feedbacks into one request
+        self.batch_enabled = os.getenv("GEMINI_BATCH_ENABLED", "false").lower() == "true"
+        self.batcher = MicroBatcher(
+            self._flush_batch,
+            max_size=int(os.getenv("GEMINI_BATCH_MAX_SIZE", "10")),
+            max_delay=float(os.getenv("GEMINI_BATCH_MAX_DELAY_MS", "250")) / 1000,
+            name="gemini-analysis",
+        )
+
+        # Circuit breaker per model: failures counted over a sliding window
+        self.breakers = {
+            model: CircuitBreaker(
+                f"gemini:{model}",
+                failure_threshold=int(os.getenv("GEMINI_BREAKER_FAILURE_THRESHOLD", "5")),
+                window_seconds=float(os.getenv("GEMINI_BREAKER_WINDOW_SECONDS", "60")),
+                recovery_timeout=float(os.getenv("GEMINI_BREAKER_RECOVERY_SECONDS", "60")),
+            )
+            for model in self.models
+        }
+        self.breaker = self.breakers[self.model]
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared keep-alive client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            http2 = self.http2
+            if http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    logger.warning("h2 package not installed - Gemini client falling back to HTTP/1.1")
+                    http2 = False
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                headers={"Content-Type": "application/json"},
+            )
+            logger.info(
+                "Gemini HTTP client created (http2=%s, max_connections=%s)",
+                http2,
+                self.max_connections,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Flush pending batches and close the shared HTTP client. Called on shutdown."""
+        await self.batcher.drain()
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info("Gemini HTTP client closed")
+        self._client = None
 
     async def analyze_feedback(
         self,
@@ -60,8 +237,14 @@ class GeminiService:
         doctor_name: Optional[str] = None,
         visit_date: Optional[str] = None,
         rating: Optional[int] = None,
+        on_partial: Optional[PartialCallback] = None,
     ) -> Dict[str, Any]:
-        """Analyze feedback using Gemini AI."""
+        """
+        Analyze feedback using Gemini AI.
+
+        With streaming enabled, ``on_partial(key, value)`` is awaited for each
+        top-level member of the answer as soon as it has been generated.
+        """
         if not self.api_key:
             logger.error("Gemini API key missing")
             return {"error": "Gemini API not configured. Set GOOGLE_API_KEY."}
@@ -72,61 +255,432 @@ class GeminiService:
             doctor_name=doctor_name,
             visit_date=visit_date,
             rating=rating,
+            compact=self.structured_output,
+            max_input_tokens=self.max_input_tokens,
         )
 
-        # Construct URL: base_url/models/{model}:generateContent
-        url = f"{self.base_url}/models/{self.model}:generateContent"
-        headers = {
-            "Content-Type": "application/json",
-            "x-goog-api-key": self.api_key,
-        }
-        payload = {
+        reply = await self._generate(
+            prompt,
+            on_partial=on_partial,
+            response_schema=ANALYSIS_RESPONSE_SCHEMA if self.structured_output else None,
+        )
+        if isinstance(reply, dict):
+            return reply
+        response_text = reply.text
+
+        structured = decode_structured_analysis(response_text) if self.structured_output else None
+        if structured is not None:
+            result = structured.to_dict()
+        else:
+            # Tolerant path: strip markdown fences and fill gaps with defaults
+            analysis_data = parse_json_safely(response_text)
+            if not isinstance(analysis_data, dict):
+                logger.warning("Failed to parse Gemini response: %s", response_text[:200])
+                return {"error": "Failed to parse Gemini response", "retry": self.structured_output}
+            result = self._build_result(analysis_data)
+        result["prompt_tokens"] = reply.prompt_tokens
+        result["response_tokens"] = reply.response_tokens
+        logger.info(
+            "Gemini analysis complete: sentiment=%s urgency=%s tokens=%s/%s",
+            result["sentiment"],
+            result["urgency"],
+            reply.prompt_tokens,
+            reply.response_tokens,
+        )
+        return result
+
+    async def analyze_feedback_batch(self, items: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """
+        Analyze several feedbacks with a single Gemini request.
+
+        Each item must carry ``feedback_id`` plus the ``analyze_feedback`` keyword
+        arguments. Returns a result (or per-item error) dict keyed by feedback id.
+        """
+        ids = [int(item["feedback_id"]) for item in items]
+        if not self.api_key:
+            logger.error("Gemini API key missing")
+            error = {"error": "Gemini API not configured. Set GOOGLE_API_KEY."}
+            return {feedback_id: dict(error) for feedback_id in ids}
+
+        reply = await self._generate(
+            get_batch_analysis_prompt(
+                items, compact=self.structured_output, max_input_tokens=self.max_input_tokens
+            ),
+            response_schema=BATCH_ANALYSIS_RESPONSE_SCHEMA if self.structured_output else None,
+        )
+        if isinstance(reply, dict):
+            return {feedback_id: dict(reply) for feedback_id in ids}
+        response_text = reply.text
+
+        try:
+            entries = fast_json_loads(response_text)
+        except ValueError:
+            entries = parse_json_safely(response_text)
+        if isinstance(entries, dict):
+            entries = entries.get("analyses") or entries.get("results") or [entries]
+        if not isinstance(entries, list):
+            logger.warning("Failed to parse Gemini batch response: %s", response_text[:200])
+            error = {"error": "Failed to parse Gemini batch response", "retry": True}
+            return {feedback_id: dict(error) for feedback_id in ids}
+
+        results: Dict[int, Dict[str, Any]] = {}
+        for entry in entries:
+            # Validate each entry on its own so one bad object doesn't sink the batch
+            if not isinstance(entry, dict):
+                continue
+            try:
+                feedback_id = int(entry.get("feedback_id"))
+            except (TypeError, ValueError):
+                continue
+            if feedback_id not in ids or feedback_id in results:
+                continue
+            if "sentiment" not in entry or "urgency" not in entry:
+                results[feedback_id] = {"error": "Incomplete analysis in batch response", "retry": True}
+                continue
+            try:
+                results[feedback_id] = AnalysisResult.from_structured(entry).to_dict()
+            except (KeyError, TypeError, ValueError, AttributeError):
+                pass
+            else:
+                continue
+            try:
+                results[feedback_id] = self._build_result(entry)
+            except (TypeError, ValueError) as exc:
+                results[feedback_id] = {"error": f"Invalid analysis in batch response: {exc}", "retry": True}
+
+        for feedback_id in ids:
+            results.setdefault(
+                feedback_id, {"error": "Feedback missing from batch response", "retry": True}
+            )
+        logger.info(
+            "Gemini batch analysis complete: %s/%s items valid",
+            sum(1 for result in results.values() if "error" not in result),
+            len(ids),
+        )
+        # Token usage is reported per request; attribute it evenly across the batch
+        for result in results.values():
+            if "error" not in result:
+                result["prompt_tokens"] = _share(reply.prompt_tokens, len(ids))
+                result["response_tokens"] = _share(reply.response_tokens, len(ids))
+        return results
+
+    async def analyze_feedback_batched(
+        self,
+        feedback_id: int,
+        feedback_text: str,
+        department: str,
+        doctor_name: Optional[str] = None,
+        visit_date: Optional[str] = None,
+        rating: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Queue feedback on the micro-batcher and wait for its analysis."""
+        return await self.batcher.submit(
+            {
+                "feedback_id": feedback_id,
+                "feedback_text": feedback_text,
+                "department": department,
+                "doctor_name": doctor_name,
+                "visit_date": visit_date,
+                "rating": rating,
+            }
+        )
+
+    async def _flush_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Micro-batcher flush: one batch call, then per-item fallback for malformed or missing items.
+
+        If the batch call itself failed transiently (429, 5xx, timeout) or every
+        breaker is open, the errors are returned as they are: the jobs go back to
+        the queue and its backoff instead of fanning out into per-item calls
+        against an overloaded API.
+        """
+        batch_results: Dict[int, Dict[str, Any]] = {}
+        if len(items) > 1:
+            batch_results = await self.analyze_feedback_batch(items)
+            if any(_unavailable(result) for result in batch_results.values()):
+                return [batch_results[int(item["feedback_id"])] for item in items]
+
+        async def resolve(item: Dict[str, Any]) -> Dict[str, Any]:
+            result = batch_results.get(int(item["feedback_id"]))
+            if result is not None and "error" not in result:
+                return result
+            kwargs = {key: value for key, value in item.items() if key != "feedback_id"}
+            return await self.analyze_feedback_with_retry(**kwargs)
+
+        return list(await asyncio.gather(*(resolve(item) for item in items)))
+
+    async def _generate(
+        self,
+        prompt: str,
+        on_partial: Optional[PartialCallback] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+    ) -> Union[GeminiReply, Dict[str, Any]]:
+        """
+        Route a prompt across the primary and fallback models.
+
+        Models whose breaker is open are skipped; a transient failure (429,
+        5xx, timeout) moves on to the next model. Returns the reply (text +
+        token usage) or the last error dict.
+        """
+        payload: Dict[str, Any] = {
             "contents": [{"parts": [{"text": prompt}]}],
             "safetySettings": [],
         }
+        if response_schema is not None:
+            payload["generationConfig"] = {
+                "responseMimeType": "application/json",
+                "responseSchema": response_schema,
+            }
+
+        result: Union[GeminiReply, Dict[str, Any]] = dict(BREAKER_OPEN_ERROR)
+        tried: List[str] = []
+        with self._request_scope() as scope:
+            for model in self.models:
+                if model in tried or not scope.admit(model):
+                    continue
+                if model != self.model:
+                    self.fallbacks_used += 1
+                    logger.warning("Routing Gemini request to fallback model %s", model)
+                result = await self._call_hedged(model, scope, payload, on_partial, tried)
+                if not isinstance(result, dict) or not result.get("transient"):
+                    return result
+        return result
 
+    @contextmanager
+    def _request_scope(self) -> Iterator[_BreakerScope]:
+        """Join the logical request in progress, or start one settled on exit."""
+        scope = _breaker_scope.get()
+        if scope is not None and not scope.settled:
+            yield scope
+            return
+        scope = _BreakerScope(self.breakers)
+        token = _breaker_scope.set(scope)
         try:
-            logger.debug("Calling Gemini API: %s (model: %s)", url, self.model)
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(url, headers=headers, json=payload)
-                response.raise_for_status()
-                data = response.json()
-        except httpx.HTTPStatusError as exc:
-            status = exc.response.status_code
-            error_text = exc.response.text[:500] if exc.response.text else "No error text"
-            logger.error(
-                "Gemini HTTP error %s for URL %s: %s",
-                status,
-                url,
-                error_text
+            yield scope
+        finally:
+            _breaker_scope.reset(token)
+            scope.settle()
+
+    async def _call_hedged(
+        self,
+        model: str,
+        scope: _BreakerScope,
+        payload: Dict[str, Any],
+        on_partial: Optional[PartialCallback],
+        tried: List[str],
+    ) -> Union[GeminiReply, Dict[str, Any]]:
+        """Call ``model`` (breaker already admitted); hedge if it outlives the p95 delay."""
+        tried.append(model)
+        delay = self._hedge_delay(model)
+        if delay is None:
+            return await self._call_model(model, scope, payload, on_partial)
+
+        admitted = asyncio.Event()
+        primary = asyncio.create_task(self._call_model(model, scope, payload, on_partial, admitted=admitted))
+        pending = {primary}
+        hedge: Optional[asyncio.Task] = None
+        try:
+            # The delay measures time on the wire, not time queued behind the limiter
+            admission = asyncio.create_task(admitted.wait())
+            try:
+                await asyncio.wait({primary, admission}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                admission.cancel()
+            if not primary.done():
+                await asyncio.wait(pending, timeout=delay)
+            if primary.done():
+                return primary.result()
+            hedge_model = self._admit_hedge_model(model, scope, tried)
+            if hedge_model is None:
+                return await primary
+            self.hedges_sent += 1
+            logger.info("Gemini %s slower than %.0fms - hedging to %s", model, delay * 1000, hedge_model)
+            # The hedge is not streamed so partial callbacks fire only once
+            hedge_started = asyncio.Event()
+            hedge = asyncio.create_task(
+                self._call_model(hedge_model, scope, payload, None, admitted=hedge_started, preacquired=True)
             )
-            if status == 429:
-                retry_after = int(exc.response.headers.get("Retry-After", "60"))
-                return {"error": "Gemini rate limit exceeded", "retry_after": retry_after}
-            return {"error": f"Gemini API error ({status})", "retry": status >= 500}
-        except httpx.TimeoutException:
-            logger.error("Gemini request timed out after %s seconds", self.timeout)
-            return {"error": "Gemini API timeout", "retry": True}
-        except Exception as exc:  # pragma: no cover
-            logger.exception("Unexpected Gemini error: %s", exc)
-            return {"error": "Unexpected Gemini error", "retry": True}
-
-        response_text = self._extract_text(data)
-        if not response_text:
-            return {"error": "No analysis returned from Gemini"}
-
-        analysis_data = parse_json_safely(response_text)
-        if not analysis_data:
-            logger.warning("Failed to parse Gemini response: %s", response_text[:200])
-            return {"error": "Failed to parse Gemini response", "retry": False}
+            pending.add(hedge)
+            first_error: Optional[Dict[str, Any]] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if not isinstance(result, dict):
+                        if task is hedge:
+                            self.hedges_won += 1
+                        return result
+                    first_error = first_error or result
+            return first_error or {"error": "Unknown error"}
+        finally:
+            # Cancel the losing (or abandoned) leg and let it release its limiter slot
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            if hedge is not None and not hedge_started.is_set():
+                # Cancelled before it ran: return the slot it was handed
+                await self.limiters[hedge_model].release(OUTCOME_CANCELLED)
+
+    def _hedge_delay(self, model: str) -> Optional[float]:
+        if not self.hedge_enabled:
+            return None
+        observed = self.latencies[model].percentile(self.hedge_percentile)
+        delay = max(self.hedge_min_delay, observed or 0.0)
+        # A hedge fired after the timeout would never help
+        return delay if delay < self.timeout else None
+
+    def _admit_hedge_model(self, model: str, scope: _BreakerScope, tried: List[str]) -> Optional[str]:
+        """
+        Pick the hedge target: the next admitted fallback model, else the same model.
+
+        A hedge only uses a free limiter slot, never queues for one: when the
+        target is saturated, a duplicate request would only add load. The slot
+        is taken here and handed to the hedge call.
+        """
+        for candidate in self.models:
+            if candidate in tried or not self.limiters[candidate].has_capacity():
+                continue
+            if scope.admit(candidate) and self.limiters[candidate].try_acquire():
+                tried.append(candidate)
+                return candidate
+        # Never double up on a half-open model: its single probe is already in flight
+        if (
+            self.breakers[model].state == CircuitBreakerState.CLOSED
+            and self.limiters[model].has_capacity()
+            and scope.admit(model)
+            and self.limiters[model].try_acquire()
+        ):
+            return model
+        return None
+
+    async def _call_model(
+        self,
+        model: str,
+        scope: _BreakerScope,
+        payload: Dict[str, Any],
+        on_partial: Optional[PartialCallback] = None,
+        admitted: Optional[asyncio.Event] = None,
+        preacquired: bool = False,
+    ) -> Union[GeminiReply, Dict[str, Any]]:
+        """
+        One request to one model. Releases its limiter slot and records the outcome in ``scope``.
+
+        ``admitted`` is set once the limiter lets the request through;
+        ``preacquired`` means the caller already holds the slot.
+        """
+        stream = self.streaming and on_partial is not None
+        # Construct URL: base_url/models/{model}:generateContent (or :streamGenerateContent)
+        if stream:
+            url = f"{self.base_url}/models/{model}:streamGenerateContent?alt=sse"
+        else:
+            url = f"{self.base_url}/models/{model}:generateContent"
+        headers = {"x-goog-api-key": self.api_key}
+        limiter = self.limiters[model]
+        result: Optional[Union[GeminiReply, Dict[str, Any]]] = None
+
+        try:
+            if not preacquired:
+                await limiter.acquire()
+            if admitted is not None:
+                admitted.set()
+            outcome, retry_after = OUTCOME_CANCELLED, None
+            started = time.monotonic()
+            try:
+                logger.debug("Calling Gemini API: %s (model: %s)", url, model)
+                client = self._get_client()
+                if stream:
+                    reply = await self._post_stream(client, url, headers, payload, on_partial)
+                else:
+                    response = await client.post(url, headers=headers, json=payload)
+                    response.raise_for_status()
+                    data = fast_json_loads(response.content)
+                    reply = GeminiReply(self._extract_text(data), *self._extract_usage(data))
+                outcome = OUTCOME_SUCCESS
+                self.latencies[model].observe(time.monotonic() - started)
+            except httpx.HTTPStatusError as exc:
+                status = exc.response.status_code
+                error_text = exc.response.text[:500] if exc.response.text else "No error text"
+                logger.error(
+                    "Gemini HTTP error %s for URL %s: %s",
+                    status,
+                    url,
+                    error_text
+                )
+                if status == 429:
+                    retry_after = _parse_retry_after(exc.response.headers.get("Retry-After"))
+                    outcome = OUTCOME_OVERLOAD
+                    result = {"error": "Gemini rate limit exceeded", "retry_after": retry_after, "transient": True}
+                    return result
+                outcome = OUTCOME_OVERLOAD if status >= 500 else OUTCOME_ERROR
+                result = {"error": f"Gemini API error ({status})", "retry": status >= 500, "transient": status >= 500}
+                return result
+            except httpx.TimeoutException:
+                logger.error("Gemini request timed out after %s seconds", self.timeout)
+                outcome = OUTCOME_OVERLOAD
+                result = {"error": "Gemini API timeout", "retry": True, "transient": True}
+                return result
+            except Exception as exc:  # pragma: no cover
+                logger.exception("Unexpected Gemini error: %s", exc)
+                outcome = OUTCOME_ERROR
+                result = {"error": "Unexpected Gemini error", "retry": True, "transient": True}
+                return result
+            finally:
+                await limiter.release(outcome, retry_after=retry_after)
 
+            result = reply if reply.text else {"error": "No analysis returned from Gemini"}
+            return result
+        finally:
+            # Cancelled calls leave result as None; the breaker is settled once per logical request
+            scope.record(model, result)
+
+    async def _post_stream(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        headers: Dict[str, str],
+        payload: Dict[str, Any],
+        on_partial: PartialCallback,
+    ) -> GeminiReply:
+        """Consume an SSE streamGenerateContent response, reporting members as they complete."""
+        parser = TopLevelMemberParser()
+        usage: Tuple[Optional[int], Optional[int]] = (None, None)
+        async with client.stream("POST", url, headers=headers, json=payload) as response:
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                try:
+                    chunk = fast_json_loads(line[5:])
+                except ValueError:
+                    continue
+                if chunk.get("usageMetadata"):
+                    usage = self._extract_usage(chunk)
+                fragment = self._extract_text(chunk)
+                if not fragment:
+                    continue
+                for key, value in parser.feed(fragment):
+                    try:
+                        await on_partial(key, value)
+                    except Exception:
+                        logger.exception("Partial analysis callback failed for %s", key)
+        return GeminiReply(parser.text or None, *usage)
+
+    @staticmethod
+    def _build_result(analysis_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalize a parsed Gemini analysis object into the flat result dict."""
         result = {
             "sentiment": analysis_data.get("sentiment", "neutral"),
             "confidence_score": float(analysis_data.get("confidence_score", 0.5)),
-            "emotions": analysis_data.get("emotions", []),
+            # Stored tags back the flag=/emotion= filters, so keep them to the fixed vocabularies
+            "emotions": normalize_tags(analysis_data.get("emotions"), EMOTION_TYPES),
             "urgency": extract_urgency_level(analysis_data.get("urgency", {})),
             "urgency_reason": extract_urgency_reason(analysis_data.get("urgency", {})),
-            "urgency_flags": extract_urgency_flags(analysis_data.get("urgency", {})),
+            "urgency_flags": normalize_tags(
+                extract_urgency_flags(analysis_data.get("urgency", {})), URGENCY_FLAGS
+            ),
             "primary_category": None,
             "subcategories": [],
             "medical_concerns": None,
@@ -140,45 +694,39 @@ class GeminiService:
         result["medical_concerns"] = extract_medical_concerns(
             analysis_data.get("medical_concerns", {})
         )
+        return result
 
-        logger.info(
-            "Gemini analysis complete: sentiment=%s urgency=%s",
-            result["sentiment"],
-            result["urgency"],
+    def is_available(self) -> bool:
+        """False while every model's breaker is open (calls would be rejected outright)."""
+        now = time.monotonic()
+        return any(
+            breaker.state != CircuitBreakerState.OPEN or now >= breaker.open_until
+            for breaker in self.breakers.values()
         )
-        return result
 
-    def _check_circuit_breaker(self) -> Optional[Dict[str, Any]]:
-        """Check if circuit breaker is open. Return error if open."""
-        if self.circuit_state == CircuitBreakerState.OPEN:
-            # Check if recovery timeout has passed
-            if time.time() > self.circuit_open_until:
-                logger.info("Circuit breaker entering half-open state (attempting recovery)")
-                self.circuit_state = CircuitBreakerState.HALF_OPEN
-                return None  # Allow one request through
-            else:
-                return {
-                    "error": "Gemini API circuit breaker is open (too many failures)",
-                    "retry": False
+    def routing_stats(self) -> Dict[str, Any]:
+        """Per-model breaker, limiter and latency state plus hedging counters."""
+        return {
+            "primary_model": self.model,
+            "models": {
+                model: {
+                    "circuit_breaker": self.breakers[model].snapshot(),
+                    "limiter": self.limiters[model].stats(),
+                    "latency": self.latencies[model].stats(),
                 }
-        return None
-
-    def _record_success(self) -> None:
-        """Record a successful API call. Close circuit if half-open."""
-        if self.circuit_state == CircuitBreakerState.HALF_OPEN:
-            logger.info("Circuit breaker closed (service recovered)")
-            self.circuit_state = CircuitBreakerState.CLOSED
-        self.failure_count = 0
-
-    def _record_failure(self) -> None:
-        """Record a failed API call. Open circuit if too many failures."""
-        self.failure_count += 1
-        logger.warning(f"Gemini API failure #{self.failure_count}/{self.max_failures_before_open}")
-        
-        if self.failure_count >= self.max_failures_before_open:
-            logger.error("Circuit breaker opened: too many Gemini API failures")
-            self.circuit_state = CircuitBreakerState.OPEN
-            self.circuit_open_until = time.time() + self.circuit_recovery_timeout
+                for model in self.models
+            },
+            "hedging": {
+                "enabled": self.hedge_enabled,
+                "percentile": self.hedge_percentile,
+                "current_delay_ms": (
+                    round(delay * 1000, 1) if (delay := self._hedge_delay(self.model)) is not None else None
+                ),
+                "hedges_sent": self.hedges_sent,
+                "hedges_won": self.hedges_won,
+            },
+            "fallbacks_used": self.fallbacks_used,
+        }
 
     async def analyze_feedback_with_retry(
         self,
@@ -188,15 +736,31 @@ class GeminiService:
         visit_date: Optional[str] = None,
         rating: Optional[int] = None,
         max_retries: int = 3,
+        on_partial: Optional[PartialCallback] = None,
     ) -> Dict[str, Any]:
-        """Analyze feedback with exponential backoff retries and circuit breaker."""
-        
-        # Check circuit breaker status
-        breaker_error = self._check_circuit_breaker()
-        if breaker_error:
-            return breaker_error
-        
-        last_result: Dict[str, Any] = {"error": "Unknown error"}
+        """
+        Analyze feedback with exponential backoff retries; routing handles breakers and fallbacks.
+
+        All attempts form one logical request: each model's breaker is settled
+        once at the end (success if any attempt on it succeeded, failure only
+        if it ended on a transient error).
+        """
+        with self._request_scope():
+            return await self._analyze_with_retry(
+                feedback_text, department, doctor_name, visit_date, rating, max_retries, on_partial
+            )
+
+    async def _analyze_with_retry(
+        self,
+        feedback_text: str,
+        department: str,
+        doctor_name: Optional[str],
+        visit_date: Optional[str],
+        rating: Optional[int],
+        max_retries: int,
+        on_partial: Optional[PartialCallback],
+    ) -> Dict[str, Any]:
+        last_result: Optional[Dict[str, Any]] = None
         for attempt in range(max_retries):
             result = await self.analyze_feedback(
                 feedback_text=feedback_text,
@@ -204,24 +768,36 @@ class GeminiService:
                 doctor_name=doctor_name,
                 visit_date=visit_date,
                 rating=rating,
+                on_partial=on_partial,
             )
-            
+            last_result = result
+
             if "error" not in result:
-                self._record_success()
                 return result
-            
-            last_result = result
-            self._record_failure()
-            
+
             if not result.get("retry", False) and "retry_after" not in result:
                 return result
-            
+
+            if attempt + 1 >= max_retries:
+                break
+
+            if "retry_after" in result:
+                # The limiter holds every caller until the shared Retry-After deadline passes
+                logger.info(f"Gemini retry attempt {attempt + 1}/{max_retries} after shared rate-limit deadline")
+                continue
+
             # Exponential backoff: 1s, 2s, 4s, etc.
-            wait_time = result.get("retry_after") or min(2 ** attempt, 30)
+            wait_time = min(2 ** attempt, 30)
             logger.info(f"Gemini retry attempt {attempt + 1}/{max_retries}, waiting {wait_time}s")
             await asyncio.sleep(wait_time)
-        
-        return last_result
+
+        return last_result or {"error": "Unknown error"}
+
+    @staticmethod
+    def _extract_usage(response: Dict[str, Any]) -> Tuple[Optional[int], Optional[int]]:
+        """Prompt and response token counts from usageMetadata, if present."""
+        usage = response.get("usageMetadata") or {}
+        return usage.get("promptTokenCount"), usage.get("candidatesTokenCount")
 
     @staticmethod
     def _extract_text(response: Dict[str, Any]) -> Optional[str]:
@@ -0,0 +1,156 @@
+"""
+Idempotency-Key support for feedback submission.
+
+Kiosks on flaky networks retry ``POST /feedback``. A client-chosen
+``Idempotency-Key`` is reserved before the insert; a retry carrying the same
+key within ``IDEMPOTENCY_TTL_SECONDS`` gets the original response replayed
+without touching the insert or analysis path. Completed responses are served
+from an in-process LRU first, then the ``idempotency_keys`` table, so replays
+work across workers and restarts.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.logging_config import get_logger
+from app.models.idempotency_key import IdempotencyKey
+from app.utils.cache import TTLCache
+
+logger = get_logger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    request_hash: str
+    # None while the original request is still in flight
+    status_code: Optional[int]
+    body: Any
+
+
+def request_fingerprint(payload: Dict[str, Any]) -> str:
+    """Stable hash of a request body, so a reused key with a different body can be refused."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """Reserve-then-complete store of responses keyed by Idempotency-Key."""
+
+    def __init__(self) -> None:
+        self.ttl_seconds = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+        # An unfinished reservation older than this is assumed abandoned (crashed worker)
+        self.pending_timeout = int(os.getenv("IDEMPOTENCY_PENDING_TIMEOUT_SECONDS", "60"))
+        self._memory: TTLCache[StoredResponse] = TTLCache(
+            max_size=int(os.getenv("IDEMPOTENCY_CACHE_MAX_ENTRIES", "4096")),
+            ttl=self.ttl_seconds,
+        )
+        self.replays = 0
+        self.reservations = 0
+
+    def _cutoff(self) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+
+    async def reserve(self, db: AsyncSession, key: str, request_hash: str) -> Optional[StoredResponse]:
+        """
+        Claim ``key`` for a new request and commit the claim.
+
+        Returns None when the caller now owns the key and should process the
+        request, otherwise the existing entry (completed or still in flight).
+        Expired entries and abandoned reservations are taken over as if they
+        did not exist.
+        """
+        cached = self._memory.get(key)
+        if cached is not None:
+            self.replays += 1
+            return cached
+
+        stmt = pg_insert(IdempotencyKey).values(key=key, request_hash=request_hash)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.key],
+            set_={
+                "request_hash": stmt.excluded.request_hash,
+                "status_code": None,
+                "response": None,
+                "created_at": datetime.now(timezone.utc),
+            },
+            where=or_(
+                IdempotencyKey.created_at < self._cutoff(),
+                and_(
+                    IdempotencyKey.status_code.is_(None),
+                    IdempotencyKey.created_at
+                    < datetime.now(timezone.utc) - timedelta(seconds=self.pending_timeout),
+                ),
+            ),
+        ).returning(IdempotencyKey.key)
+        claimed = (await db.execute(stmt)).scalar_one_or_none()
+        await db.commit()
+        if claimed is not None:
+            self.reservations += 1
+            return None
+
+        result = await db.execute(
+            select(IdempotencyKey.request_hash, IdempotencyKey.status_code, IdempotencyKey.response).where(
+                IdempotencyKey.key == key
+            )
+        )
+        row = result.one()
+        stored = StoredResponse(row.request_hash, row.status_code, row.response)
+        if stored.status_code is not None:
+            self.replays += 1
+            self._memory.set(key, stored)
+        return stored
+
+    async def complete(
+        self, db: AsyncSession, key: str, request_hash: str, status_code: int, body: Any
+    ) -> None:
+        """Record the response for a reserved key so retries replay it."""
+        await db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(status_code=status_code, response=body)
+        )
+        await db.commit()
+        self._memory.set(key, StoredResponse(request_hash, status_code, body))
+
+    async def release(self, db: AsyncSession, key: str) -> None:
+        """Drop a reservation whose request failed, so the client may retry it."""
+        try:
+            await db.rollback()
+            await db.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)
+                )
+            )
+            await db.commit()
+        except Exception as exc:
+            # The reservation then simply expires with the TTL
+            logger.warning("Could not release idempotency key %s: %s", key, exc)
+
+    async def purge_expired(self, db: AsyncSession) -> int:
+        result = await db.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.created_at < self._cutoff())
+        )
+        await db.commit()
+        return result.rowcount or 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "memory_entries": len(self._memory),
+            "reservations": self.reservations,
+            "replays": self.replays,
+        }
+
+
+idempotency_store = IdempotencyStore()
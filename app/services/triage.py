@@ -0,0 +1,196 @@
+"""
+Local pre-triage of incoming feedback.
+
+A single precompiled regular expression (one named alternation group per
+urgency flag from the analysis prompt) scans the text in one pass. Combined
+with the rating it yields a provisional urgency in microseconds, so critical
+cases can be alerted on before the Gemini analysis lands. A hit preceded by a
+negation within a few words ("no severe pain", "never felt unsafe") is ignored. The LLM result later
+confirms or retracts the provisional alert.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+# Phrases per urgency flag (same flag names the Gemini prompt asks for)
+FLAG_PHRASES: Dict[str, Tuple[str, ...]] = {
+    "severe_pain": (
+        "severe pain",
+        "extreme pain",
+        "unbearable pain",
+        "excruciating",
+        "agonizing",
+        "agony",
+        "worst pain",
+        "screaming in pain",
+        "crying in pain",
+        "pain was unbearable",
+        "pain is unbearable",
+        "could not bear the pain",
+        "couldn't bear the pain",
+    ),
+    "medical_complications": (
+        "complication",
+        "complications",
+        "infection",
+        "infected",
+        "sepsis",
+        "bleeding heavily",
+        "heavy bleeding",
+        "internal bleeding",
+        "allergic reaction",
+        "anaphylaxis",
+        "wrong medication",
+        "wrong medicine",
+        "wrong dose",
+        "overdose",
+        "misdiagnosed",
+        "misdiagnosis",
+        "surgical error",
+        "wrong surgery",
+        "readmitted",
+        "collapsed",
+        "unconscious",
+        "stopped breathing",
+        "chest pain",
+        "seizure",
+        "stroke",
+        "heart attack",
+    ),
+    "safety_concerns": (
+        "unsafe",
+        "dangerous",
+        "negligence",
+        "negligent",
+        "fell from",
+        "fell out of",
+        "left unattended",
+        "unsterile",
+        "not sterile",
+        "dirty needle",
+        "reused needle",
+        "contaminated",
+        "fire hazard",
+        "no one came",
+        "nobody came",
+        "ignored for hours",
+        "died",
+        "death",
+        "suicide",
+        "self harm",
+        "self-harm",
+    ),
+    "harassment": (
+        "harassment",
+        "harassed",
+        "sexual",
+        "inappropriately touched",
+        "touched me inappropriately",
+        "groped",
+        "assaulted",
+        "assault",
+        "abused",
+        "abuse",
+        "threatened",
+        "racist",
+        "racial slur",
+        "discriminated",
+        "discrimination",
+        "verbally abused",
+    ),
+}
+
+
+# Most urgent first
+LEVELS = ("critical", "high", "medium", "low")
+
+# Flags that are critical on their own unless the rating is good
+CRITICAL_FLAGS = frozenset({"severe_pain", "safety_concerns", "harassment"})
+
+NEGATIONS = frozenset({"no", "not", "never", "without", "none", "nor", "denied", "denies", "nothing"})
+# How many words before a hit are checked for a negation
+NEGATION_WINDOW = 3
+_WORD = re.compile(r"[a-z']+")
+_CLAUSE_BREAK = re.compile(r"[.!?;:]")
+
+
+def _negated(text: str, start: int) -> bool:
+    """Whether the words just before ``start`` (same clause) negate the hit."""
+    before = text[max(0, start - 60):start]
+    before = _CLAUSE_BREAK.split(before)[-1]
+    words = _WORD.findall(before)[-NEGATION_WINDOW:]
+    return any(word in NEGATIONS or word.endswith("n't") for word in words)
+
+
+def _compile(flag_phrases: Dict[str, Tuple[str, ...]]) -> "re.Pattern[str]":
+    groups = []
+    for flag, phrases in flag_phrases.items():
+        # Longest first so the alternation prefers the most specific phrase
+        alternatives = "|".join(
+            re.escape(phrase).replace(r"\ ", r"\s+")
+            for phrase in sorted(phrases, key=len, reverse=True)
+        )
+        groups.append(f"(?P<{flag}>{alternatives})")
+    # Phrases are lowercase and the text is lowered before matching, which is
+    # several times faster than re.IGNORECASE over this many alternatives
+    return re.compile(r"\b(?:" + "|".join(groups) + r")\b")
+
+
+_FLAG_PATTERN = _compile(FLAG_PHRASES)
+
+
+@dataclass(frozen=True)
+class TriageResult:
+    level: str
+    flags: Tuple[str, ...]
+    matches: Tuple[str, ...]
+    score: float
+
+    @property
+    def is_critical(self) -> bool:
+        return self.level == "critical"
+
+    def is_more_urgent_than(self, other: "TriageResult") -> bool:
+        """Higher level, or a flag ``other`` did not raise."""
+        return LEVELS.index(self.level) < LEVELS.index(other.level) or not set(self.flags) <= set(other.flags)
+
+    @property
+    def reason(self) -> str:
+        if not self.matches:
+            return "No urgency indicators detected"
+        return "Pre-triage matched: " + ", ".join(self.matches[:5])
+
+
+def triage_feedback(feedback_text: str, rating: Optional[int] = None) -> TriageResult:
+    """Score feedback locally and return a provisional urgency level."""
+    flags: Dict[str, None] = {}
+    matches: Dict[str, None] = {}
+    text = (feedback_text or "").lower()
+    for match in _FLAG_PATTERN.finditer(text):
+        if _negated(text, match.start()):
+            continue
+        flags[match.lastgroup] = None
+        matches[" ".join(match.group(0).split())] = None
+
+    score = float(len(flags))
+    if rating is not None:
+        if rating <= 1:
+            score += 1.0
+        elif rating <= 2:
+            score += 0.5
+        elif rating >= 4:
+            score -= 0.5
+
+    if CRITICAL_FLAGS.intersection(flags) and (rating is None or rating < 4):
+        level = "critical"
+    elif flags and score >= 1.5:
+        level = "critical"
+    elif flags:
+        level = "high"
+    elif rating is not None and rating <= 2:
+        level = "medium"
+    else:
+        level = "low"
+    return TriageResult(level=level, flags=tuple(flags), matches=tuple(matches), score=score)
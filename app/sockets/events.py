@@ -3,7 +3,7 @@ Socket.IO event handlers for real-time alerts.
 """
 from __future__ import annotations
 
-from typing import Dict
+from typing import Dict, List, Optional
 
 import socketio
 from jose import JWTError, jwt
@@ -12,6 +12,7 @@ from app.logging_config import get_logger
 from app.models.analysis import Analysis
 from app.models.feedback import Feedback
 from app.services.auth_service import get_secret_key
+from app.services.triage import TriageResult
 
 logger = get_logger(__name__)
 
@@ -100,25 +101,103 @@ async def emit_new_feedback(feedback: Feedback):
     logger.debug("Emitted new_feedback for %s", feedback.id)
 
 
-async def emit_urgent_alert(feedback: Feedback, analysis: Analysis):
-    alert_data = {
+async def emit_bulk_feedback(count: int, departments: List[str]):
+    """One summary event for a bulk import instead of a new_feedback event per row."""
+    await sio.emit(
+        "bulk_feedback",
+        {"count": count, "departments": sorted(set(departments))},
+        room=STAFF_ROOM,
+    )
+    logger.debug("Emitted bulk_feedback for %s rows", count)
+
+
+async def emit_import_progress(progress: Dict):
+    await sio.emit("import_progress", progress, room=STAFF_ROOM)
+
+
+def _urgent_alert_payload(
+    feedback: Feedback,
+    urgency: str,
+    urgency_reason: Optional[str],
+    urgency_flags: Optional[List[str]],
+    sentiment: Optional[str] = None,
+    primary_category: Optional[str] = None,
+    provisional: bool = False,
+) -> Dict:
+    return {
         "feedback_id": feedback.id,
         "patient_name": feedback.patient_name,
         "department": feedback.department,
-        "urgency": analysis.urgency,
-        "urgency_reason": analysis.urgency_reason,
-        "urgency_flags": analysis.urgency_flags,
-        "sentiment": analysis.sentiment,
-        "primary_category": analysis.primary_category,
+        "urgency": urgency,
+        "urgency_reason": urgency_reason,
+        "urgency_flags": urgency_flags,
+        "sentiment": sentiment,
+        "primary_category": primary_category,
         "feedback_preview": feedback.feedback_text[:200] + "..."
         if len(feedback.feedback_text) > 200
         else feedback.feedback_text,
         "created_at": feedback.created_at.isoformat() if feedback.created_at else None,
+        "provisional": provisional,
     }
+
+
+async def emit_urgent_alert(feedback: Feedback, analysis: Analysis):
+    alert_data = _urgent_alert_payload(
+        feedback,
+        analysis.urgency,
+        analysis.urgency_reason,
+        analysis.urgency_flags,
+        sentiment=analysis.sentiment,
+        primary_category=analysis.primary_category,
+    )
     await sio.emit("urgent_alert", alert_data, room=STAFF_ROOM)
     logger.warning("Emitted urgent alert for feedback %s", feedback.id)
 
 
+async def emit_provisional_urgent_alert(feedback: Feedback, triage: TriageResult):
+    """Alert staff from local pre-triage, before the AI analysis is available."""
+    alert_data = _urgent_alert_payload(
+        feedback, triage.level, triage.reason, list(triage.flags), provisional=True
+    )
+    await sio.emit("urgent_alert", alert_data, room=STAFF_ROOM)
+    logger.warning("Emitted provisional urgent alert for feedback %s", feedback.id)
+
+
+async def emit_streamed_urgency(feedback: Feedback, urgency: str, reason: Optional[str], flags: List[str]):
+    """
+    Publish the AI urgency as soon as it streams in; alert immediately if critical.
+
+    The alert is provisional until the analysis is saved, which confirms or retracts it.
+    """
+    await sio.emit(
+        "analysis_partial",
+        {"feedback_id": feedback.id, "urgency": urgency, "urgency_reason": reason, "urgency_flags": flags},
+        room=STAFF_ROOM,
+    )
+    if urgency == "critical":
+        await sio.emit(
+            "urgent_alert",
+            _urgent_alert_payload(feedback, urgency, reason, flags, provisional=True),
+            room=STAFF_ROOM,
+        )
+        logger.warning("Emitted streamed urgent alert for feedback %s", feedback.id)
+
+
+async def emit_urgent_alert_retracted(feedback_id: int, analysis: Optional[Analysis]):
+    """Tell staff a provisional alert was not confirmed; ``analysis`` is None when the analysis failed."""
+    await sio.emit(
+        "urgent_alert_retracted",
+        {
+            "feedback_id": feedback_id,
+            "urgency": analysis.urgency if analysis else None,
+            "urgency_reason": analysis.urgency_reason if analysis else None,
+            "analysis_failed": analysis is None,
+        },
+        room=STAFF_ROOM,
+    )
+    logger.info("Retracted provisional urgent alert for feedback %s", feedback_id)
+
+
 async def emit_analysis_complete(feedback_id: int, analysis: Analysis):
     analysis_data = {
         "feedback_id": feedback_id,
@@ -0,0 +1,79 @@
+"""
+Typed analysis result decoded from Gemini structured output.
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from app.utils.constants import EMOTION_TYPES, URGENCY_FLAGS
+from app.utils.helpers import normalize_tags
+
+try:  # orjson is several times faster than the stdlib decoder
+    import orjson
+
+    _loads = orjson.loads
+    _DecodeError = orjson.JSONDecodeError
+except ImportError:  # pragma: no cover - optional dependency
+    import json
+
+    _loads = json.loads
+    _DecodeError = json.JSONDecodeError
+
+MEDICAL_CONCERN_KEYS = ("symptoms", "complications", "treatment_side_effects", "medication_issues")
+
+
+@dataclass(slots=True)
+class AnalysisResult:
+    sentiment: str
+    confidence_score: float
+    emotions: List[str]
+    urgency: str
+    urgency_reason: Optional[str]
+    urgency_flags: List[str]
+    primary_category: Optional[str]
+    subcategories: List[str]
+    medical_concerns: Optional[Dict[str, List[str]]]
+    actionable_insights: str
+    key_points: List[str]
+
+    @classmethod
+    def from_structured(cls, data: Dict[str, Any]) -> "AnalysisResult":
+        """Build from a schema-conforming object. Raises on shape mismatch."""
+        urgency = data["urgency"]
+        categories = data.get("categories") or {}
+        concerns = data.get("medical_concerns")
+        return cls(
+            sentiment=data["sentiment"],
+            confidence_score=float(data["confidence_score"]),
+            emotions=normalize_tags(list(data.get("emotions") or ()), EMOTION_TYPES),
+            urgency=urgency["level"],
+            urgency_reason=urgency.get("reason"),
+            urgency_flags=normalize_tags(list(urgency.get("flags") or ()), URGENCY_FLAGS),
+            primary_category=categories.get("primary"),
+            subcategories=list(categories.get("subcategories") or ()),
+            medical_concerns={key: list(concerns.get(key) or ()) for key in MEDICAL_CONCERN_KEYS}
+            if isinstance(concerns, dict)
+            else None,
+            actionable_insights=data.get("actionable_insights") or "",
+            key_points=list(data.get("key_points") or ()),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def loads(text: str) -> Any:
+    """Decode JSON with the fastest available library. Raises ValueError on bad input."""
+    return _loads(text)
+
+
+def decode_structured_analysis(text: str) -> Optional[AnalysisResult]:
+    """Decode structured output straight into an AnalysisResult, or None if it doesn't conform."""
+    try:
+        data = _loads(text)
+        if not isinstance(data, dict):
+            return None
+        return AnalysisResult.from_structured(data)
+    except (_DecodeError, ValueError, KeyError, TypeError, AttributeError):
+        return None
@@ -0,0 +1,83 @@
+"""
+Generic asyncio micro-batcher.
+
+Callers submit single items and await their own result; items are collected
+until ``max_size`` is reached or ``max_delay`` seconds pass, then flushed
+together through one call to the batch function.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Generic, List, Optional, Set, Tuple, TypeVar
+
+from app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """Collect items for a short window and flush them as one batch."""
+
+    def __init__(
+        self,
+        flush: Callable[[List[T]], Awaitable[List[R]]],
+        max_size: int = 10,
+        max_delay: float = 0.25,
+        name: str = "batcher",
+    ) -> None:
+        self._flush_fn = flush
+        self.max_size = max(1, max_size)
+        self.max_delay = max(0.0, max_delay)
+        self.name = name
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, item: T) -> R:
+        """Add an item to the current batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush_now)
+        return await future
+
+    def _flush_now(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        logger.debug("%s flushing %s item(s)", self.name, len(batch))
+        try:
+            results = await self._flush_fn([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"{self.name} flush returned {len(results)} results for {len(batch)} items"
+                )
+        except Exception as exc:
+            logger.exception("%s flush failed for %s item(s)", self.name, len(batch))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def drain(self) -> None:
+        """Flush anything pending and wait for in-flight batches to finish."""
+        self._flush_now()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -41,3 +41,20 @@ SENTIMENT_TYPES = [
     "mixed",
 ]
 
+
+# Urgency flags the analysis may raise
+URGENCY_FLAGS = [
+    "medical_complications",
+    "severe_pain",
+    "safety_concerns",
+    "harassment",
+]
+
+# Emotions the analysis may report
+EMOTION_TYPES = [
+    "angry",
+    "grateful",
+    "worried",
+    "frustrated",
+    "satisfied",
+]
@@ -0,0 +1,28 @@
+"""
+Content hash identifying an analysis request, used as the analysis cache key.
+"""
+from __future__ import annotations
+
+import hashlib
+import unicodedata
+from typing import Optional
+
+from app.utils.prompts import PROMPT_VERSION
+
+
+def normalize_feedback_text(text: str) -> str:
+    """Canonical form used for hashing: NFC, single spaces, trimmed."""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def compute_content_hash(feedback_text: str, department: str, rating: Optional[int]) -> str:
+    """Hash of the inputs that determine an analysis, including the prompt version."""
+    key = "\x1f".join(
+        (
+            PROMPT_VERSION,
+            (department or "").strip().lower(),
+            str(rating or ""),
+            normalize_feedback_text(feedback_text),
+        )
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
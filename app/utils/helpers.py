@@ -3,9 +3,14 @@ Helper functions for validation, formatting, and error handling
 """
 from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
+import html
 import json
 import re
 
+# Highlight markers put around search matches by ts_headline; html.escape leaves them intact
+HIGHLIGHT_START = "[[mark]]"
+HIGHLIGHT_STOP = "[[/mark]]"
+
 
 def validate_rating(rating: int) -> bool:
     """Validate rating is between 1 and 5"""
@@ -19,6 +24,14 @@ def format_datetime(dt: Optional[datetime]) -> Optional[str]:
     return dt.isoformat()
 
 
+def render_snippet(snippet: Optional[str]) -> Optional[str]:
+    """HTML-escape a search snippet (raw patient text), then turn highlight markers into <mark> tags"""
+    if snippet is None:
+        return None
+    escaped = html.escape(snippet)
+    return escaped.replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>")
+
+
 def parse_json_safely(json_str: str) -> Optional[Dict[str, Any]]:
     """Safely parse JSON string, handling common issues"""
     try:
@@ -54,6 +67,19 @@ def extract_urgency_flags(urgency_data: Dict[str, Any]) -> Optional[List[str]]:
     return []
 
 
+def normalize_tag(value: Any) -> str:
+    """Canonical spelling of a tag: lowercase with underscores ("Severe pain" -> "severe_pain")"""
+    return re.sub(r"[\s-]+", "_", str(value).strip().lower())
+
+
+def normalize_tags(values: Any, vocabulary: List[str]) -> List[str]:
+    """Normalize a list of tags, dropping duplicates and values outside ``vocabulary``"""
+    if not isinstance(values, list):
+        return []
+    tags = (normalize_tag(value) for value in values)
+    return list(dict.fromkeys(tag for tag in tags if tag in vocabulary))
+
+
 def extract_categories(categories_data: Dict[str, Any]) -> Tuple[Optional[str], Optional[List[str]]]:
     """Extract primary category and subcategories"""
     if isinstance(categories_data, dict):
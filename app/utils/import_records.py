@@ -0,0 +1,96 @@
+"""
+Incremental parsing of CSV and JSONL feedback exports.
+
+Byte chunks are decoded into lines, and lines are grouped into records, without
+holding more than the current record in memory. CSV follows RFC 4180: a field
+is quoted only when it starts with ``"``, ``""`` inside a quoted field is an
+escaped quote, and line breaks (CRLF or LF) inside quoted fields are kept.
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.utils.analysis_result import loads as fast_json_loads
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode UTF-8 (BOM tolerated) byte chunks into lines, keeping their line endings."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def _in_quotes_after(line: str, in_quotes: bool) -> bool:
+    """Whether a quoted field is still open at the end of ``line``."""
+    if not in_quotes and '"' not in line:
+        return False
+    at_field_start = not in_quotes
+    index, length = 0, len(line)
+    while index < length:
+        char = line[index]
+        if in_quotes:
+            if char == '"':
+                if index + 1 < length and line[index + 1] == '"':
+                    index += 1
+                else:
+                    in_quotes = False
+        elif char == '"' and at_field_start:
+            in_quotes = True
+        # A stray quote inside an unquoted field (5'10" tall) is just a character
+        at_field_start = char == "," and not in_quotes
+        index += 1
+    return in_quotes
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """``(line_number, row)`` for each CSV record keyed by the header row."""
+    header: Optional[List[str]] = None
+    buffer: List[str] = []
+    in_quotes = False
+    start_line = line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not buffer:
+            start_line = line_number
+        buffer.append(line)
+        in_quotes = _in_quotes_after(line, in_quotes)
+        if in_quotes:
+            continue
+        record, buffer = buffer, []
+        if not "".join(record).strip():
+            continue
+        values = next(csv.reader(record))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        # Empty cells become missing values so optional fields validate as None
+        yield start_line, {
+            name: value for name, value in zip(header, values) if name and value.strip() != ""
+        }
+    if buffer:
+        yield start_line, {"__error__": "Unterminated quoted field"}
+
+
+async def iter_jsonl_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """``(line_number, record)`` for each non-blank JSONL line; bad lines carry ``__error__``."""
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            record = fast_json_loads(line)
+        except ValueError as exc:
+            yield line_number, {"__error__": f"Invalid JSON: {exc}"}
+            continue
+        yield line_number, record if isinstance(record, dict) else {"__error__": "Expected a JSON object"}
@@ -0,0 +1,97 @@
+"""
+Incremental parsing of a streamed JSON object.
+
+The model streams its JSON answer in arbitrary text fragments. This parser is
+fed those fragments and reports each top-level member as soon as its value is
+complete, so e.g. ``urgency`` can be acted on before ``key_points`` arrives.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, List, Optional, Tuple
+
+
+class TopLevelMemberParser:
+    """Yield ``(key, value)`` pairs of a JSON object's top-level members as they complete."""
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return self._text
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self._text += chunk
+        if self._finished:
+            return []
+        completed: List[Tuple[str, Any]] = []
+        text = self._text
+        i = self._pos
+        while i < len(text):
+            char = text[i]
+            if not self._started:
+                # Skip anything before the opening brace (e.g. a ```json fence)
+                if char == "{":
+                    self._started = True
+                    self._depth = 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._key_start is not None:
+                        self._key = self._decode(text[self._key_start:i + 1])
+                        self._key_start = None
+            elif char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None and self._value_start is None:
+                    self._key_start = i
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(text[self._value_start:i] if self._value_start is not None else None, completed)
+                    self._finished = True
+                    i += 1
+                    break
+            elif self._depth == 1:
+                if char == ":" and self._key is not None and self._value_start is None:
+                    self._value_start = i + 1
+                elif char == ",":
+                    self._emit(text[self._value_start:i] if self._value_start is not None else None, completed)
+            i += 1
+        self._pos = i
+        return completed
+
+    def _emit(self, raw_value: Optional[str], completed: List[Tuple[str, Any]]) -> None:
+        key = self._key
+        self._key = None
+        self._value_start = None
+        if key is None or raw_value is None:
+            return
+        try:
+            completed.append((key, json.loads(raw_value)))
+        except ValueError:
+            # Leave malformed members to the full-response parser
+            pass
+
+    @staticmethod
+    def _decode(raw_key: str) -> Optional[str]:
+        try:
+            return json.loads(raw_key)
+        except ValueError:
+            return None
@@ -0,0 +1,43 @@
+"""
+Rolling latency window with percentile lookups.
+
+Used to derive hedging delays from recently observed response times, so the
+delay tracks the dependency's real tail instead of a hard-coded guess.
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+
+class LatencyTracker:
+    """Keep the last ``size`` samples (seconds); sort lazily on lookup."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20) -> None:
+        self.min_samples = max(1, min_samples)
+        self._samples: Deque[float] = deque(maxlen=max(1, size))
+        self._sorted: Optional[List[float]] = None
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._sorted = None
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """The ``pct`` percentile, or None until enough samples have been seen."""
+        if len(self._samples) < self.min_samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        index = min(len(self._sorted) - 1, max(0, int(round(pct / 100 * (len(self._sorted) - 1)))))
+        return self._sorted[index]
+
+    def stats(self) -> Dict[str, Any]:
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "samples": len(self._samples),
+            "p50_ms": ms(self.percentile(50)),
+            "p95_ms": ms(self.percentile(95)),
+            "p99_ms": ms(self.percentile(99)),
+        }
@@ -0,0 +1,124 @@
+"""
+MinHash signatures and a banded LSH index for near-duplicate text.
+
+Each text is reduced to word shingles and a MinHash signature. The signature
+is split into bands; entries sharing any band bucket are candidates, confirmed
+by the estimated Jaccard similarity of the two signatures. See
+``app.services.dedup`` for how feedback uses it.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import struct
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+Signature = Tuple[int, ...]
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Word n-grams of lowercased alphanumeric tokens (the whole text if shorter)."""
+    words = _WORD_PATTERN.findall((text or "").lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """
+    MinHash signatures from one extendable-output hash per shingle.
+
+    SHAKE-128 yields ``num_perm`` independent 32-bit hash values per shingle in
+    a single C call; the signature is their column-wise minimum. This is
+    several times faster than per-permutation arithmetic in Python and stable
+    across processes.
+    """
+
+    def __init__(self, num_perm: int = 64) -> None:
+        self.num_perm = num_perm
+        self._unpack = struct.Struct(f"<{num_perm}I").unpack
+        self._digest_size = 4 * num_perm
+
+    def signature(self, shingle_set: Set[str]) -> Optional[Signature]:
+        if not shingle_set:
+            return None
+        unpack, size = self._unpack, self._digest_size
+        rows = [unpack(hashlib.shake_128(shingle.encode("utf-8")).digest(size)) for shingle in shingle_set]
+        return tuple(map(min, zip(*rows)))
+
+
+@dataclass(frozen=True)
+class DuplicateMatch:
+    feedback_id: int
+    similarity: float
+
+
+class MinHashLSHIndex:
+    """Banded LSH over MinHash signatures with bounded size and time-window eviction."""
+
+    def __init__(self, num_perm: int, bands: int, max_entries: int, window_seconds: float) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max(1, max_entries)
+        self.window_seconds = window_seconds
+        # feedback_id -> (signature, scope, inserted_at); insertion order == age
+        self._entries: "OrderedDict[int, Tuple[Signature, str, float]]" = OrderedDict()
+        self._buckets: List[Dict[Tuple[str, int], Set[int]]] = [{} for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _band_keys(self, signature: Signature, scope: str) -> List[Tuple[str, int]]:
+        rows = self.rows
+        return [(scope, hash(signature[i * rows:(i + 1) * rows])) for i in range(self.bands)]
+
+    def add(self, feedback_id: int, signature: Signature, scope: str, inserted_at: Optional[float] = None) -> None:
+        if feedback_id in self._entries:
+            return
+        inserted_at = time.time() if inserted_at is None else inserted_at
+        self._entries[feedback_id] = (signature, scope, inserted_at)
+        for band, key in enumerate(self._band_keys(signature, scope)):
+            self._buckets[band].setdefault(key, set()).add(feedback_id)
+        self._evict(time.time())
+
+    def remove(self, feedback_id: int) -> None:
+        entry = self._entries.pop(feedback_id, None)
+        if entry is None:
+            return
+        signature, scope, _ = entry
+        for band, key in enumerate(self._band_keys(signature, scope)):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(feedback_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def _evict(self, now: float) -> None:
+        entries = self._entries
+        while entries:
+            oldest_id, (_, _, inserted_at) = next(iter(entries.items()))
+            if len(entries) <= self.max_entries and now - inserted_at <= self.window_seconds:
+                break
+            self.remove(oldest_id)
+
+    def query(self, signature: Signature, scope: str, threshold: float) -> Optional[DuplicateMatch]:
+        """Most similar indexed signature at or above ``threshold`` within the window."""
+        self._evict(time.time())
+        candidates: Set[int] = set()
+        for band, key in enumerate(self._band_keys(signature, scope)):
+            candidates.update(self._buckets[band].get(key, ()))
+        best: Optional[DuplicateMatch] = None
+        size = len(signature)
+        for candidate_id in candidates:
+            other = self._entries[candidate_id][0]
+            similarity = sum(1 for x, y in zip(signature, other) if x == y) / size
+            if similarity >= threshold and (best is None or similarity > best.similarity):
+                best = DuplicateMatch(candidate_id, similarity)
+        return best
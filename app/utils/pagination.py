@@ -0,0 +1,34 @@
+"""
+Opaque keyset cursors for newest-first feedback listing.
+
+A cursor encodes the ``(created_at, id)`` of the last row on a page. The next
+page continues strictly after that position, so it costs one index range scan
+however deep the client scrolls, and rows inserted meanwhile never shift it.
+"""
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+FeedbackCursor = Tuple[datetime, int]
+
+
+def encode_cursor(created_at: datetime, feedback_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), feedback_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> FeedbackCursor:
+    """Inverse of ``encode_cursor``; raises ValueError for anything malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, feedback_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        position = datetime.fromisoformat(created_at)
+        # created_at is timestamptz; a naive or non-integer position can't be compared with it
+        if position.tzinfo is None or type(feedback_id) is not int:
+            raise ValueError("Invalid cursor position")
+        return position, feedback_id
+    except (TypeError, ValueError, UnicodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
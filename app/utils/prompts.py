@@ -1,62 +1,304 @@
 """
 Reusable Gemini AI prompt templates for medical feedback analysis
 """
+import re
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple
 
-FEEDBACK_ANALYSIS_PROMPT = """
-You are a medical feedback analysis AI. Analyze the following patient feedback and provide a comprehensive analysis in JSON format.
-
-Patient Feedback:
-{feedback_text}
-
-Visit Details:
-- Department: {department}
-- Doctor: {doctor_name}
-- Visit Date: {visit_date}
-- Rating: {rating}/5
+from app.utils.constants import EMOTION_TYPES, URGENCY_FLAGS
 
-Please analyze this feedback and return a JSON object with the following structure:
+# Bump whenever the prompt or output structure changes; part of the analysis cache key
+PROMPT_VERSION = "3"
 
-{{
+ANALYSIS_JSON_STRUCTURE = """{
     "sentiment": "positive|negative|neutral|mixed",
     "confidence_score": 0.0-1.0,
     "emotions": ["angry", "grateful", "worried", "frustrated", "satisfied"],
-    "urgency": {{
+    "urgency": {
         "level": "critical|high|medium|low",
         "reason": "explanation of urgency level",
         "flags": ["medical_complications", "severe_pain", "safety_concerns", "harassment"]
-    }},
-    "categories": {{
+    },
+    "categories": {
         "primary": "main category name",
         "subcategories": ["category1", "category2", ...]
-    }},
-    "medical_concerns": {{
+    },
+    "medical_concerns": {
         "symptoms": ["symptom1", "symptom2"],
         "complications": ["complication1"],
         "treatment_side_effects": ["side_effect1"],
         "medication_issues": ["issue1"]
-    }},
+    },
     "actionable_insights": "What needs follow-up or action",
     "key_points": [
         "Key point 1",
         "Key point 2",
         "Key point 3"
     ]
-}}
+}"""
 
-Important guidelines:
+ANALYSIS_GUIDELINES = """Important guidelines:
 1. If the feedback mentions severe pain, medical complications, safety concerns, or harassment, mark urgency as "critical"
 2. Be thorough in detecting medical concerns that may need immediate attention
-3. Provide specific, actionable insights
+3. Provide specific, actionable insights"""
+
+FEEDBACK_ANALYSIS_PROMPT = """
+You are a medical feedback analysis AI. Analyze the following patient feedback and provide a comprehensive analysis in JSON format.
+
+Patient Feedback:
+{feedback_text}
+
+Visit Details:
+- Department: {department}
+- Doctor: {doctor_name}
+- Visit Date: {visit_date}
+- Rating: {rating}/5
+
+Please analyze this feedback and return a JSON object with the following structure:
+
+{structure}
+
+{guidelines}
 4. Return ONLY valid JSON, no additional text or markdown formatting
 """
 
+BATCH_ANALYSIS_PROMPT = """
+You are a medical feedback analysis AI. Analyze EACH of the following patient feedbacks independently.
+
+{items}
+
+Return a JSON array with exactly one object per feedback above. Each object must include the
+"feedback_id" it belongs to (as an integer) plus the following structure:
+
+{structure}
+
+{guidelines}
+4. Do not mix information between feedbacks
+5. Return ONLY a valid JSON array, no additional text or markdown formatting
+"""
+
+BATCH_ITEM_TEMPLATE = """--- Feedback {feedback_id} ---
+Department: {department} | Doctor: {doctor_name} | Visit Date: {visit_date} | Rating: {rating}/5
+Text:
+{feedback_text}"""
+
+# Compact variants for structured-output mode: the response schema is enforced by
+# Gemini's responseSchema, so the prompt doesn't need to spell out the JSON shape.
+COMPACT_GUIDELINES = (
+    'Urgency is "critical" for severe pain, medical complications, safety concerns or harassment. '
+    "Flag medical concerns needing attention; keep insights specific and actionable. "
+    f"Urgency flags must be from: {', '.join(URGENCY_FLAGS)}. "
+    f"Emotions must be from: {', '.join(EMOTION_TYPES)}."
+)
+
+COMPACT_ANALYSIS_PROMPT = """Analyze this patient feedback for a hospital quality team. Reply with JSON per the response schema.
+{guidelines}
+Department: {department} | Doctor: {doctor_name} | Visit: {visit_date} | Rating: {rating}/5
+Feedback:
+{feedback_text}"""
+
+COMPACT_BATCH_ANALYSIS_PROMPT = """Analyze EACH patient feedback below independently for a hospital quality team. Reply with a JSON array per the response schema, one object per feedback, each with its integer feedback_id.
+{guidelines}
+
+{items}"""
+
+
+class CompiledPrompt:
+    """
+    A template parsed once into literal and field segments.
+
+    Fields bound at compile time (structure, guidelines) are folded into the
+    literals, so rendering is a single join instead of a full ``str.format``.
+    """
+
+    def __init__(self, template: str, **static: Any) -> None:
+        segments: List[Tuple[bool, str]] = []
+        literal = ""
+        for text, field, _spec, _conversion in Formatter().parse(template):
+            literal += text
+            if field is None:
+                continue
+            if field in static:
+                literal += str(static[field])
+                continue
+            segments.append((False, literal))
+            segments.append((True, field))
+            literal = ""
+        segments.append((False, literal))
+        self._segments = [(is_field, value) for is_field, value in segments if is_field or value]
+        self.fields = tuple(value for is_field, value in self._segments if is_field)
+
+    def render(self, **values: Any) -> str:
+        return "".join(str(values[value]) if is_field else value for is_field, value in self._segments)
+
+
+_FULL_PROMPT = CompiledPrompt(
+    FEEDBACK_ANALYSIS_PROMPT, structure=ANALYSIS_JSON_STRUCTURE, guidelines=ANALYSIS_GUIDELINES
+)
+_FULL_BATCH_PROMPT = CompiledPrompt(
+    BATCH_ANALYSIS_PROMPT, structure=ANALYSIS_JSON_STRUCTURE, guidelines=ANALYSIS_GUIDELINES
+)
+_COMPACT_PROMPT = CompiledPrompt(COMPACT_ANALYSIS_PROMPT, guidelines=COMPACT_GUIDELINES)
+_COMPACT_BATCH_PROMPT = CompiledPrompt(COMPACT_BATCH_ANALYSIS_PROMPT, guidelines=COMPACT_GUIDELINES)
+_BATCH_ITEM = CompiledPrompt(BATCH_ITEM_TEMPLATE)
+
+# Rough token estimate for Gemini's tokenizer on English text
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = " [...]"
+
+_BOILERPLATE = re.compile(
+    r"^[ \t]*(?:sent from my [^\n]*|get outlook for [^\n]*|--+ ?original message ?--+[^\n]*)$",
+    re.IGNORECASE | re.MULTILINE,
+)
+_REPEATED_PUNCTUATION = re.compile(r"([!?.,*=_~-])\1{2,}")
+_INLINE_WHITESPACE = re.compile(r"[^\S\n]+")
+_BLANK_LINES = re.compile(r"\s*\n\s*")
+
 
-def get_analysis_prompt(feedback_text: str, department: str, doctor_name: str = None, visit_date: str = None, rating: int = None) -> str:
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def compact_feedback_text(text: str) -> str:
+    """Drop mail/phone boilerplate, squeeze repeated punctuation and whitespace"""
+    text = _BOILERPLATE.sub("", text or "")
+    text = _REPEATED_PUNCTUATION.sub(r"\1", text)
+    text = _INLINE_WHITESPACE.sub(" ", text)
+    return _BLANK_LINES.sub("\n", text).strip()
+
+
+def cap_to_token_budget(text: str, max_tokens: Optional[int]) -> str:
+    """Truncate text at a word boundary so it fits the estimated token budget"""
+    if not max_tokens or estimate_tokens(text) <= max_tokens:
+        return text
+    # Leave room for the marker so the result stays within the budget
+    cut = text[: max(1, max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER))]
+    head, _, _ = cut.rpartition(" ")
+    return (head or cut).rstrip() + TRUNCATION_MARKER
+
+
+def prepare_feedback_text(text: str, max_tokens: Optional[int] = None) -> str:
+    """Normalize feedback text and cap it to the input token budget"""
+    return cap_to_token_budget(compact_feedback_text(text), max_tokens)
+
+
+def _visit_details(department: str, doctor_name: Optional[str], visit_date: Optional[str], rating: Optional[int], compact: bool) -> Dict[str, Any]:
+    if compact and visit_date:
+        visit_date = visit_date[:10]
+    return {
+        "department": department,
+        "doctor_name": doctor_name or ("-" if compact else "Not specified"),
+        "visit_date": visit_date or ("-" if compact else "Not specified"),
+        "rating": rating or ("-" if compact else "Not specified"),
+    }
+
+
+def get_analysis_prompt(
+    feedback_text: str,
+    department: str,
+    doctor_name: str = None,
+    visit_date: str = None,
+    rating: int = None,
+    compact: bool = False,
+    max_input_tokens: Optional[int] = None,
+) -> str:
     """Generate the analysis prompt with feedback details"""
-    return FEEDBACK_ANALYSIS_PROMPT.format(
-        feedback_text=feedback_text,
-        department=department,
-        doctor_name=doctor_name or "Not specified",
-        visit_date=visit_date or "Not specified",
-        rating=rating or "Not specified"
-    )
\ No newline at end of file
+    template = _COMPACT_PROMPT if compact else _FULL_PROMPT
+    return template.render(
+        feedback_text=prepare_feedback_text(feedback_text, max_input_tokens),
+        **_visit_details(department, doctor_name, visit_date, rating, compact),
+    )
+
+
+def get_batch_analysis_prompt(
+    items: List[Dict[str, Any]],
+    compact: bool = False,
+    max_input_tokens: Optional[int] = None,
+) -> str:
+    """Generate one prompt covering several feedbacks, keyed by feedback id"""
+    rendered = "\n\n".join(
+        _BATCH_ITEM.render(
+            feedback_id=item["feedback_id"],
+            feedback_text=prepare_feedback_text(item["feedback_text"], max_input_tokens),
+            **_visit_details(
+                item["department"], item.get("doctor_name"), item.get("visit_date"), item.get("rating"), compact
+            ),
+        )
+        for item in items
+    )
+    template = _COMPACT_BATCH_PROMPT if compact else _FULL_BATCH_PROMPT
+    return template.render(items=rendered)
+
+
+# Gemini structured-output schema (OpenAPI subset) mirroring ANALYSIS_JSON_STRUCTURE.
+# propertyOrdering puts urgency first so streamed answers surface it early.
+_STRING_LIST = {"type": "ARRAY", "items": {"type": "STRING"}}
+# Closed vocabularies: the stored tags back the flag=/emotion= list filters
+_FLAG_LIST = {"type": "ARRAY", "items": {"type": "STRING", "enum": URGENCY_FLAGS}}
+_EMOTION_LIST = {"type": "ARRAY", "items": {"type": "STRING", "enum": EMOTION_TYPES}}
+
+ANALYSIS_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "urgency": {
+            "type": "OBJECT",
+            "properties": {
+                "level": {"type": "STRING", "enum": ["critical", "high", "medium", "low"]},
+                "reason": {"type": "STRING"},
+                "flags": _FLAG_LIST,
+            },
+            "required": ["level", "reason", "flags"],
+            "propertyOrdering": ["level", "reason", "flags"],
+        },
+        "sentiment": {"type": "STRING", "enum": ["positive", "negative", "neutral", "mixed"]},
+        "confidence_score": {"type": "NUMBER"},
+        "emotions": _EMOTION_LIST,
+        "categories": {
+            "type": "OBJECT",
+            "properties": {"primary": {"type": "STRING"}, "subcategories": _STRING_LIST},
+            "required": ["primary", "subcategories"],
+        },
+        "medical_concerns": {
+            "type": "OBJECT",
+            "properties": {
+                "symptoms": _STRING_LIST,
+                "complications": _STRING_LIST,
+                "treatment_side_effects": _STRING_LIST,
+                "medication_issues": _STRING_LIST,
+            },
+        },
+        "actionable_insights": {"type": "STRING"},
+        "key_points": _STRING_LIST,
+    },
+    "required": [
+        "urgency",
+        "sentiment",
+        "confidence_score",
+        "emotions",
+        "categories",
+        "medical_concerns",
+        "actionable_insights",
+        "key_points",
+    ],
+    "propertyOrdering": [
+        "urgency",
+        "sentiment",
+        "confidence_score",
+        "emotions",
+        "categories",
+        "medical_concerns",
+        "actionable_insights",
+        "key_points",
+    ],
+}
+
+BATCH_ANALYSIS_RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        **ANALYSIS_RESPONSE_SCHEMA,
+        "properties": {"feedback_id": {"type": "INTEGER"}, **ANALYSIS_RESPONSE_SCHEMA["properties"]},
+        "required": ["feedback_id", *ANALYSIS_RESPONSE_SCHEMA["required"]],
+        "propertyOrdering": ["feedback_id", *ANALYSIS_RESPONSE_SCHEMA["propertyOrdering"]],
+    },
+}
@@ -234,9 +234,17 @@ document.addEventListener('DOMContentLoaded', () => {
         // Note: new_feedback doesn't auto-refresh urgent tab since it may not be critical yet
     });
 
+    socket.on('bulk_feedback', (data) => {
+        showAlert(`${data.count} feedback entries imported`, 'info');
+        if (document.getElementById('dashboardTab').classList.contains('active')) {
+            loadFeedback();
+        }
+    });
+
     socket.on('urgent_alert', (data) => {
         showCriticalAlert(data);
-        showAlert(`🚨 URGENT: Critical feedback from ${data.department} - ${data.urgency_reason}`, 'error');
+        const label = data.provisional ? 'URGENT (provisional)' : 'URGENT';
+        showAlert(`🚨 ${label}: Critical feedback from ${data.department} - ${data.urgency_reason}`, 'error');
         if (document.getElementById('dashboardTab').classList.contains('active')) {
             loadFeedback();
         }
@@ -246,6 +254,16 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
+    socket.on('urgent_alert_retracted', (data) => {
+        const message = data.analysis_failed
+            ? `Provisional alert for feedback #${data.feedback_id} is unconfirmed: AI analysis failed`
+            : `Feedback #${data.feedback_id} is not critical after AI review (${data.urgency})`;
+        showAlert(message, 'info');
+        if (document.getElementById('urgentTab').classList.contains('active')) {
+            loadUrgentFeedback();
+        }
+    });
+
     socket.on('analysis_complete', (data) => {
         showAlert(`Analysis complete for feedback #${data.feedback_id}`, 'success');
         if (document.getElementById('dashboardTab').classList.contains('active')) {
@@ -290,6 +308,17 @@ function updateRatingDisplay(value) {
     document.getElementById('starsDisplay').textContent = stars;
 }
 
+// Idempotency key for the submission in flight: resubmitting the same form after a
+// network error reuses it, so the server replays the first response instead of inserting twice
+let pendingSubmission = null;
+
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
 // Form submission
 document.getElementById('feedbackForm').addEventListener('submit', async (e) => {
     e.preventDefault();
@@ -303,16 +332,23 @@ document.getElementById('feedbackForm').addEventListener('submit', async (e) =>
         rating: parseInt(document.getElementById('rating').value)
     };
 
+    const body = JSON.stringify(formData);
+    if (!pendingSubmission || pendingSubmission.body !== body) {
+        pendingSubmission = { body, key: newIdempotencyKey() };
+    }
+
     try {
         const response = await fetch(`${API_BASE}/feedback`, {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                'Idempotency-Key': pendingSubmission.key
             },
-            body: JSON.stringify(formData)
+            body
         });
 
         if (response.ok) {
+            pendingSubmission = null;
             const data = await response.json();
             // Show confirmation page
             showConfirmation();
@@ -559,7 +595,7 @@ function showCriticalAlert(data) {
     alert.innerHTML = `
         <i class="fas fa-exclamation-triangle"></i>
         <div class="critical-alert-content">
-            <h3>🚨 Critical Feedback Alert</h3>
+            <h3>🚨 Critical Feedback Alert${data.provisional ? ' (provisional)' : ''}</h3>
             <p><strong>${SecurityUtils.escapeHtml(data.feedback_preview)}</strong></p>
             <p>Department: ${SecurityUtils.escapeHtml(data.department)} | Reason: ${SecurityUtils.escapeHtml(data.urgency_reason || '')}</p>
         </div>
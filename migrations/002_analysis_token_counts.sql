@@ -0,0 +1,5 @@
+-- Per-analysis Gemini token usage (from usageMetadata)
+-- New databases get these columns from the SQLAlchemy models; run this on existing ones.
+
+ALTER TABLE analysis ADD COLUMN IF NOT EXISTS prompt_tokens INTEGER;
+ALTER TABLE analysis ADD COLUMN IF NOT EXISTS response_tokens INTEGER;
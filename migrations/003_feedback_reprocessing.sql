@@ -0,0 +1,9 @@
+-- Scheduled reprocessing of failed analyses (per-row attempt counter and backoff)
+-- New databases get these from the SQLAlchemy models; run this on existing ones.
+
+ALTER TABLE feedback ADD COLUMN IF NOT EXISTS analysis_attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE feedback ADD COLUMN IF NOT EXISTS next_analysis_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS ix_feedback_failed_reprocess
+    ON feedback (id, next_analysis_at)
+    WHERE status = 'analysis_failed';
@@ -0,0 +1,7 @@
+-- Near-duplicate linking (MinHash/LSH detection on intake)
+-- New databases get this from the SQLAlchemy models; run this on existing ones.
+
+ALTER TABLE feedback
+    ADD COLUMN IF NOT EXISTS duplicate_of_id INTEGER REFERENCES feedback(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS ix_feedback_duplicate_of_id ON feedback (duplicate_of_id);
@@ -0,0 +1,4 @@
+-- Keyset (cursor) pagination for GET /feedback/all: newest first on (created_at, id)
+-- New databases get this index from the SQLAlchemy models; run this on existing ones.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_feedback_created_id ON feedback (created_at, id);
@@ -0,0 +1,21 @@
+-- Full-text search for GET /feedback/all?q=
+-- New databases get the generated columns and GIN indexes from the SQLAlchemy models
+-- (the trigram index is created on startup when permitted); run this on existing ones.
+-- Adding a stored generated column rewrites the table: run it in a maintenance window.
+
+ALTER TABLE feedback
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(feedback_text, ''))) STORED;
+
+ALTER TABLE analysis
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('english', coalesce(actionable_insights, '') || ' ' || coalesce(key_points::text, ''))
+    ) STORED;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_feedback_search_vector ON feedback USING gin (search_vector);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_analysis_search_vector ON analysis USING gin (search_vector);
+
+-- Misspelling fallback (word similarity)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_feedback_text_trgm ON feedback USING gin (feedback_text gin_trgm_ops);
@@ -0,0 +1,58 @@
+-- JSONB analysis tags with GIN indexes (category / flag / emotion filters)
+-- New databases get this from the SQLAlchemy models; run this on existing ones.
+-- The type change rewrites the analysis table: run it in a maintenance window.
+
+BEGIN;
+
+-- analysis.search_vector (007) reads key_points, so it is rebuilt around the type change
+DROP INDEX IF EXISTS ix_analysis_search_vector;
+ALTER TABLE analysis DROP COLUMN IF EXISTS search_vector;
+
+ALTER TABLE analysis
+    ALTER COLUMN emotions TYPE jsonb USING emotions::jsonb,
+    ALTER COLUMN urgency_flags TYPE jsonb USING urgency_flags::jsonb,
+    ALTER COLUMN subcategories TYPE jsonb USING subcategories::jsonb,
+    ALTER COLUMN medical_concerns TYPE jsonb USING medical_concerns::jsonb,
+    ALTER COLUMN key_points TYPE jsonb USING key_points::jsonb;
+
+-- Existing tags predate normalize_tags(): apply the same rule (strip, lowercase,
+-- whitespace/hyphen runs -> "_", drop duplicates and unknown values, keep order)
+-- so the containment filters below match historical rows too.
+CREATE FUNCTION pg_temp.normalize_tags(tags jsonb, vocabulary text[]) RETURNS jsonb
+LANGUAGE sql IMMUTABLE STRICT AS $$
+    SELECT CASE WHEN jsonb_typeof(tags) = 'array' THEN (
+        SELECT coalesce(jsonb_agg(tag ORDER BY first_position), '[]'::jsonb)
+        FROM (
+            SELECT tag, min(ordinal) AS first_position
+            FROM jsonb_array_elements_text(tags) WITH ORDINALITY AS element(value, ordinal),
+                LATERAL (
+                    SELECT regexp_replace(lower(btrim(value, E' \t\n\r\f')), '[[:space:]-]+', '_', 'g') AS tag
+                ) AS normalized
+            WHERE tag = ANY (vocabulary)
+            GROUP BY tag
+        ) AS deduplicated
+    ) ELSE '[]'::jsonb END
+$$;
+
+-- Vocabularies mirror URGENCY_FLAGS and EMOTION_TYPES in app/utils/constants.py
+UPDATE analysis
+SET urgency_flags = pg_temp.normalize_tags(
+        urgency_flags, ARRAY['medical_complications', 'severe_pain', 'safety_concerns', 'harassment']
+    ),
+    emotions = pg_temp.normalize_tags(
+        emotions, ARRAY['angry', 'grateful', 'worried', 'frustrated', 'satisfied']
+    )
+WHERE urgency_flags IS NOT NULL OR emotions IS NOT NULL;
+
+ALTER TABLE analysis
+    ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('english', coalesce(actionable_insights, '') || ' ' || coalesce(key_points::text, ''))
+    ) STORED;
+
+COMMIT;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_analysis_search_vector ON analysis USING gin (search_vector);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_analysis_subcategories ON analysis USING gin (subcategories jsonb_path_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_analysis_urgency_flags ON analysis USING gin (urgency_flags jsonb_path_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_analysis_emotions ON analysis USING gin (emotions jsonb_path_ops);
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from app.utils.batching import MicroBatcher
+
+
+class Recorder:
+    def __init__(self, fail: bool = False, delay: float = 0.0) -> None:
+        self.batches = []
+        self.fail = fail
+        self.delay = delay
+
+    async def __call__(self, items):
+        self.batches.append(list(items))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("upstream down")
+        return [item * 10 for item in items]
+
+
+def test_flushes_when_full_without_waiting_for_the_delay():
+    async def scenario():
+        flush = Recorder()
+        batcher = MicroBatcher(flush, max_size=3, max_delay=60)
+        results = await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(3))), 1)
+        assert results == [0, 10, 20]
+        assert flush.batches == [[0, 1, 2]]
+
+    asyncio.run(scenario())
+
+
+def test_flushes_partial_batch_after_max_delay():
+    async def scenario():
+        flush = Recorder()
+        batcher = MicroBatcher(flush, max_size=10, max_delay=0.02)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2))
+        assert results == [10, 20]
+        assert flush.batches == [[1, 2]]
+        assert loop.time() - started >= 0.015
+
+    asyncio.run(scenario())
+
+
+def test_overflow_starts_a_new_batch():
+    async def scenario():
+        flush = Recorder()
+        batcher = MicroBatcher(flush, max_size=2, max_delay=0.01)
+        assert await asyncio.gather(*(batcher.submit(i) for i in range(5))) == [0, 10, 20, 30, 40]
+        assert flush.batches == [[0, 1], [2, 3], [4]]
+
+    asyncio.run(scenario())
+
+
+def test_flush_error_reaches_every_waiter():
+    async def scenario():
+        batcher = MicroBatcher(Recorder(fail=True), max_size=3, max_delay=60)
+        outcomes = await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+        assert all(isinstance(outcome, ConnectionError) for outcome in outcomes)
+        assert len({id(outcome) for outcome in outcomes}) == 1
+
+    asyncio.run(scenario())
+
+
+def test_result_count_mismatch_fails_the_batch():
+    async def short(items):
+        return items[:-1]
+
+    async def scenario():
+        batcher = MicroBatcher(short, max_size=2, max_delay=60)
+        with pytest.raises(RuntimeError):
+            await asyncio.gather(batcher.submit(1), batcher.submit(2))
+
+    asyncio.run(scenario())
+
+
+def test_drain_flushes_pending_and_waits_for_in_flight():
+    async def scenario():
+        flush = Recorder(delay=0.01)
+        batcher = MicroBatcher(flush, max_size=2, max_delay=60)
+        waiters = [asyncio.create_task(batcher.submit(i)) for i in range(3)]
+        await asyncio.sleep(0)
+        await batcher.drain()
+        assert all(waiter.done() for waiter in waiters)
+        assert [waiter.result() for waiter in waiters] == [0, 10, 20]
+        assert flush.batches == [[0, 1], [2]]
+
+    asyncio.run(scenario())
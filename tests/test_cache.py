@@ -0,0 +1,65 @@
+import pytest
+
+from app.utils import cache as cache_module
+from app.utils import content_hash
+from app.utils.cache import TTLCache
+from app.utils.content_hash import compute_content_hash
+
+TEXT = "The nurse was very kind but the wait was long."
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 500.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+def test_hash_ignores_whitespace_and_department_case():
+    base = compute_content_hash(TEXT, "OPD", 4)
+    assert compute_content_hash("  The nurse was very kind\nbut the wait   was long. ", " opd ", 4) == base
+
+
+def test_hash_changes_with_department_rating_and_text():
+    base = compute_content_hash(TEXT, "OPD", 4)
+    assert compute_content_hash(TEXT, "Lab", 4) != base
+    assert compute_content_hash(TEXT, "OPD", 1) != base
+    assert compute_content_hash(TEXT, "OPD", None) != base
+    assert compute_content_hash(TEXT + "!", "OPD", 4) != base
+
+
+def test_hash_changes_with_prompt_version(monkeypatch):
+    base = compute_content_hash(TEXT, "OPD", 4)
+    monkeypatch.setattr(content_hash, "PROMPT_VERSION", content_hash.PROMPT_VERSION + "-next")
+    assert compute_content_hash(TEXT, "OPD", 4) != base
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(max_size=10, ttl=5)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+    clock.now += 5
+    assert cache.get("a") == 1
+    clock.now += 0.1
+    assert cache.get("a") is None
+    assert "a" not in cache
+    assert cache.get("b") == 2
+
+
+def test_least_recently_used_is_evicted(clock):
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert len(cache) == 2
@@ -0,0 +1,139 @@
+import pytest
+
+from app.services import circuit_breaker as module
+from app.services.circuit_breaker import CircuitBreaker, CircuitBreakerState
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(module.time, "monotonic", clock)
+    return clock
+
+
+def make_breaker(**kwargs) -> CircuitBreaker:
+    options = {"failure_threshold": 3, "window_seconds": 10.0, "recovery_timeout": 5.0}
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+def trip(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure(breaker.allow())
+    assert breaker.state == CircuitBreakerState.OPEN
+
+
+def test_opens_at_threshold_within_window(clock):
+    breaker = make_breaker()
+    breaker.record_failure(breaker.allow())
+    breaker.record_failure(breaker.allow())
+    assert breaker.state == CircuitBreakerState.CLOSED
+    breaker.record_failure(breaker.allow())
+    assert breaker.state == CircuitBreakerState.OPEN
+    assert breaker.allow() is None
+
+
+def test_failures_outside_window_expire(clock):
+    breaker = make_breaker()
+    breaker.record_failure(breaker.allow())
+    breaker.record_failure(breaker.allow())
+    clock.now += 11
+    breaker.record_failure(breaker.allow())
+    assert breaker.state == CircuitBreakerState.CLOSED
+    assert breaker.snapshot()["recent_failures"] == 1
+
+
+def test_single_probe_after_recovery_timeout(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 5
+    probe = breaker.allow()
+    assert probe is not None and probe.probe
+    assert breaker.state == CircuitBreakerState.HALF_OPEN
+    assert breaker.allow() is None
+    breaker.record_success(probe)
+    assert breaker.state == CircuitBreakerState.CLOSED
+
+
+def test_failed_probe_reopens(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 5
+    breaker.record_failure(breaker.allow())
+    assert breaker.state == CircuitBreakerState.OPEN
+    assert breaker.allow() is None
+
+
+def test_stale_success_cannot_close_half_open(clock):
+    breaker = make_breaker()
+    stale = breaker.allow()
+    trip(breaker)
+    clock.now += 5
+    probe = breaker.allow()
+    breaker.record_success(stale)
+    assert breaker.state == CircuitBreakerState.HALF_OPEN
+    assert breaker.allow() is None
+    breaker.record_success(probe)
+    assert breaker.state == CircuitBreakerState.CLOSED
+
+
+def test_stale_failure_cannot_reopen_half_open(clock):
+    breaker = make_breaker()
+    stale = breaker.allow()
+    trip(breaker)
+    clock.now += 5
+    breaker.allow()
+    breaker.record_failure(stale)
+    assert breaker.state == CircuitBreakerState.HALF_OPEN
+
+
+def test_stale_release_keeps_probe_slot(clock):
+    breaker = make_breaker()
+    stale = breaker.allow()
+    trip(breaker)
+    clock.now += 5
+    probe = breaker.allow()
+    breaker.release(stale)
+    assert breaker.allow() is None
+    breaker.release(probe)
+    assert breaker.allow() is not None
+
+
+def test_stale_failure_does_not_count_after_reclose(clock):
+    breaker = make_breaker(failure_threshold=1)
+    stale = breaker.allow()
+    breaker.record_failure(breaker.allow())
+    clock.now += 5
+    breaker.record_success(breaker.allow())
+    assert breaker.state == CircuitBreakerState.CLOSED
+    breaker.record_failure(stale)
+    assert breaker.state == CircuitBreakerState.CLOSED
+
+
+def test_ticket_settles_once(clock):
+    breaker = make_breaker()
+    ticket = breaker.allow()
+    breaker.record_failure(ticket)
+    breaker.record_failure(ticket)
+    assert breaker.total_failures == 1
+    assert breaker.snapshot()["recent_failures"] == 1
+
+
+def test_admits_tracks_probe_identity(clock):
+    breaker = make_breaker()
+    stale = breaker.allow()
+    assert breaker.admits(stale)
+    trip(breaker)
+    assert not breaker.admits(stale)
+    clock.now += 5
+    probe = breaker.allow()
+    assert breaker.admits(probe)
+    assert not breaker.admits(stale)
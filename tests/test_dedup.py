@@ -0,0 +1,79 @@
+import pytest
+
+from app.utils.minhash import MinHasher, MinHashLSHIndex, shingles
+
+ORIGINAL = (
+    "I waited four hours in the emergency room with severe chest pain and nobody came "
+    "to check on me until my daughter complained at the front desk"
+)
+NEAR_COPY = ORIGINAL + " again"
+UNRELATED = "The pharmacy staff were friendly and my prescription was ready in ten minutes"
+
+
+@pytest.fixture
+def hasher():
+    return MinHasher(num_perm=64)
+
+
+def make_index(**kwargs):
+    options = {"num_perm": 64, "bands": 16, "max_entries": 100, "window_seconds": 3600}
+    options.update(kwargs)
+    return MinHashLSHIndex(**options)
+
+
+def test_shingles_ignore_case_and_punctuation():
+    assert shingles("Nurse was RUDE!") == {"nurse was rude"}
+    assert shingles("a b c d") == {"a b c", "b c d"}
+    assert shingles("...") == set()
+
+
+def test_signature_is_stable(hasher):
+    assert hasher.signature(shingles(ORIGINAL)) == MinHasher(num_perm=64).signature(shingles(ORIGINAL))
+    assert len(hasher.signature(shingles(ORIGINAL))) == 64
+    assert hasher.signature(set()) is None
+
+
+def test_near_copy_above_threshold_is_linked(hasher):
+    index = make_index()
+    index.add(1, hasher.signature(shingles(ORIGINAL)), "emergency")
+    match = index.query(hasher.signature(shingles(NEAR_COPY)), "emergency", threshold=0.8)
+    assert match is not None and match.feedback_id == 1
+    assert match.similarity >= 0.8
+
+
+def test_unrelated_text_is_not_linked(hasher):
+    index = make_index()
+    index.add(1, hasher.signature(shingles(ORIGINAL)), "emergency")
+    assert index.query(hasher.signature(shingles(UNRELATED)), "emergency", threshold=0.8) is None
+
+
+def test_threshold_and_scope_are_respected(hasher):
+    index = make_index()
+    index.add(1, hasher.signature(shingles(ORIGINAL)), "emergency")
+    signature = hasher.signature(shingles(NEAR_COPY))
+    assert index.query(signature, "pharmacy", threshold=0.8) is None
+    assert index.query(signature, "emergency", threshold=1.0) is None
+
+
+def test_index_evicts_oldest_beyond_capacity(hasher):
+    index = make_index(max_entries=2)
+    for feedback_id, text in enumerate([ORIGINAL, UNRELATED, "Parking was impossible to find"], start=1):
+        index.add(feedback_id, hasher.signature(shingles(text)), "opd")
+    assert len(index) == 2
+    assert index.query(hasher.signature(shingles(ORIGINAL)), "opd", threshold=0.8) is None
+
+
+def test_in_batch_duplicates_link_to_earlier_position():
+    dedup = pytest.importorskip("app.services.dedup")
+    detector = dedup.DuplicateDetector()
+    batch = detector.batch_index()
+    texts = [ORIGINAL, UNRELATED, NEAR_COPY]
+    matches = [
+        detector.find_in_batch(batch, position, detector.signature(text), "Emergency")
+        for position, text in enumerate(texts)
+    ]
+    assert matches[0] is None and matches[1] is None
+    assert matches[2] is not None and matches[2].feedback_id == 0
+    # Only originals are indexed, and the batch never touches the shared index
+    assert len(batch) == 2
+    assert len(detector.index) == 0
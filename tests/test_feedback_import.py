@@ -0,0 +1,64 @@
+import asyncio
+from typing import List
+
+from app.utils.import_records import iter_csv_records, iter_jsonl_records, iter_lines
+
+
+async def _chunks(chunks: List[bytes]):
+    for chunk in chunks:
+        yield chunk
+
+
+def parse(parser, data: bytes, chunk_size: int = 7):
+    async def run():
+        chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+        return [record async for record in parser(iter_lines(_chunks(chunks)))]
+
+    return asyncio.run(run())
+
+
+def test_chunk_boundary_inside_utf8_character():
+    data = "department,feedback_text\nOPD,Très bien merci 😊\n".encode("utf-8")
+    for size in range(1, 8):
+        records = parse(iter_csv_records, data, chunk_size=size)
+        assert records == [(2, {"department": "OPD", "feedback_text": "Très bien merci 😊"})]
+
+
+def test_bom_is_dropped_from_header():
+    records = parse(iter_csv_records, b"\xef\xbb\xbfdepartment,rating\nLab,4\n")
+    assert records == [(2, {"department": "Lab", "rating": "4"})]
+
+
+def test_multiline_quoted_field_keeps_crlf():
+    data = b'department,feedback_text\r\nIPD,"Line one\r\nsaid ""hi"", then left"\r\nLab,ok\r\n'
+    assert parse(iter_csv_records, data) == [
+        (2, {"department": "IPD", "feedback_text": 'Line one\r\nsaid "hi", then left'}),
+        (4, {"department": "Lab", "feedback_text": "ok"}),
+    ]
+
+
+def test_stray_quote_in_unquoted_field():
+    data = b"department,feedback_text\nOPD,He is 5'10\" tall\nLab,next row\n"
+    assert parse(iter_csv_records, data) == [
+        (2, {"department": "OPD", "feedback_text": "He is 5'10\" tall"}),
+        (3, {"department": "Lab", "feedback_text": "next row"}),
+    ]
+
+
+def test_blank_cells_become_missing_values():
+    data = b"patient_name,department,doctor_name\n,OPD,  \n\n"
+    assert parse(iter_csv_records, data) == [(2, {"department": "OPD"})]
+
+
+def test_unterminated_quote_is_reported():
+    data = b'department,feedback_text\nOPD,"never closed\nLab,x\n'
+    assert parse(iter_csv_records, data) == [(2, {"__error__": "Unterminated quoted field"})]
+
+
+def test_jsonl_invalid_and_non_object_lines():
+    data = b'{"department": "OPD"}\r\n\nnot json\n[1, 2]\n{"rating": 5}'
+    records = parse(iter_jsonl_records, data)
+    assert records[0] == (1, {"department": "OPD"})
+    assert records[1][0] == 3 and records[1][1]["__error__"].startswith("Invalid JSON")
+    assert records[2] == (4, {"__error__": "Expected a JSON object"})
+    assert records[3] == (5, {"rating": 5})
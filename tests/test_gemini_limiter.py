@@ -0,0 +1,37 @@
+import asyncio
+
+from app.services.gemini_limiter import OUTCOME_OVERLOAD, OUTCOME_SUCCESS, AdaptiveConcurrencyLimiter
+
+
+def test_try_acquire_takes_only_free_slots():
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+        assert limiter.has_capacity()
+        assert limiter.try_acquire()
+        assert not limiter.has_capacity()
+        assert not limiter.try_acquire()
+        await limiter.release(OUTCOME_SUCCESS)
+        assert limiter.try_acquire()
+
+    asyncio.run(scenario())
+
+
+def test_try_acquire_respects_retry_after():
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2)
+        await limiter.acquire()
+        await limiter.release(OUTCOME_OVERLOAD, retry_after=30)
+        assert not limiter.has_capacity()
+        assert not limiter.try_acquire()
+
+    asyncio.run(scenario())
+
+
+def test_try_acquire_needs_a_rate_token():
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, rate_per_second=0.001, burst=1)
+        assert limiter.try_acquire()
+        assert not limiter.try_acquire()
+        assert limiter.in_flight == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,50 @@
+import json
+
+from app.utils.json_stream import TopLevelMemberParser
+
+ANSWER = {
+    "urgency": {"level": "critical", "reason": 'said "help {now}" \\ twice', "flags": ["severe_pain"]},
+    "sentiment": "negative",
+    "categories": {"primary": "Care", "subcategories": ["wait}", "[staff]"]},
+    "key_points": ["a, b", "c"],
+}
+
+
+def feed_all(parser, fragments):
+    events = []
+    for fragment in fragments:
+        events.extend(parser.feed(fragment))
+    return events
+
+
+def test_members_split_at_every_position():
+    text = json.dumps(ANSWER)
+    for cut in range(1, len(text)):
+        events = feed_all(TopLevelMemberParser(), [text[:cut], text[cut:]])
+        assert events == list(ANSWER.items()), cut
+
+
+def test_single_character_fragments():
+    events = feed_all(TopLevelMemberParser(), list(json.dumps(ANSWER)))
+    assert dict(events) == ANSWER
+
+
+def test_escaped_quotes_and_braces_inside_strings():
+    parser = TopLevelMemberParser()
+    events = parser.feed('{"reason": "he said \\"}\\" and {left}", "next": 1}')
+    assert events == [("reason", 'he said "}" and {left}'), ("next", 1)]
+
+
+def test_nested_members_do_not_fire_early():
+    parser = TopLevelMemberParser()
+    assert parser.feed('{"categories": {"primary": "Care", "urgency": {"level": "low"}') == []
+    assert parser.feed(', "x": [1, {"a": 2}]') == []
+    assert parser.feed("}, ") == [("categories", {"primary": "Care", "urgency": {"level": "low"}, "x": [1, {"a": 2}]})]
+
+
+def test_urgency_arriving_last():
+    parser = TopLevelMemberParser()
+    events = feed_all(parser, ['```json\n{"sentiment": "mixed", "urg', 'ency": {"level": "high"', "}}\n```"])
+    assert events == [("sentiment", "mixed"), ("urgency", {"level": "high"})]
+    assert parser.feed('{"late": 1}') == []
+    assert parser.text.endswith('{"late": 1}')
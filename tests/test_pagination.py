@@ -0,0 +1,50 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def _token(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize(
+    "created_at",
+    [
+        datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+        datetime(2024, 5, 1, 12, 30, 15, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+        datetime(2024, 5, 1, 12, 30, 15, 1, tzinfo=timezone.utc),
+    ],
+)
+def test_round_trip_keeps_microseconds_and_offset(created_at):
+    token = encode_cursor(created_at, 987654)
+    assert "=" not in token
+    decoded = decode_cursor(token)
+    assert decoded == (created_at, 987654)
+    assert decoded[0].utcoffset() == created_at.utcoffset()
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        "",
+        "not base64!",
+        "%%%",
+        base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+        _token({"created_at": "2024-05-01T00:00:00+00:00"}),
+        _token(["2024-05-01T00:00:00+00:00"]),
+        _token(["2024-05-01T00:00:00+00:00", 1, 2]),
+        _token(["yesterday", 1]),
+        _token([1714521600, 1]),
+        _token(["2024-05-01T00:00:00", 1]),
+        _token(["2024-05-01T00:00:00+00:00", "1; DROP TABLE feedback"]),
+        _token(["2024-05-01T00:00:00+00:00", 1.5]),
+        _token(None),
+    ],
+)
+def test_malformed_cursor_raises_value_error(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
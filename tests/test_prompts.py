@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from app.utils.constants import EMOTION_TYPES, URGENCY_FLAGS
+from app.utils.prompts import (
+    ANALYSIS_JSON_STRUCTURE,
+    ANALYSIS_RESPONSE_SCHEMA,
+    BATCH_ANALYSIS_RESPONSE_SCHEMA,
+    COMPACT_GUIDELINES,
+    TRUNCATION_MARKER,
+    CompiledPrompt,
+    estimate_tokens,
+    get_analysis_prompt,
+    get_batch_analysis_prompt,
+    prepare_feedback_text,
+)
+
+LONG_TEXT = " ".join(f"word{index}" for index in range(2000))
+
+
+def test_compiled_prompt_matches_str_format():
+    template = "Hello {name}, see {guidelines} and {name} again {{literal}}"
+    compiled = CompiledPrompt(template, guidelines="RULES")
+    assert compiled.fields == ("name", "name")
+    assert compiled.render(name="Ann") == template.format(name="Ann", guidelines="RULES")
+
+
+@pytest.mark.parametrize("budget", [5, 50, 333, 1000])
+def test_long_feedback_is_truncated_to_budget(budget):
+    text = prepare_feedback_text(LONG_TEXT, budget)
+    assert estimate_tokens(text) <= budget
+    assert text.endswith(TRUNCATION_MARKER)
+
+
+def test_short_feedback_is_untouched():
+    assert prepare_feedback_text("The nurse was kind.", 100) == "The nurse was kind."
+
+
+def test_prompts_apply_the_budget():
+    prompt = get_analysis_prompt(LONG_TEXT, "OPD", compact=True, max_input_tokens=100)
+    assert "word1999" not in prompt and TRUNCATION_MARKER in prompt
+    batch = get_batch_analysis_prompt(
+        [{"feedback_id": 7, "feedback_text": LONG_TEXT, "department": "Lab"}],
+        compact=True,
+        max_input_tokens=100,
+    )
+    assert "--- Feedback 7 ---" in batch and "word1999" not in batch
+
+
+def test_response_schemas_use_the_vocabularies():
+    for schema in (ANALYSIS_RESPONSE_SCHEMA, BATCH_ANALYSIS_RESPONSE_SCHEMA["items"]):
+        properties = schema["properties"]
+        assert properties["urgency"]["properties"]["flags"]["items"]["enum"] == URGENCY_FLAGS
+        assert properties["emotions"]["items"]["enum"] == EMOTION_TYPES
+    assert BATCH_ANALYSIS_RESPONSE_SCHEMA["items"]["required"][0] == "feedback_id"
+
+
+def test_prompts_list_the_vocabularies():
+    structure = json.loads(ANALYSIS_JSON_STRUCTURE.replace("0.0-1.0", "0").replace(", ...", ""))
+    assert structure["urgency"]["flags"] == URGENCY_FLAGS
+    assert structure["emotions"] == EMOTION_TYPES
+    for value in URGENCY_FLAGS + EMOTION_TYPES:
+        assert value in COMPACT_GUIDELINES
+    assert COMPACT_GUIDELINES in get_analysis_prompt("text", "OPD", compact=True)
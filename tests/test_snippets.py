@@ -0,0 +1,17 @@
+from app.utils.helpers import HIGHLIGHT_START, HIGHLIGHT_STOP, render_snippet
+
+
+def test_script_body_is_escaped():
+    raw = f"<script>alert(1)</script> the {HIGHLIGHT_START}nurse{HIGHLIGHT_STOP} was rude"
+    assert render_snippet(raw) == (
+        "&lt;script&gt;alert(1)&lt;/script&gt; the <mark>nurse</mark> was rude"
+    )
+
+
+def test_markup_around_matches_is_escaped():
+    raw = f'<img src=x onerror="x"> {HIGHLIGHT_START}pain & fever{HIGHLIGHT_STOP}'
+    assert render_snippet(raw) == "&lt;img src=x onerror=&quot;x&quot;&gt; <mark>pain &amp; fever</mark>"
+
+
+def test_missing_snippet():
+    assert render_snippet(None) is None
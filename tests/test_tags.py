@@ -0,0 +1,23 @@
+from app.utils.analysis_result import decode_structured_analysis
+from app.utils.constants import EMOTION_TYPES, URGENCY_FLAGS
+from app.utils.helpers import normalize_tag, normalize_tags
+
+
+def test_normalize_tag_spelling():
+    assert normalize_tag(" Severe Pain ") == "severe_pain"
+    assert normalize_tag("safety-concerns") == "safety_concerns"
+
+
+def test_normalize_tags_keeps_vocabulary_only():
+    values = ["Angry", "angry", "bored", "WORRIED"]
+    assert normalize_tags(values, EMOTION_TYPES) == ["angry", "worried"]
+    assert normalize_tags("severe_pain", URGENCY_FLAGS) == []
+
+
+def test_structured_result_is_normalized():
+    result = decode_structured_analysis(
+        '{"sentiment": "negative", "confidence_score": 0.9, "emotions": ["Frustrated"],'
+        ' "urgency": {"level": "critical", "reason": "x", "flags": ["Severe Pain", "other"]}}'
+    )
+    assert result.emotions == ["frustrated"]
+    assert result.urgency_flags == ["severe_pain"]
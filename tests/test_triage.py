@@ -0,0 +1,39 @@
+from app.services.triage import triage_feedback
+
+
+def test_critical_flag_alone_is_critical():
+    assert triage_feedback("I was in severe pain all night", rating=3).is_critical
+    assert triage_feedback("The nurse harassed my mother").is_critical
+
+
+def test_good_rating_keeps_single_hit_below_critical():
+    result = triage_feedback("Some severe pain after surgery but great care", rating=5)
+    assert result.level == "high"
+
+
+def test_medical_complication_needs_more_evidence():
+    assert triage_feedback("There was an infection", rating=3).level == "high"
+    assert triage_feedback("There was an infection", rating=1).is_critical
+
+
+def test_negated_hits_are_ignored():
+    result = triage_feedback("No severe pain and I never felt unsafe. Staff didn't seem negligent.", rating=2)
+    assert result.flags == ()
+    assert result.level == "medium"
+
+
+def test_negation_does_not_cross_clauses():
+    result = triage_feedback("No complaints. The ward was dangerous at night", rating=3)
+    assert result.flags == ("safety_concerns",)
+
+
+def test_added_symptom_is_more_urgent():
+    source = triage_feedback("Same visit, the staff were great", rating=3)
+    copy = triage_feedback("Same visit, the staff were great but I had chest pain", rating=3)
+    assert copy.is_more_urgent_than(source)
+    assert not source.is_more_urgent_than(copy)
+
+
+def test_identical_text_is_not_more_urgent():
+    first = triage_feedback("There was an infection after surgery", rating=2)
+    assert not triage_feedback("There was an infection after the surgery", rating=2).is_more_urgent_than(first)
@@ -0,0 +1,228 @@
+"""
+End-to-end throughput benchmark for the feedback analysis pipeline.
+
+Drives POST /feedback at a target rate, listens on Socket.IO for
+analysis_complete, and reports submission-to-analysis latency percentiles,
+Gemini calls per feedback (read from the stub's /stats) and DB pool
+utilization (sampled from /health/pool).
+
+Run the app against tools/gemini_stub.py with a raised submission limit, e.g.
+
+    FEEDBACK_SUBMISSION_LIMIT=100000/minute GEMINI_API_BASE_URL=http://localhost:9100/v1beta \\
+        uvicorn app.main:asgi_app --port 8000
+    python tools/benchmark.py --rate 20 --duration 60 --email admin@example.com --password '...'
+
+Requires the Socket.IO client extra: pip install "python-socketio[asyncio_client]".
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+import socketio
+
+DEPARTMENTS = ["Emergency", "OPD", "IPD", "Lab", "Pharmacy", "Cardiology"]
+SAMPLE_TEXTS = [
+    "Waited nearly three hours before anyone saw me, staff were polite but overwhelmed.",
+    "The doctor explained everything clearly and the nurses were very kind to my mother.",
+    "I was in severe pain after the procedure and nobody responded to the call button.",
+    "Billing was confusing and I was charged twice for the same lab test.",
+    "Pharmacy gave me the wrong dose and I only noticed at home. Please check your process.",
+]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class Benchmark:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.submitted: Dict[int, float] = {}
+        self.completed: Dict[int, float] = {}
+        self.submit_errors = 0
+        self.submit_latencies: List[float] = []
+        self.pool_samples: List[Dict[str, Any]] = []
+        self._all_done = asyncio.Event()
+
+    async def login(self, client: httpx.AsyncClient) -> str:
+        response = await client.post(
+            "/auth/login", json={"email": self.args.email, "password": self.args.password}
+        )
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+    def payload(self, index: int) -> Dict[str, Any]:
+        text = random.choice(SAMPLE_TEXTS)
+        if not self.args.allow_duplicates:
+            # Unique text so the analysis cache doesn't short-circuit Gemini
+            text = f"{text} (bench #{index} {random.random():.6f})"
+        return {
+            "patient_name": None,
+            "visit_date": datetime.now(timezone.utc).isoformat(),
+            "department": random.choice(DEPARTMENTS),
+            "doctor_name": None,
+            "feedback_text": text,
+            "rating": random.randint(1, 5),
+        }
+
+    async def submit(self, client: httpx.AsyncClient, index: int) -> None:
+        started = time.perf_counter()
+        try:
+            response = await client.post("/feedback", json=self.payload(index))
+            response.raise_for_status()
+        except httpx.HTTPError:
+            self.submit_errors += 1
+            return
+        self.submit_latencies.append(time.perf_counter() - started)
+        self.submitted[response.json()["id"]] = started
+
+    async def sample_pool(self, client: httpx.AsyncClient, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            try:
+                response = await client.get("/health/pool")
+                if response.status_code == 200:
+                    self.pool_samples.append(response.json())
+            except httpx.HTTPError:
+                pass
+            try:
+                await asyncio.wait_for(stop.wait(), self.args.pool_sample_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stub_stats(self) -> Optional[Dict[str, Any]]:
+        if not self.args.stub_url:
+            return None
+        async with httpx.AsyncClient(base_url=self.args.stub_url, timeout=5) as stub:
+            response = await stub.get("/stats")
+            return response.json() if response.status_code == 200 else None
+
+    async def reset_stub(self) -> None:
+        if self.args.stub_url:
+            async with httpx.AsyncClient(base_url=self.args.stub_url, timeout=5) as stub:
+                await stub.post("/stats/reset")
+
+    async def run(self) -> Dict[str, Any]:
+        args = self.args
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=30) as client:
+            token = await self.login(client)
+            sio = socketio.AsyncClient()
+
+            @sio.on("analysis_complete")
+            async def on_analysis_complete(data):
+                feedback_id = data.get("feedback_id")
+                if feedback_id is not None and feedback_id not in self.completed:
+                    self.completed[feedback_id] = time.perf_counter()
+                    if self.submitted and set(self.submitted) <= set(self.completed):
+                        self._all_done.set()
+
+            await sio.connect(args.base_url, auth={"token": f"Bearer {token}"}, transports=["websocket"])
+            await self.reset_stub()
+
+            stop_sampling = asyncio.Event()
+            sampler = asyncio.create_task(self.sample_pool(client, stop_sampling))
+
+            # Open-loop arrivals: submissions are scheduled on the clock, not on completions
+            total = int(args.rate * args.duration)
+            begin = time.perf_counter()
+            tasks = []
+            for index in range(total):
+                delay = begin + index / args.rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(self.submit(client, index)))
+            await asyncio.gather(*tasks)
+            submit_window = time.perf_counter() - begin
+
+            try:
+                await asyncio.wait_for(self._all_done.wait(), args.drain_timeout)
+            except asyncio.TimeoutError:
+                pass
+            elapsed = time.perf_counter() - begin
+
+            stop_sampling.set()
+            await sampler
+            await sio.disconnect()
+
+        return self.report(submit_window, elapsed, await self.stub_stats())
+
+    def report(self, submit_window: float, elapsed: float, stub: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        latencies = [
+            self.completed[fid] - started for fid, started in self.submitted.items() if fid in self.completed
+        ]
+        submitted = len(self.submitted)
+        report: Dict[str, Any] = {
+            "target_rate": self.args.rate,
+            "submitted": submitted,
+            "submit_errors": self.submit_errors,
+            "achieved_submit_rate": round(submitted / submit_window, 2) if submit_window else None,
+            "analyzed": len(latencies),
+            "analysis_throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else None,
+            "submit_p50_ms": _ms(percentile(self.submit_latencies, 50)),
+            "submit_p99_ms": _ms(percentile(self.submit_latencies, 99)),
+            "time_to_analysis_p50_s": _s(percentile(latencies, 50)),
+            "time_to_analysis_p95_s": _s(percentile(latencies, 95)),
+            "time_to_analysis_p99_s": _s(percentile(latencies, 99)),
+            "time_to_analysis_mean_s": _s(statistics.fmean(latencies)) if latencies else None,
+        }
+        if stub:
+            requests = stub.get("requests", 0)
+            report["gemini_requests"] = requests
+            report["gemini_calls_per_feedback"] = round(requests / submitted, 3) if submitted else None
+            report["gemini_rate_limited"] = stub.get("rate_limited", 0)
+            report["gemini_errors"] = stub.get("errors", 0)
+        if self.pool_samples:
+            capacity = [
+                max(1, sample.get("size", 0) + sample.get("max_overflow", 0)) for sample in self.pool_samples
+            ]
+            utilization = [
+                sample.get("checked_out", 0) / cap for sample, cap in zip(self.pool_samples, capacity)
+            ]
+            report["db_pool_utilization_mean"] = round(statistics.fmean(utilization), 3)
+            report["db_pool_utilization_max"] = round(max(utilization), 3)
+            report["db_pool_checked_out_max"] = max(s.get("checked_out", 0) for s in self.pool_samples)
+        return report
+
+
+def _ms(value: Optional[float]) -> Optional[float]:
+    return round(value * 1000, 1) if value is not None else None
+
+
+def _s(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--stub-url", default="http://localhost:9100", help="Gemini stub (empty to skip)")
+    parser.add_argument("--email", required=True, help="Staff/admin account for Socket.IO")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--rate", type=float, default=5.0, help="Submissions per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of submissions")
+    parser.add_argument("--drain-timeout", type=float, default=120.0, help="Max wait for analyses after submitting")
+    parser.add_argument("--pool-sample-interval", type=float, default=0.5)
+    parser.add_argument("--allow-duplicates", action="store_true", help="Reuse texts (exercises the cache)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(Benchmark(args).run())
+    width = max(len(key) for key in report)
+    for key, value in report.items():
+        print(f"{key.ljust(width)}  {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Offline stand-in for the Gemini generateContent API.
+
+Point the app at it with GEMINI_API_BASE_URL=http://localhost:9100/v1beta and
+any GOOGLE_API_KEY. Latency, error rate and 429 injection are configurable so
+the analysis pipeline can be load-tested without touching the real API.
+
+    python tools/gemini_stub.py --port 9100 --latency-p50-ms 800 --error-rate 0.02 --rate-limit-rate 0.05
+
+GET /stats returns request counters; POST /stats/reset clears them.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_ANALYSIS: Dict[str, Any] = {
+    "urgency": {
+        "level": "medium",
+        "reason": "Stub analysis - waiting time complaint",
+        "flags": [],
+    },
+    "sentiment": "negative",
+    "confidence_score": 0.82,
+    "emotions": ["frustrated"],
+    "categories": {"primary": "Wait Times", "subcategories": ["Scheduling"]},
+    "medical_concerns": {
+        "symptoms": [],
+        "complications": [],
+        "treatment_side_effects": [],
+        "medication_issues": [],
+    },
+    "actionable_insights": "Review triage staffing during peak hours.",
+    "key_points": ["Long wait before consultation", "Staff were polite", "Unclear discharge instructions"],
+}
+
+CRITICAL_URGENCY = {
+    "level": "critical",
+    "reason": "Stub analysis - patient reports severe pain",
+    "flags": ["severe_pain"],
+}
+
+_BATCH_ID_PATTERN = re.compile(r"^--- Feedback (\d+) ---$", re.MULTILINE)
+
+
+class StubConfig:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.latency_p50 = args.latency_p50_ms / 1000
+        self.latency_sigma = args.latency_sigma
+        self.error_rate = args.error_rate
+        self.rate_limit_rate = args.rate_limit_rate
+        self.retry_after = args.retry_after
+        self.analysis = DEFAULT_ANALYSIS
+        if args.response_file:
+            self.analysis = json.loads(Path(args.response_file).read_text(encoding="utf-8"))
+
+    def sample_latency(self) -> float:
+        # Log-normal: median latency_p50 with a long right tail controlled by sigma
+        return self.latency_p50 * math.exp(random.gauss(0, self.latency_sigma))
+
+
+def create_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="Gemini stub")
+    stats: Counter = Counter()
+    started = {"at": time.time()}
+
+    def analysis_for(text: str) -> Dict[str, Any]:
+        analysis = dict(config.analysis)
+        if "severe pain" in text.lower() or "harass" in text.lower():
+            analysis["urgency"] = CRITICAL_URGENCY
+        return analysis
+
+    def build_answer(prompt: str) -> Any:
+        ids = [int(match) for match in _BATCH_ID_PATTERN.findall(prompt)]
+        if not ids:
+            return analysis_for(prompt)
+        sections = _BATCH_ID_PATTERN.split(prompt)
+        texts = {int(sections[i]): sections[i + 1] for i in range(1, len(sections) - 1, 2)}
+        return [{"feedback_id": fid, **analysis_for(texts.get(fid, ""))} for fid in ids]
+
+    def envelope(text: str, prompt_tokens: int, output_tokens: int) -> Dict[str, Any]:
+        return {
+            "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": output_tokens,
+                "totalTokenCount": prompt_tokens + output_tokens,
+            },
+        }
+
+    @app.post("/v1beta/models/{model_action}")
+    async def generate(model_action: str, request: Request):
+        model, _, action = model_action.partition(":")
+        stats["requests"] += 1
+        stats[f"model:{model}"] += 1
+        body = await request.json()
+        prompt = "".join(
+            part.get("text", "")
+            for content in body.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        latency = config.sample_latency()
+
+        roll = random.random()
+        if roll < config.rate_limit_rate:
+            stats["rate_limited"] += 1
+            await asyncio.sleep(min(latency, 0.05))
+            return JSONResponse(
+                {"error": {"code": 429, "message": "Resource exhausted (stub)"}},
+                status_code=429,
+                headers={"Retry-After": str(config.retry_after)},
+            )
+        if roll < config.rate_limit_rate + config.error_rate:
+            stats["errors"] += 1
+            await asyncio.sleep(latency)
+            return JSONResponse({"error": {"code": 503, "message": "Unavailable (stub)"}}, status_code=503)
+
+        answer = json.dumps(build_answer(prompt))
+        prompt_tokens = max(1, len(prompt) // 4)
+        output_tokens = max(1, len(answer) // 4)
+
+        if action.startswith("streamGenerateContent"):
+            stats["streamed"] += 1
+
+            async def events():
+                pieces = [answer[i:i + 64] for i in range(0, len(answer), 64)]
+                for index, piece in enumerate(pieces):
+                    await asyncio.sleep(latency / max(len(pieces), 1))
+                    tokens = output_tokens if index == len(pieces) - 1 else 0
+                    yield f"data: {json.dumps(envelope(piece, prompt_tokens, tokens))}\n\n"
+                stats["ok"] += 1
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep(latency)
+        stats["ok"] += 1
+        return envelope(answer, prompt_tokens, output_tokens)
+
+    @app.get("/stats")
+    async def get_stats():
+        return {"uptime_seconds": round(time.time() - started["at"], 1), **stats}
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        stats.clear()
+        started["at"] = time.time()
+        return {"status": "reset"}
+
+    return app
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-p50-ms", type=float, default=800, help="Median response latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Log-normal spread (0 = fixed)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of 429 responses")
+    parser.add_argument("--retry-after", type=int, default=2, help="Retry-After seconds on 429")
+    parser.add_argument("--response-file", help="JSON file with the canned analysis object")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    uvicorn.run(create_app(StubConfig(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()